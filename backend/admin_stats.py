@@ -0,0 +1,159 @@
+"""
+Admin Stats - Dashboard numbers from one pass over appointments
+All appointment figures come from a single $facet aggregation; collection
+totals use estimated counts (collection metadata, no scan). The result is
+cached for a few seconds and dropped on writes.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from booking_service import BLOCKING_STATUSES
+from coalescing import CoalescedCalls
+
+logger = logging.getLogger(__name__)
+
+ADMIN_STATS_TTL_SECONDS = 5
+
+
+def admin_stats_pipeline(today: str, week_start: str, week_end: str) -> list:
+    """
+    $facet over appointments producing every appointment figure at once
+
+    Each facet sees the same single collection scan. Week revenue counts
+    completed appointments at their booked price (service_price), like the
+    analytics rollups; legacy rows without one use the service's price_value
+    via one $lookup per distinct service.
+    """
+    return [
+        {"$project": {"_id": 0, "status": 1, "appointment_date": 1, "service_id": 1, "service_price": 1}},
+        {"$facet": {
+            "by_status": [
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ],
+            "today": [
+                {"$match": {"appointment_date": today, "status": {"$ne": "cancelled"}}},
+                {"$count": "count"}
+            ],
+            "no_shows": [
+                {"$match": {"appointment_date": {"$lt": today}, "status": {"$in": BLOCKING_STATUSES}}},
+                {"$count": "count"}
+            ],
+            "week_revenue": [
+                {"$match": {
+                    "appointment_date": {"$gte": week_start, "$lte": week_end},
+                    "status": "completed"
+                }},
+                {"$group": {
+                    "_id": {"service_id": "$service_id", "price": "$service_price"},
+                    "count": {"$sum": 1}
+                }},
+                {"$lookup": {"from": "services", "localField": "_id.service_id", "foreignField": "id", "as": "service"}},
+                {"$group": {
+                    "_id": None,
+                    "revenue": {"$sum": {"$multiply": [
+                        "$count",
+                        {"$ifNull": ["$_id.price", {"$ifNull": [{"$first": "$service.price_value"}, 0]}]}
+                    ]}}
+                }}
+            ]
+        }}
+    ]
+
+
+def _first_count(rows: list, field: str = "count"):
+    return rows[0][field] if rows else 0
+
+
+async def compute_admin_stats(db, now: Optional[datetime] = None) -> Dict:
+    """
+    Admin dashboard figures
+
+    Returns:
+        total/pending/confirmed/completed/cancelled appointments (exact),
+        total services, gallery items and messages (estimated),
+        today_appointments, week_revenue (completed, Monday-Sunday) and
+        no_shows (past appointments still pending or confirmed)
+    """
+    now = now or datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    monday = now - timedelta(days=now.weekday())
+    week_start = monday.strftime("%Y-%m-%d")
+    week_end = (monday + timedelta(days=6)).strftime("%Y-%m-%d")
+
+    async def appointment_figures():
+        rows = await db.appointments.aggregate(admin_stats_pipeline(today, week_start, week_end)).to_list(1)
+        return rows[0]
+
+    facets, total_services, total_gallery, total_messages = await asyncio.gather(
+        appointment_figures(),
+        db.services.estimated_document_count(),
+        db.gallery.estimated_document_count(),
+        db.contact_messages.estimated_document_count()
+    )
+
+    by_status = {row["_id"]: row["count"] for row in facets["by_status"]}
+    return {
+        "total_appointments": sum(by_status.values()),
+        "total_services": total_services,
+        "total_gallery_items": total_gallery,
+        "total_messages": total_messages,
+        "pending_appointments": by_status.get("pending", 0),
+        "confirmed_appointments": by_status.get("confirmed", 0),
+        "completed_appointments": by_status.get("completed", 0),
+        "cancelled_appointments": by_status.get("cancelled", 0),
+        "today_appointments": _first_count(facets["today"]),
+        "week_revenue": round(float(_first_count(facets["week_revenue"], "revenue")), 2),
+        "no_shows": _first_count(facets["no_shows"])
+    }
+
+
+class AdminStatsCache:
+    """
+    The admin stats result, kept for ADMIN_STATS_TTL_SECONDS
+
+    Concurrent refreshes share one computation; invalidate() drops the
+    value and marks a computation in progress as stale, so a write is
+    never hidden behind a result computed before it.
+    """
+
+    def __init__(self, ttl: float = ADMIN_STATS_TTL_SECONDS):
+        self.ttl = ttl
+        self._value: Optional[Dict] = None
+        self._loaded_at = 0.0
+        self._inflight = CoalescedCalls()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_compute(self, compute) -> Dict:
+        if self._value is not None and time.monotonic() - self._loaded_at <= self.ttl:
+            self.hits += 1
+            return self._value
+
+        if "stats" not in self._inflight:
+            self.misses += 1
+
+        async def load():
+            generation = self._generation
+            value = await compute()
+            if generation == self._generation:
+                self._value = value
+                self._loaded_at = time.monotonic()
+            return value
+
+        return await self._inflight.run("stats", load)
+
+    def invalidate(self):
+        self._generation += 1
+        self._value = None
+        self.invalidations += 1
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+
+
+admin_stats_cache = AdminStatsCache()
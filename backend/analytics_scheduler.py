@@ -0,0 +1,86 @@
+"""
+Analytics Scheduler
+Recounts the analytics_daily rollups of recent days nightly and corrects any drift
+"""
+
+import logging
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from analytics_service import reconcile_recent_rollups
+
+logger = logging.getLogger(__name__)
+
+class AnalyticsScheduler:
+    def __init__(self, db):
+        self.db = db
+        self.scheduler = AsyncIOScheduler()
+
+    async def reconcile_task(self):
+        """
+        Run reconciliation - recount recent rollups from appointments
+        """
+        try:
+            logger.info("Starting analytics reconciliation...")
+            report = await reconcile_recent_rollups(self.db)
+
+            if report["corrected"] or report["removed"]:
+                logger.warning(
+                    f"Analytics reconciliation: {report['corrected']} corrected, "
+                    f"{report['removed']} removed, {report['skipped']} skipped of {report['rollups']} rollups"
+                )
+            else:
+                logger.debug(f"Analytics reconciliation complete: {report['rollups']} rollups, no drift")
+
+        except Exception as e:
+            logger.error(f"Error in analytics reconciliation: {str(e)}")
+
+    def start(self):
+        """
+        Start the scheduler - runs reconciliation every day at 3:30 AM
+        """
+        try:
+            # Run after the 3:00 AM user stats reconciliation
+            self.scheduler.add_job(
+                self.reconcile_task,
+                trigger=CronTrigger(hour=3, minute=30),
+                id='analytics_reconciliation',
+                name='Reconcile daily analytics rollups',
+                replace_existing=True
+            )
+
+            self.scheduler.start()
+            logger.info("Analytics scheduler started (runs daily at 3:30 AM)")
+
+        except Exception as e:
+            logger.error(f"Error starting analytics scheduler: {str(e)}")
+
+    def shutdown(self):
+        """
+        Shutdown the scheduler
+        """
+        try:
+            self.scheduler.shutdown()
+            logger.info("Analytics scheduler stopped")
+        except Exception as e:
+            logger.error(f"Error stopping analytics scheduler: {str(e)}")
+
+# Global scheduler instance
+analytics_scheduler = None
+
+def initialize_analytics_scheduler(db):
+    """
+    Initialize and start the analytics scheduler
+    """
+    global analytics_scheduler
+    analytics_scheduler = AnalyticsScheduler(db)
+    analytics_scheduler.start()
+    return analytics_scheduler
+
+def shutdown_analytics_scheduler():
+    """
+    Shutdown the analytics scheduler
+    """
+    global analytics_scheduler
+    if analytics_scheduler:
+        analytics_scheduler.shutdown()
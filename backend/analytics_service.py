@@ -0,0 +1,281 @@
+"""
+Analytics Service - Daily booking and revenue rollups
+Keeps one `analytics_daily` document per (date, artist, service) with
+booking counts and revenue, updated incrementally on every appointment
+write. Trend queries read the rollups instead of scanning appointments and
+parsing price strings.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from appointment_details import AppointmentDetailsLoader, booked_price
+from counter_documents import replace_if_unchanged
+
+logger = logging.getLogger(__name__)
+
+# analytics_daily document (one per appointment date, artist and service):
+#     {
+#         "_id": "2025-11-15|<artist_id>|<service_id>",
+#         "date": "2025-11-15",
+#         "artist_id": "...",
+#         "service_id": "...",
+#         "category": "nails",
+#         "bookings": 6,             # every appointment, any status
+#         "completed": 3,
+#         "cancelled": 1,
+#         "revenue": 135.0,          # completed appointments at their booked price
+#         "expected_revenue": 225.0, # all but cancelled appointments
+#         "updated_at": <datetime>
+#     }
+
+METRICS = ("bookings", "completed", "cancelled", "revenue", "expected_revenue")
+
+GROUP_BY_FIELDS = {"day": None, "artist": "artist_id", "service": "service_id", "category": "category"}
+
+# Days the nightly reconciliation recounts, relative to today
+RECONCILE_PAST_DAYS = 7
+RECONCILE_FUTURE_DAYS = 60
+
+
+def rollup_id(date: str, artist_id: str, service_id: str) -> str:
+    """_id of the rollup document for a date, artist and service"""
+    return f"{date}|{artist_id}|{service_id}"
+
+
+async def appointment_price(appointment: Dict, loader: AppointmentDetailsLoader) -> Dict:
+    """
+    Booked price and category of an appointment
+
+    Stored on the appointment at booking time; legacy rows fall back to
+    the current catalog entry (one cached lookup per service).
+    """
+    price = appointment.get("service_price")
+    category = appointment.get("service_category")
+    if price is None or category is None:
+        catalog = booked_price(await loader.service(appointment.get("service_id")))
+        price = catalog["service_price"] if price is None else price
+        category = catalog["service_category"] if category is None else category
+    return {"price": float(price), "category": category}
+
+
+def _contribution(appointment: Dict, price: float) -> Dict[str, float]:
+    """Rollup metrics one appointment adds"""
+    status = appointment.get("status")
+    return {
+        "bookings": 1,
+        "completed": 1 if status == "completed" else 0,
+        "cancelled": 1 if status == "cancelled" else 0,
+        "revenue": price if status == "completed" else 0,
+        "expected_revenue": price if status != "cancelled" else 0
+    }
+
+
+async def apply_appointment_rollup(
+    db,
+    previous: Optional[Dict],
+    current: Optional[Dict],
+    loader: Optional[AppointmentDetailsLoader] = None
+):
+    """
+    Update analytics_daily for one appointment write
+
+    The previous state is subtracted and the current one added, so
+    creates, status changes, moves and deletions all become one $inc per
+    affected rollup document.
+    """
+    loader = loader or AppointmentDetailsLoader(db)
+    deltas: Dict[str, Dict] = {}
+    for appointment, sign in ((previous, -1), (current, 1)):
+        if not appointment:
+            continue
+        priced = await appointment_price(appointment, loader)
+        key = rollup_id(appointment["appointment_date"], appointment["artist_id"], appointment["service_id"])
+        entry = deltas.setdefault(key, {
+            "fields": {
+                "date": appointment["appointment_date"],
+                "artist_id": appointment["artist_id"],
+                "service_id": appointment["service_id"],
+                "category": priced["category"]
+            },
+            "metrics": dict.fromkeys(METRICS, 0)
+        })
+        for metric, value in _contribution(appointment, priced["price"]).items():
+            entry["metrics"][metric] += sign * value
+
+    now = datetime.now(timezone.utc)
+    for key, entry in deltas.items():
+        changes = {metric: value for metric, value in entry["metrics"].items() if value}
+        if not changes:
+            continue  # e.g. notes edited
+        await db.analytics_daily.update_one(
+            {"_id": key},
+            {
+                "$inc": changes,
+                "$set": {"updated_at": now},
+                "$setOnInsert": entry["fields"]
+            },
+            upsert=True
+        )
+        if changes.get("bookings", 0) < 0:
+            # Last appointment moved away or deleted: drop the empty rollup
+            await db.analytics_daily.delete_one({"_id": key, "bookings": {"$lte": 0}})
+
+
+def _date_query(field: str, from_date: Optional[str], to_date: Optional[str]) -> Dict:
+    """Inclusive date range filter on field (open ends for None)"""
+    bounds = {}
+    if from_date:
+        bounds["$gte"] = from_date
+    if to_date:
+        bounds["$lte"] = to_date
+    return {field: bounds} if bounds else {}
+
+
+async def compute_rollups(db, from_date: Optional[str] = None, to_date: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Recompute rollup documents from appointments
+
+    Appointments are streamed with a narrow projection; legacy rows without
+    a booked price are priced from the catalog, each service fetched once.
+
+    Returns:
+        {rollup_id: {"date", "artist_id", "service_id", "category", metrics...}}
+    """
+    query = _date_query("appointment_date", from_date, to_date)
+
+    loader = AppointmentDetailsLoader(db)
+    rollups: Dict[str, Dict] = {}
+    cursor = db.appointments.find(
+        query,
+        {
+            "_id": 0,
+            "appointment_date": 1,
+            "artist_id": 1,
+            "service_id": 1,
+            "status": 1,
+            "service_price": 1,
+            "service_category": 1
+        }
+    )
+    async for appt in cursor:
+        priced = await appointment_price(appt, loader)
+        key = rollup_id(appt["appointment_date"], appt["artist_id"], appt["service_id"])
+        rollup = rollups.setdefault(key, {
+            "date": appt["appointment_date"],
+            "artist_id": appt["artist_id"],
+            "service_id": appt["service_id"],
+            "category": priced["category"],
+            **dict.fromkeys(METRICS, 0)
+        })
+        for metric, value in _contribution(appt, priced["price"]).items():
+            rollup[metric] += value
+
+    for rollup in rollups.values():
+        for metric in ("revenue", "expected_revenue"):
+            rollup[metric] = round(rollup[metric], 2)
+    return rollups
+
+
+def _metrics(rollup: Optional[Dict]) -> Dict:
+    """Comparable metric values of a rollup (missing fields count as zero)"""
+    return {metric: round((rollup or {}).get(metric) or 0, 2) for metric in METRICS}
+
+
+async def reconcile_rollups(
+    db,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    dry_run: bool = False
+) -> Dict:
+    """
+    Recount the rollups of a date range and fix documents that drifted
+
+    Incremental updates can double-apply when two writes race, so the
+    nightly job recounts recent days and backfill_analytics.py recounts
+    any range (all history by default).
+
+    Returns:
+        {"rollups": n, "corrected": n, "skipped": n, "removed": n}
+    """
+    started_at = datetime.now(timezone.utc)
+    expected = await compute_rollups(db, from_date, to_date)
+    stored = {
+        doc["_id"]: doc
+        async for doc in db.analytics_daily.find(_date_query("date", from_date, to_date))
+    }
+
+    report = {"rollups": len(expected), "corrected": 0, "skipped": 0, "removed": 0}
+    for key in set(expected) | set(stored):
+        want, have = expected.get(key), stored.get(key)
+        if want is not None and have is not None and _metrics(want) == _metrics(have):
+            continue
+        outcome = "removed" if want is None else "corrected"
+        if dry_run or await replace_if_unchanged(db.analytics_daily, key, have, want, started_at):
+            report[outcome] += 1
+        else:
+            report["skipped"] += 1
+    return report
+
+
+async def reconcile_recent_rollups(db) -> Dict:
+    """Recount the days around today (RECONCILE_PAST_DAYS back, RECONCILE_FUTURE_DAYS ahead)"""
+    today = datetime.now()
+    return await reconcile_rollups(
+        db,
+        (today - timedelta(days=RECONCILE_PAST_DAYS)).strftime("%Y-%m-%d"),
+        (today + timedelta(days=RECONCILE_FUTURE_DAYS)).strftime("%Y-%m-%d")
+    )
+
+
+def _totals(points: List[Dict]) -> Dict:
+    """Metric sums over a series"""
+    totals = {metric: sum(point[metric] for point in points) for metric in METRICS}
+    for metric in ("revenue", "expected_revenue"):
+        totals[metric] = round(totals[metric], 2)
+    return totals
+
+
+async def query_rollups(
+    db,
+    start_date: str,
+    end_date: str,
+    group_by: str = "day",
+    filters: Optional[Dict] = None
+) -> List[Dict]:
+    """
+    Daily time series from the rollups, one series per group
+
+    Args:
+        db: MongoDB database instance
+        start_date / end_date: Inclusive date range (YYYY-MM-DD)
+        group_by: "day" (one series), "artist", "service" or "category"
+        filters: Equality filters on artist_id / service_id / category
+
+    Returns:
+        [{"key": "<artist_id>", "totals": {...}, "points": [{"date": ..., "bookings": ..., ...}]}]
+        ordered by revenue, highest first; "key" is None for group_by="day"
+    """
+    field = GROUP_BY_FIELDS[group_by]
+    match = {"date": {"$gte": start_date, "$lte": end_date}, **(filters or {})}
+    group_id = {"date": "$date"}
+    if field:
+        group_id["key"] = f"${field}"
+
+    rows = await db.analytics_daily.aggregate([
+        {"$match": match},
+        {"$group": {"_id": group_id, **{metric: {"$sum": f"${metric}"} for metric in METRICS}}},
+        {"$sort": {"_id.date": 1}}
+    ]).to_list(None)
+
+    series: Dict = {}
+    for row in rows:
+        point = {"date": row["_id"]["date"], **{metric: row[metric] for metric in METRICS}}
+        for metric in ("revenue", "expected_revenue"):
+            point[metric] = round(point[metric], 2)
+        series.setdefault(row["_id"].get("key"), []).append(point)
+
+    result = [{"key": key, "totals": _totals(points), "points": points} for key, points in series.items()]
+    result.sort(key=lambda entry: entry["totals"]["revenue"], reverse=True)
+    return result
@@ -0,0 +1,235 @@
+"""
+Appointment Details - Service/artist snapshots on appointments
+Appointments store a snapshot of their service names, duration and artist
+name at booking time, so reads are single-document. Catalog edits are
+propagated to upcoming appointments in the background. Legacy rows without
+a snapshot are filled by a request-scoped loader that fetches each
+collection once with $in, instead of one find_one per row.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from booking_service import parse_price
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = ("service_name_en", "service_name_de", "service_name_fr", "service_duration", "artist_name")
+
+# Catalog edits that change what upcoming appointments display
+SERVICE_NAME_FIELDS = ("service_name_en", "service_name_de", "service_name_fr")
+
+PROPAGATION_BATCH_SIZE = 500
+
+# Propagation tasks still running; kept so they are not garbage collected
+_pending_propagations: Set[asyncio.Task] = set()
+
+SERVICE_DETAIL_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "name_en": 1,
+    "name_de": 1,
+    "name_fr": 1,
+    "duration": 1,
+    "category": 1,
+    "price": 1,
+    "price_value": 1
+}
+
+ARTIST_DETAIL_PROJECTION = {"_id": 0, "id": 1, "name": 1}
+
+
+def appointment_snapshot(service: Optional[Dict], artist: Optional[Dict]) -> Dict:
+    """Snapshot fields stored on an appointment"""
+    service = service or {}
+    return {
+        "service_name_en": service.get("name_en", ""),
+        "service_name_de": service.get("name_de", ""),
+        "service_name_fr": service.get("name_fr", ""),
+        "service_duration": service.get("duration", ""),
+        "artist_name": (artist or {}).get("name", "")
+    }
+
+
+def booked_price(service: Optional[Dict]) -> Dict:
+    """
+    Price and category stored on an appointment at booking time
+
+    Unlike the names these are never propagated: revenue counts what the
+    appointment was booked for, not today's catalog price.
+    """
+    service = service or {}
+    price = service.get("price_value")
+    if price is None:
+        price = parse_price(service.get("price"))
+    return {"service_price": price, "service_category": service.get("category", "")}
+
+
+def has_snapshot(appointment: Dict) -> bool:
+    """Whether an appointment already carries its snapshot (legacy rows store None)"""
+    return appointment.get("service_name_de") is not None and appointment.get("artist_name") is not None
+
+
+class AppointmentDetailsLoader:
+    """
+    Services and artists referenced by appointments, loaded in batches
+
+    Create one per request or scheduler run. Ids are fetched at most once
+    per loader; ids that do not exist are remembered as missing, so they
+    are not queried again either.
+
+    Usage:
+        loader = AppointmentDetailsLoader(db)
+        await loader.enrich(appointments)             # lists
+        service = await loader.service(service_id)    # single lookups
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._services: Dict[str, Optional[Dict]] = {}
+        self._artists: Dict[str, Optional[Dict]] = {}
+
+    async def load(self, appointments: Iterable[Dict]):
+        """Fetch every not yet loaded service and artist of appointments without a snapshot (≤ 2 queries)"""
+        appointments = [appt for appt in appointments if not has_snapshot(appt)]
+        await self._load_services(appt.get("service_id") for appt in appointments)
+        await self._load_artists(appt.get("artist_id") for appt in appointments)
+
+    async def _load_services(self, ids: Iterable[Optional[str]]):
+        missing = {service_id for service_id in ids if service_id and service_id not in self._services}
+        if not missing:
+            return
+        found = await self.db.services.find(
+            {"id": {"$in": list(missing)}},
+            SERVICE_DETAIL_PROJECTION
+        ).to_list(None)
+        for service_id in missing:
+            self._services[service_id] = None
+        for service in found:
+            self._services[service["id"]] = service
+
+    async def _load_artists(self, ids: Iterable[Optional[str]]):
+        missing = {artist_id for artist_id in ids if artist_id and artist_id not in self._artists}
+        if not missing:
+            return
+        found = await self.db.artists.find(
+            {"id": {"$in": list(missing)}},
+            ARTIST_DETAIL_PROJECTION
+        ).to_list(None)
+        for artist_id in missing:
+            self._artists[artist_id] = None
+        for artist in found:
+            self._artists[artist["id"]] = artist
+
+    async def service(self, service_id: Optional[str]) -> Optional[Dict]:
+        """Service with name_*, duration, category and price, or None"""
+        await self._load_services([service_id])
+        return self._services.get(service_id)
+
+    async def artist(self, artist_id: Optional[str]) -> Optional[Dict]:
+        """Artist with name, or None"""
+        await self._load_artists([artist_id])
+        return self._artists.get(artist_id)
+
+    async def snapshot(self, appointment: Dict) -> Dict:
+        """Snapshot fields of an appointment: stored ones, or loaded for legacy rows"""
+        if has_snapshot(appointment):
+            return {field: appointment.get(field) for field in SNAPSHOT_FIELDS}
+        return appointment_snapshot(
+            await self.service(appointment.get("service_id")),
+            await self.artist(appointment.get("artist_id"))
+        )
+
+    async def enrich(self, appointments: List[Dict]) -> List[Dict]:
+        """
+        Fill in service_name_*, service_duration and artist_name in place
+
+        Only legacy appointments without a snapshot need a lookup; those
+        whose service or artist no longer exists are left without the
+        fields, as before.
+
+        Returns:
+            The same list, for chaining
+        """
+        await self.load(appointments)
+        for appt in appointments:
+            if has_snapshot(appt):
+                continue
+            service = self._services.get(appt.get("service_id"))
+            if service:
+                appt['service_name_en'] = service.get('name_en', '')
+                appt['service_name_de'] = service.get('name_de', '')
+                appt['service_name_fr'] = service.get('name_fr', '')
+                appt['service_duration'] = service.get('duration', '')
+
+            artist = self._artists.get(appt.get("artist_id"))
+            if artist:
+                appt['artist_name'] = artist.get('name', '')
+        return appointments
+
+
+async def _propagate(db, match: Dict, changes: Dict) -> int:
+    """
+    Apply snapshot changes to upcoming appointments in batches
+
+    Only rows that still differ are selected, so each batch makes progress
+    and a rerun (or a concurrent edit) is harmless.
+
+    Returns:
+        Number of appointments updated
+    """
+    query = {
+        **match,
+        "appointment_date": {"$gte": datetime.now().strftime("%Y-%m-%d")},
+        # Legacy rows have no snapshot to update; the loader fills them on read
+        "service_name_de": {"$ne": None},
+        "artist_name": {"$ne": None},
+        "$or": [{field: {"$ne": value}} for field, value in changes.items()]
+    }
+    updated = 0
+    while True:
+        batch = await db.appointments.find(query, {"_id": 0, "id": 1}).limit(
+            PROPAGATION_BATCH_SIZE
+        ).to_list(PROPAGATION_BATCH_SIZE)
+        if not batch:
+            return updated
+        result = await db.appointments.update_many(
+            {"id": {"$in": [appt["id"] for appt in batch]}},
+            {"$set": changes}
+        )
+        updated += result.modified_count
+        if len(batch) < PROPAGATION_BATCH_SIZE:
+            return updated
+
+
+async def propagate_service_snapshot(db, service: Dict) -> int:
+    """
+    Copy a renamed service's names to its upcoming appointments
+
+    The booked duration stays as it was: it is what the slot was reserved
+    for (duration_minutes), and a catalog change must not silently alter it.
+    """
+    changes = {field: value for field, value in appointment_snapshot(service, None).items() if field in SERVICE_NAME_FIELDS}
+    return await _propagate(db, {"service_id": service["id"]}, changes)
+
+
+async def propagate_artist_snapshot(db, artist: Dict) -> int:
+    """Copy a renamed artist's name to their upcoming appointments"""
+    return await _propagate(db, {"artist_id": artist["id"]}, {"artist_name": artist.get("name", "")})
+
+
+def schedule_snapshot_propagation(propagate, db, document: Dict):
+    """Run a propagate_* function in the background so the catalog edit returns at once"""
+
+    async def run():
+        try:
+            updated = await propagate(db, document)
+            logger.info(f"Snapshot propagation for {document['id']}: {updated} appointments updated")
+        except Exception as e:
+            logger.error(f"Error propagating snapshot for {document['id']}: {str(e)}")
+
+    task = asyncio.create_task(run())
+    _pending_propagations.add(task)
+    task.add_done_callback(_pending_propagations.discard)
@@ -0,0 +1,79 @@
+"""
+Double Booking Audit
+Scans active appointments for overlaps (including the 10 min buffer) with a
+single streaming sweep; safe on large collections and on a live database
+Run: python audit_overlaps.py [--from YYYY-MM-DD] [--json report.json]
+"""
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from overlap_audit import find_overlaps
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+BUFFER_TIME = 10
+
+
+def _argument(name: str):
+    if name in sys.argv:
+        index = sys.argv.index(name)
+        if index + 1 < len(sys.argv):
+            return sys.argv[index + 1]
+    return None
+
+
+async def audit_overlaps(from_date: str = None, json_path: str = None):
+    """Print every conflicting pair and a summary; optionally write a JSON report"""
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    print(f"🔍 Auditing appointments for double bookings{f' from {from_date}' if from_date else ''}...")
+
+    report_file = open(json_path, "w") if json_path else None
+    try:
+        if report_file:
+            report_file.write("[\n")
+        first = True
+        async for entry in find_overlaps(db, buffer_time=BUFFER_TIME, from_date=from_date):
+            if report_file:
+                report_file.write(("" if first else ",\n") + json.dumps(entry))
+                first = False
+
+            if entry["type"] == "summary":
+                print(f"\n📊 Scanned {entry['appointments']} appointments on {entry['artist_days']} artist-days")
+                if entry["skipped"]:
+                    print(f"⚠️  {entry['skipped']} appointments skipped (no service duration)")
+                if entry["conflicts"]:
+                    print(f"❌ {entry['conflicts']} conflicting pairs on "
+                          f"{entry['artist_days_with_conflicts']} artist-days")
+                else:
+                    print("✅ No double bookings found")
+                continue
+
+            kind = f"{entry['overlap_minutes']} min overlap" if entry["overlap_minutes"] else "buffer only"
+            print(f"   {entry['artist_id']} {entry['date']}: "
+                  f"{entry['first']['time']}-{entry['first']['end']} ({entry['first']['id']}) ↔ "
+                  f"{entry['second']['time']}-{entry['second']['end']} ({entry['second']['id']}) [{kind}]")
+
+        if report_file:
+            report_file.write("\n]\n")
+            print(f"📝 Report written to {json_path}")
+
+    except Exception as e:
+        print(f"\n❌ Error during audit: {str(e)}")
+    finally:
+        if report_file:
+            report_file.close()
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(audit_overlaps(from_date=_argument("--from"), json_path=_argument("--json")))
@@ -0,0 +1,124 @@
+"""
+Availability Events - In-process pub/sub for live availability
+Booking pages subscribe to an artist-day; every appointment or hold write
+publishes the day's new occupancy once, and each subscriber derives its own
+availability diff in memory (no per-subscriber database reads).
+"""
+
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on concurrently open streams in one process
+MAX_SUBSCRIPTIONS = 1000
+
+
+class AvailabilitySubscription:
+    """
+    One open stream's mailbox
+
+    Only the latest occupancy matters, so a publish overwrites the previous
+    one instead of queueing: a slow client skips intermediate states and
+    memory per subscriber stays constant.
+    """
+
+    def __init__(self, artist_id: str, date_str: str):
+        self.artist_id = artist_id
+        self.date = date_str
+        self._blocked_slots: Optional[List[Dict]] = None
+        self._changed = asyncio.Event()
+
+    def push(self, blocked_slots: List[Dict]):
+        self._blocked_slots = blocked_slots
+        self._changed.set()
+
+    async def next_change(self, timeout: float) -> Optional[List[Dict]]:
+        """Latest blocked slots after a change, or None if nothing changed within timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._changed.clear()
+        return self._blocked_slots
+
+
+class AvailabilityBroker:
+    """Subscriptions per artist-day; publish() fans out in O(subscribers)"""
+
+    def __init__(self, max_subscriptions: int = MAX_SUBSCRIPTIONS):
+        self.max_subscriptions = max_subscriptions
+        self._subscriptions: Dict[Tuple[str, str], Set[AvailabilitySubscription]] = {}
+        self._count = 0
+        self.published = 0
+        self.delivered = 0
+
+    @property
+    def is_full(self) -> bool:
+        return self._count >= self.max_subscriptions
+
+    def subscribe(self, artist_id: str, date_str: str) -> Optional[AvailabilitySubscription]:
+        """Open a subscription, or None if the process is at capacity"""
+        if self.is_full:
+            return None
+        subscription = AvailabilitySubscription(artist_id, date_str)
+        self._subscriptions.setdefault((artist_id, date_str), set()).add(subscription)
+        self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription: AvailabilitySubscription):
+        day = (subscription.artist_id, subscription.date)
+        subscribers = self._subscriptions.get(day)
+        if subscribers and subscription in subscribers:
+            subscribers.remove(subscription)
+            self._count -= 1
+            if not subscribers:
+                del self._subscriptions[day]
+
+    def has_subscribers(self, artist_id: str, date_str: str) -> bool:
+        return (artist_id, date_str) in self._subscriptions
+
+    def subscribed_dates(self, artist_id: str) -> List[str]:
+        """Dates with open streams for an artist (for schedule edits)"""
+        return [date_str for subscribed_artist, date_str in self._subscriptions if subscribed_artist == artist_id]
+
+    def publish(self, artist_id: str, date_str: str, blocked_slots: List[Dict]) -> int:
+        """
+        Hand an artist-day's new occupancy to every subscriber
+
+        Returns:
+            Number of subscribers notified
+        """
+        subscribers = self._subscriptions.get((artist_id, date_str), ())
+        for subscription in subscribers:
+            subscription.push(blocked_slots)
+        self.published += 1
+        self.delivered += len(subscribers)
+        return len(subscribers)
+
+    def stats(self) -> Dict:
+        return {
+            "subscriptions": self._count,
+            "artist_days": len(self._subscriptions),
+            "published": self.published,
+            "delivered": self.delivered
+        }
+
+
+availability_broker = AvailabilityBroker()
+
+
+def diff_slots(previous: List[str], current: List[str]) -> Dict[str, List[str]]:
+    """
+    Slots that became free or were taken between two availability lists
+
+    Returns:
+        {"added": ["14:00"], "removed": ["10:00", "10:30"]}
+    """
+    previous_set = set(previous)
+    current_set = set(current)
+    return {
+        "added": [slot for slot in current if slot not in previous_set],
+        "removed": [slot for slot in previous if slot not in current_set]
+    }
@@ -0,0 +1,681 @@
+"""
+Availability Service - Per-artist working hours and slot search
+Compiles each artist's weekly schedule, breaks and days off into a cached
+interval set per artist-day; availability subtracts bookings from it.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from booking_service import (
+    DayOccupancy,
+    get_business_hours,
+    is_valid_booking_date,
+    minutes_to_time,
+    time_to_minutes,
+)
+from coalescing import CoalescedCalls
+from occupancy_service import get_schedule_blocked_slots, get_schedule_blocked_slots_bulk
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOT_INTERVAL = 30
+
+# Compiled artist-days kept in memory; schedule documents are re-read after
+# SCHEDULE_TTL_SECONDS so edits made through another worker show up quickly
+SCHEDULE_CACHE_SIZE = 4096
+SCHEDULE_TTL_SECONDS = 60
+
+# Computed availability per artist-day. Writes in this process invalidate
+# immediately; the TTL bounds how stale other workers' writes can look
+# (claims still reject a stale pick at booking time).
+AVAILABILITY_CACHE_SIZE = 2048
+AVAILABILITY_TTL_SECONDS = 10
+
+
+class WorkingDay:
+    """
+    An artist's bookable time on one date, as sorted [start, end) minutes
+
+    Candidate start times are laid out every slot_interval minutes from the
+    start of each working interval.
+    """
+
+    def __init__(self, intervals: List[Tuple[int, int]], slot_interval: int = DEFAULT_SLOT_INTERVAL):
+        self.intervals = sorted((start, end) for start, end in intervals if end > start)
+        self.slot_interval = slot_interval
+        self._starts = [
+            (start, end)
+            for interval_start, end in self.intervals
+            for start in range(interval_start, end, slot_interval)
+        ]
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self.intervals)
+
+    def candidate_starts(self, duration: int) -> List[int]:
+        """Start times whose whole service fits inside working hours"""
+        return [start for start, end in self._starts if start + duration <= end]
+
+    def contains(self, start: int, duration: int) -> bool:
+        """Whether [start, start + duration) lies inside one working interval"""
+        return any(
+            interval_start <= start and start + duration <= end
+            for interval_start, end in self.intervals
+        )
+
+
+def _subtract(intervals: List[Tuple[int, int]], cut_start: int, cut_end: int) -> List[Tuple[int, int]]:
+    """Remove [cut_start, cut_end) from a list of intervals"""
+    result = []
+    for start, end in intervals:
+        if cut_end <= start or end <= cut_start:
+            result.append((start, end))
+            continue
+        if start < cut_start:
+            result.append((start, cut_start))
+        if cut_end < end:
+            result.append((cut_end, end))
+    return result
+
+
+def default_weekly_schedule() -> Dict[str, List[Dict[str, str]]]:
+    """Salon business hours (get_business_hours) as a weekly schedule"""
+    # 2024-01-01 is a Monday, so offsets 0-6 map to weekday numbers
+    monday = datetime(2024, 1, 1)
+    weekly = {}
+    for weekday in range(7):
+        hours = get_business_hours((monday + timedelta(days=weekday)).strftime("%Y-%m-%d"))
+        weekly[str(weekday)] = [] if hours["end_hour"] == 0 else [{
+            "start": minutes_to_time(hours["start_hour"] * 60),
+            "end": minutes_to_time(hours["end_hour"] * 60)
+        }]
+    return weekly
+
+
+def compile_working_day(schedule: Optional[Dict], date_str: str) -> WorkingDay:
+    """
+    Compile a schedule document into the working intervals of one date
+
+    Args:
+        schedule: Artist schedule document, or None for salon business hours
+        date_str: Date in YYYY-MM-DD format
+
+    Returns:
+        WorkingDay (closed days have no intervals)
+
+    Schedule document:
+        {
+            "weekly": {"0": [{"start": "09:00", "end": "19:00"}], ...},  # 0 = Monday
+            "breaks": [{"weekday": null, "start": "12:30", "end": "13:00"}],
+            "days_off": [{"start_date": "2025-12-24", "end_date": "2025-12-31"}],
+            "slot_interval": 30
+        }
+    """
+    if not schedule:
+        hours = get_business_hours(date_str)
+        return WorkingDay([(hours["start_hour"] * 60, hours["end_hour"] * 60)])
+
+    slot_interval = schedule.get("slot_interval") or DEFAULT_SLOT_INTERVAL
+
+    for day_off in schedule.get("days_off", []):
+        if day_off["start_date"] <= date_str <= (day_off.get("end_date") or day_off["start_date"]):
+            return WorkingDay([], slot_interval)
+
+    weekday = datetime.strptime(date_str, "%Y-%m-%d").weekday()
+    intervals = [
+        (time_to_minutes(block["start"]), time_to_minutes(block["end"]))
+        for block in schedule.get("weekly", {}).get(str(weekday), [])
+    ]
+
+    for pause in schedule.get("breaks", []):
+        if pause.get("weekday") is None or pause["weekday"] == weekday:
+            intervals = _subtract(intervals, time_to_minutes(pause["start"]), time_to_minutes(pause["end"]))
+
+    return WorkingDay(intervals, slot_interval)
+
+
+class ScheduleCache:
+    """
+    LRU cache of compiled artist-days
+
+    Entries expire after SCHEDULE_TTL_SECONDS; saving a schedule through
+    this process invalidates the artist immediately.
+    """
+
+    def __init__(self, max_size: int = SCHEDULE_CACHE_SIZE, ttl: float = SCHEDULE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._days: "OrderedDict[Tuple[str, str], Tuple[float, WorkingDay]]" = OrderedDict()
+
+    def get(self, artist_id: str, date_str: str) -> Optional[WorkingDay]:
+        key = (artist_id, date_str)
+        entry = self._days.get(key)
+        if entry is None:
+            return None
+        loaded_at, working_day = entry
+        if time.monotonic() - loaded_at > self.ttl:
+            del self._days[key]
+            return None
+        self._days.move_to_end(key)
+        return working_day
+
+    def put(self, artist_id: str, date_str: str, working_day: WorkingDay):
+        self._days[(artist_id, date_str)] = (time.monotonic(), working_day)
+        self._days.move_to_end((artist_id, date_str))
+        while len(self._days) > self.max_size:
+            self._days.popitem(last=False)
+
+    def invalidate(self, artist_id: str):
+        for key in [key for key in self._days if key[0] == artist_id]:
+            del self._days[key]
+
+
+schedule_cache = ScheduleCache()
+
+
+class AvailabilityCache:
+    """
+    LRU/TTL cache of computed availability, one entry per artist-day
+
+    An entry holds the results for every (duration, buffer) asked for that
+    day, so one invalidation drops them all. Identical concurrent misses
+    are coalesced into one computation that every caller awaits.
+    """
+
+    def __init__(self, max_size: int = AVAILABILITY_CACHE_SIZE, ttl: float = AVAILABILITY_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._days: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+        self._inflight = CoalescedCalls()
+        self._stale_inflight = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _lookup(self, day: Tuple[str, str], variant: Tuple):
+        entry = self._days.get(day)
+        if entry is None:
+            return None
+        loaded_at, results = entry
+        if time.monotonic() - loaded_at > self.ttl:
+            del self._days[day]
+            self.expirations += 1
+            return None
+        self._days.move_to_end(day)
+        return results.get(variant)
+
+    def _store(self, day: Tuple[str, str], variant: Tuple, value):
+        entry = self._days.get(day)
+        if entry is None:
+            entry = (time.monotonic(), {})
+            self._days[day] = entry
+        entry[1][variant] = value
+        self._days.move_to_end(day)
+        while len(self._days) > self.max_size:
+            self._days.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_compute(self, artist_id: str, date_str: str, variant: Tuple, compute):
+        """
+        Cached value for an artist-day variant, computing it at most once
+
+        Args:
+            artist_id: Artist ID
+            date_str: Date in YYYY-MM-DD format
+            variant: What else the value depends on, e.g. (duration, buffer)
+            compute: Coroutine function producing the value on a miss
+        """
+        day = (artist_id, date_str)
+        value = self._lookup(day, variant)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        key = (artist_id, date_str, variant)
+        if key in self._inflight:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+
+        async def load():
+            try:
+                value = await compute()
+            finally:
+                stale = key in self._stale_inflight
+                self._stale_inflight.discard(key)
+            if not stale:
+                # A write during the computation means the value may predate it
+                self._store(day, variant, value)
+            return value
+
+        return await self._inflight.run(key, load)
+
+    def invalidate(self, artist_id: str, date_str: Optional[str] = None):
+        """Drop an artist-day (or every day of an artist) after a write"""
+        self.invalidations += 1
+        for day in [day for day in self._days if day[0] == artist_id and date_str in (None, day[1])]:
+            del self._days[day]
+        for key in self._inflight:
+            if key[0] == artist_id and date_str in (None, key[1]):
+                self._stale_inflight.add(key)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._days),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
+
+
+availability_cache = AvailabilityCache()
+
+
+async def get_working_days(
+    db,
+    artist_ids: List[str],
+    dates: List[str]
+) -> Dict[Tuple[str, str], WorkingDay]:
+    """
+    Compiled working days for many artists and dates
+
+    Cache misses cost one $in query over artist_schedules for all artists
+    involved; artists without a schedule use salon business hours.
+    """
+    working_days = {}
+    missing_artists = set()
+    for artist_id in artist_ids:
+        for date_str in dates:
+            working_day = schedule_cache.get(artist_id, date_str)
+            if working_day is None:
+                missing_artists.add(artist_id)
+            else:
+                working_days[(artist_id, date_str)] = working_day
+
+    if missing_artists:
+        schedules = await db.artist_schedules.find(
+            {"artist_id": {"$in": list(missing_artists)}},
+            {"_id": 0}
+        ).to_list(None)
+        by_artist = {schedule["artist_id"]: schedule for schedule in schedules}
+        for artist_id in missing_artists:
+            for date_str in dates:
+                if (artist_id, date_str) in working_days:
+                    continue
+                working_day = compile_working_day(by_artist.get(artist_id), date_str)
+                schedule_cache.put(artist_id, date_str, working_day)
+                working_days[(artist_id, date_str)] = working_day
+
+    return working_days
+
+
+async def get_working_day(db, artist_id: str, date_str: str) -> WorkingDay:
+    """Compiled working day for one artist and date"""
+    return (await get_working_days(db, [artist_id], [date_str]))[(artist_id, date_str)]
+
+
+def available_starts(
+    working_day: WorkingDay,
+    occupancy: DayOccupancy,
+    duration: int,
+    buffer_time: int = 10
+) -> List[int]:
+    """Free start times: the compiled working day minus booked occupancy"""
+    return occupancy.free_starts(working_day.candidate_starts(duration), duration, buffer_time)
+
+
+async def get_available_slots(
+    db,
+    artist_id: str,
+    date_str: str,
+    duration: int,
+    buffer_time: int = 10,
+    exclude_appointment_id: Optional[str] = None,
+    exclude_hold_id: Optional[str] = None
+) -> Tuple[List[str], List[Dict]]:
+    """
+    Available HH:MM slots for one artist-day
+
+    Bookings come from the artist-day's schedule document (one find_one).
+    Plain lookups (nothing excluded) are served from availability_cache.
+
+    Returns:
+        (available_slots, blocked_slots)
+    """
+    if exclude_appointment_id is None and exclude_hold_id is None:
+        available, blocked_slots = await availability_cache.get_or_compute(
+            artist_id,
+            date_str,
+            (duration, buffer_time),
+            lambda: _compute_available_slots(db, artist_id, date_str, duration, buffer_time)
+        )
+        # The cached lists are shared by every caller; hand out copies
+        return list(available), [dict(slot) for slot in blocked_slots]
+    return await _compute_available_slots(
+        db,
+        artist_id,
+        date_str,
+        duration,
+        buffer_time,
+        exclude_appointment_id,
+        exclude_hold_id
+    )
+
+
+async def _compute_available_slots(
+    db,
+    artist_id: str,
+    date_str: str,
+    duration: int,
+    buffer_time: int = 10,
+    exclude_appointment_id: Optional[str] = None,
+    exclude_hold_id: Optional[str] = None
+) -> Tuple[List[str], List[Dict]]:
+    working_day = await get_working_day(db, artist_id, date_str)
+    blocked_slots = await get_schedule_blocked_slots(
+        db,
+        artist_id,
+        date_str,
+        exclude_appointment_id,
+        exclude_hold_id=exclude_hold_id
+    )
+    occupancy = DayOccupancy.from_blocked_slots(blocked_slots)
+    available = [
+        minutes_to_time(start)
+        for start in available_starts(working_day, occupancy, duration, buffer_time)
+    ]
+    return available, blocked_slots
+
+
+async def get_available_slots_bulk(
+    db,
+    artist_ids: List[str],
+    dates: List[str],
+    duration: int,
+    buffer_time: int = 10,
+    blocked_by_day: Optional[Dict[Tuple[str, str], List[Dict]]] = None
+) -> Dict[Tuple[str, str], List[str]]:
+    """
+    Available HH:MM slots for many artist-days
+
+    Bookings come from one schedules query (get_schedule_blocked_slots_bulk)
+    unless the caller already loaded them; working days come from the
+    schedule cache.
+    """
+    if blocked_by_day is None:
+        blocked_by_day = await get_schedule_blocked_slots_bulk(db, artist_ids, dates)
+    working_days = await get_working_days(db, artist_ids, dates)
+
+    available = {}
+    for key, working_day in working_days.items():
+        if not working_day.is_open:
+            available[key] = []
+            continue
+        occupancy = DayOccupancy.from_blocked_slots(blocked_by_day.get(key, []))
+        available[key] = [
+            minutes_to_time(start)
+            for start in available_starts(working_day, occupancy, duration, buffer_time)
+        ]
+    return available
+
+
+async def find_next_available(
+    db,
+    artist_ids: List[str],
+    required_duration: int,
+    start_date: str,
+    start_minutes: int = 0,
+    limit: int = 1,
+    buffer_time: int = 10,
+    max_days: int = 90
+) -> List[Dict]:
+    """
+    Find the earliest free slots, walking forward one business day at a time
+
+    Occupancy is loaded lazily: one query per day on which at least one
+    artist works, and the walk stops as soon as `limit` fits are found, so
+    "something tomorrow" costs one or two queries.
+
+    Args:
+        db: MongoDB database instance
+        artist_ids: Artists to consider
+        required_duration: Service duration in minutes
+        start_date: First date to search (YYYY-MM-DD)
+        start_minutes: Earliest start time on start_date (minutes from midnight)
+        limit: Number of fits to return
+        buffer_time: Buffer between appointments (default 10 min)
+        max_days: How many days ahead to search at most
+
+    Returns:
+        [{"date": "2025-11-15", "time": "09:00", "artist_id": "..."}, ...]
+        ordered by date, time and artist_ids order
+    """
+    results = []
+    if not artist_ids or limit <= 0:
+        return results
+
+    now = datetime.now()
+    first_day = max(datetime.strptime(start_date, "%Y-%m-%d").date(), now.date())
+
+    for offset in range(max_days + 1):
+        current = first_day + timedelta(days=offset)
+        date_str = current.strftime("%Y-%m-%d")
+
+        if not is_valid_booking_date(date_str)[0]:
+            break  # Past the booking horizon, nothing more to find
+
+        earliest = 0
+        if date_str == start_date:
+            earliest = start_minutes
+        if current == now.date():
+            earliest = max(earliest, now.hour * 60 + now.minute + 1)
+
+        working_days = await get_working_days(db, artist_ids, [date_str])
+        candidates = {
+            artist_id: [
+                start for start in working_days[(artist_id, date_str)].candidate_starts(required_duration)
+                if start >= earliest
+            ]
+            for artist_id in artist_ids
+        }
+        if not any(candidates.values()):
+            continue  # Nobody works (any more) that day - no query needed
+
+        blocked_by_day = await get_schedule_blocked_slots_bulk(db, artist_ids, [date_str])
+
+        fits = []
+        for artist_order, artist_id in enumerate(artist_ids):
+            occupancy = DayOccupancy.from_blocked_slots(blocked_by_day[(artist_id, date_str)])
+            for minutes in occupancy.free_starts(candidates[artist_id], required_duration, buffer_time):
+                fits.append((minutes, artist_order, artist_id))
+
+        for minutes, _, artist_id in sorted(fits):
+            results.append({
+                "date": date_str,
+                "time": minutes_to_time(minutes),
+                "artist_id": artist_id
+            })
+            if len(results) >= limit:
+                return results
+
+    return results
+
+
+def _overlaps_placed(
+    placed: List[Tuple[int, int]],
+    start: int,
+    duration: int,
+    buffer_time: int
+) -> bool:
+    """Whether [start, start + duration) clashes with ranges placed earlier in the same search"""
+    return any(
+        start < other_start + other_duration + buffer_time
+        and other_start < start + duration + buffer_time
+        for other_start, other_duration in placed
+    )
+
+
+def place_combo(
+    items: List[Dict],
+    start: int,
+    working_days: Dict[str, WorkingDay],
+    occupancies: Dict[str, DayOccupancy],
+    buffer_time: int = 10
+) -> Optional[List[Dict]]:
+    """
+    Place a bundle of services starting at `start`, or return None
+
+    Each guest's services run back to back: the next service starts when the
+    previous one ends, plus the buffer if the same artist does both. Guests
+    start in parallel. Artists are tried in the order given per item
+    (depth-first), and services already placed in this bundle count as
+    occupied, so one artist is never double-booked by the bundle itself.
+
+    Args:
+        items: [{"duration": 45, "artist_ids": [...], "guest": 0, ...}] in service order
+        start: Start time of every guest's first service (minutes from midnight)
+        working_days: Compiled working day per artist
+        occupancies: Booked occupancy per artist
+        buffer_time: Buffer between appointments (default 10 min)
+
+    Returns:
+        [{"artist_id": "...", "start_minutes": 600, "item": 0}, ...] per item, or None
+    """
+    placed: Dict[str, List[Tuple[int, int]]] = {}
+    cursors: Dict[int, Tuple[int, Optional[str]]] = {}
+
+    def place(index: int) -> Optional[List[Dict]]:
+        if index == len(items):
+            return []
+        item = items[index]
+        guest = item.get("guest", 0)
+        cursor, previous_artist = cursors.get(guest, (start, None))
+
+        for artist_id in item["artist_ids"]:
+            item_start = cursor + (buffer_time if artist_id == previous_artist else 0)
+            duration = item["duration"]
+            if not working_days[artist_id].contains(item_start, duration):
+                continue
+            if not occupancies[artist_id].is_free(item_start, duration, buffer_time):
+                continue
+            if _overlaps_placed(placed.get(artist_id, []), item_start, duration, buffer_time):
+                continue
+
+            placed.setdefault(artist_id, []).append((item_start, duration))
+            cursors[guest] = (item_start + duration, artist_id)
+            rest = place(index + 1)
+            if rest is not None:
+                return [{"artist_id": artist_id, "start_minutes": item_start, "item": index}] + rest
+            placed[artist_id].pop()
+            cursors[guest] = (cursor, previous_artist)
+
+        return None
+
+    return place(0)
+
+
+async def find_combo_placements(
+    db,
+    items: List[Dict],
+    date_str: str,
+    start_minutes: int = 0,
+    limit: int = 10,
+    buffer_time: int = 10
+) -> List[Dict]:
+    """
+    Find contiguous placements for a bundle of services on one day
+
+    One schedules query loads the occupancy of every artist involved; every start
+    time is then tried in memory with place_combo(), so the whole bundle
+    costs the same as a single availability call.
+
+    Args:
+        db: MongoDB database instance
+        items: [{"service_id": "...", "duration": 45, "artist_ids": [...], "guest": 0}]
+        date_str: Date in YYYY-MM-DD format
+        start_minutes: Earliest start time (minutes from midnight)
+        limit: Number of placements to return
+        buffer_time: Buffer between appointments (default 10 min)
+
+    Returns:
+        [
+            {
+                "start_time": "10:00",
+                "end_time": "11:45",
+                "appointments": [
+                    {"service_id": "...", "artist_id": "...", "time": "10:00",
+                     "end_time": "10:45", "duration_minutes": 45, "guest": 0}
+                ]
+            }
+        ]
+        ordered by start time
+    """
+    artist_ids = list(dict.fromkeys(artist_id for item in items for artist_id in item["artist_ids"]))
+    if not items or not artist_ids:
+        return []
+
+    working_days = {
+        artist_id: working_day
+        for (artist_id, _), working_day in (await get_working_days(db, artist_ids, [date_str])).items()
+    }
+
+    # Every guest starts together, so candidate starts come from the first
+    # service's artists; later services are checked wherever they land
+    first = items[0]
+    starts = sorted({
+        start
+        for artist_id in first["artist_ids"]
+        for start in working_days[artist_id].candidate_starts(first["duration"])
+        if start >= start_minutes
+    })
+    if not starts:
+        return []
+
+    blocked_by_day = await get_schedule_blocked_slots_bulk(db, artist_ids, [date_str])
+    occupancies = {
+        artist_id: DayOccupancy.from_blocked_slots(blocked_by_day[(artist_id, date_str)])
+        for artist_id in artist_ids
+    }
+
+    placements = []
+    for start in starts:
+        placement = place_combo(items, start, working_days, occupancies, buffer_time)
+        if placement is None:
+            continue
+
+        appointments = []
+        for placed_item in placement:
+            item = items[placed_item["item"]]
+            appointments.append({
+                "service_id": item["service_id"],
+                "artist_id": placed_item["artist_id"],
+                "time": minutes_to_time(placed_item["start_minutes"]),
+                "end_time": minutes_to_time(placed_item["start_minutes"] + item["duration"]),
+                "duration_minutes": item["duration"],
+                "guest": item.get("guest", 0)
+            })
+        placements.append({
+            "start_time": minutes_to_time(start),
+            "end_time": max(appointment["end_time"] for appointment in appointments),
+            "appointments": appointments
+        })
+        if len(placements) >= limit:
+            break
+
+    return placements
@@ -0,0 +1,69 @@
+"""
+Backfill Daily Analytics Rollups
+Normalizes service prices to numbers (price_value) and rebuilds the
+analytics_daily rollups from appointments
+Safe to run while the API is serving traffic: rollups written during the
+recount are skipped (the nightly reconciliation recounts recent days)
+Run: python backfill_analytics.py [--from YYYY-MM-DD] [--dry-run]
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from analytics_service import reconcile_rollups
+from booking_service import parse_price
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+
+async def backfill_analytics(from_date: str = None, dry_run: bool = False):
+    """Normalize service prices, then recompute rollups from from_date on (all history by default)"""
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    print(f"📈 Rebuilding analytics rollups{f' from {from_date}' if from_date else ''}...")
+
+    try:
+        services = await db.services.find({}, {"_id": 0, "id": 1, "price": 1, "price_value": 1}).to_list(None)
+        price_updates = [
+            UpdateOne({"id": service["id"]}, {"$set": {"price_value": parse_price(service.get("price"))}})
+            for service in services
+            if service.get("price_value") != parse_price(service.get("price"))
+        ]
+        print(f"💶 {len(price_updates)} of {len(services)} service prices to normalize")
+        if price_updates and not dry_run:
+            await db.services.bulk_write(price_updates, ordered=False)
+
+        report = await reconcile_rollups(db, from_date, dry_run=dry_run)
+        print(f"🧮 Recounted {report['rollups']} rollup documents")
+
+        if dry_run:
+            print(f"\n✅ Dry run complete, nothing written: "
+                  f"{report['corrected']} to correct, {report['removed']} to remove")
+            return
+
+        print(f"\n✅ Backfill complete: {report['corrected']} rollups written, {report['removed']} removed")
+        if report["skipped"]:
+            print(f"⚠️  {report['skipped']} rollups changed during the recount and were left for the next run")
+
+    except Exception as e:
+        print(f"\n❌ Error during backfill: {str(e)}")
+    finally:
+        client.close()
+
+
+def _arg(name: str):
+    if name in sys.argv and sys.argv.index(name) + 1 < len(sys.argv):
+        return sys.argv[sys.argv.index(name) + 1]
+    return None
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_analytics(from_date=_arg("--from"), dry_run="--dry-run" in sys.argv))
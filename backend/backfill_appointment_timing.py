@@ -0,0 +1,92 @@
+"""
+Backfill Appointment Timing Fields
+Adds duration_minutes / start_minutes / end_minutes to existing appointments
+Safe to run while the API is serving traffic (small batches, conditional writes)
+Run: python backfill_appointment_timing.py [--all]
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from booking_service import compute_appointment_timing
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+BATCH_SIZE = 500
+PAUSE_BETWEEN_BATCHES = 0.05  # seconds, leaves room for live traffic
+
+
+async def backfill_appointment_timing(recompute_all: bool = False):
+    """Backfill timing fields in _id order, one bulk_write per batch"""
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    print("🔧 Backfilling appointment timing fields...")
+
+    try:
+        # Services are a small catalog - load durations once
+        services = await db.services.find({}, {"_id": 0, "id": 1, "duration": 1}).to_list(None)
+        durations = {service["id"]: service.get("duration") for service in services}
+        print(f"📚 Loaded {len(durations)} service durations")
+
+        base_query = {} if recompute_all else {"duration_minutes": {"$exists": False}}
+        last_id = None
+        updated = 0
+        skipped = 0
+
+        while True:
+            query = dict(base_query)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+
+            batch = await db.appointments.find(
+                query,
+                {"_id": 1, "id": 1, "service_id": 1, "appointment_time": 1}
+            ).sort("_id", 1).limit(BATCH_SIZE).to_list(BATCH_SIZE)
+
+            if not batch:
+                break
+            last_id = batch[-1]["_id"]
+
+            operations = []
+            for appt in batch:
+                if appt.get("service_id") not in durations or not appt.get("appointment_time"):
+                    skipped += 1
+                    continue
+                timing = compute_appointment_timing(appt["appointment_time"], durations[appt["service_id"]])
+                # Only write if nobody changed service/time since we read the row
+                operations.append(UpdateOne(
+                    {
+                        "_id": appt["_id"],
+                        "service_id": appt["service_id"],
+                        "appointment_time": appt["appointment_time"]
+                    },
+                    {"$set": timing}
+                ))
+
+            if operations:
+                result = await db.appointments.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+
+            print(f"   ... {updated} updated, {skipped} skipped")
+            await asyncio.sleep(PAUSE_BETWEEN_BATCHES)
+
+        print(f"\n✅ Backfill complete: {updated} appointments updated")
+        if skipped:
+            print(f"⚠️  {skipped} appointments skipped (missing service or time)")
+
+    except Exception as e:
+        print(f"\n❌ Error during backfill: {str(e)}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(backfill_appointment_timing(recompute_all="--all" in sys.argv))
@@ -0,0 +1,88 @@
+"""
+Availability Engine Benchmark
+Compares the old slots x bookings loop with the DayOccupancy engine
+Run: python benchmark_availability.py [bookings_per_day]
+"""
+import random
+import sys
+import time
+
+from booking_service import (
+    DayOccupancy,
+    check_overlap,
+    filter_available_slots,
+    generate_time_slots,
+    minutes_to_time,
+    time_to_minutes,
+)
+
+SERVICE_DURATIONS = [20, 30, 45, 60, 90]
+BUFFER = 10
+ROUNDS = 200
+
+
+def legacy_filter_available_slots(all_slots, blocked_slots, required_duration, buffer_time=10):
+    """The pre-occupancy implementation: reparses every blocked slot per candidate"""
+    available = []
+    for slot in all_slots:
+        slot_minutes = time_to_minutes(slot)
+        is_available = True
+        for blocked in blocked_slots:
+            blocked_start = time_to_minutes(blocked["start"])
+            blocked_duration = blocked["duration"] + buffer_time
+            if check_overlap(slot_minutes, required_duration + buffer_time, blocked_start, blocked_duration):
+                is_available = False
+                break
+        if is_available:
+            available.append(slot)
+    return available
+
+
+def make_day(bookings: int, seed: int):
+    """Random (possibly overlapping, like real legacy data) bookings between 09:00 and 19:00"""
+    rng = random.Random(seed)
+    return [
+        {
+            "start": minutes_to_time(rng.randrange(9 * 60, 19 * 60, 5)),
+            "duration": rng.choice(SERVICE_DURATIONS),
+            "appointment_id": f"appt-{seed}-{i}",
+        }
+        for i in range(bookings)
+    ]
+
+
+def run(bookings: int):
+    # Admin views check several services per day, so reuse one occupancy per day
+    all_slots = generate_time_slots(start_hour=9, end_hour=19, interval=5)
+    days = [make_day(bookings, seed) for seed in range(ROUNDS)]
+
+    start = time.perf_counter()
+    legacy = [
+        legacy_filter_available_slots(all_slots, day, duration, BUFFER)
+        for day in days
+        for duration in SERVICE_DURATIONS
+    ]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engine = []
+    for day in days:
+        occupancy = DayOccupancy.from_blocked_slots(day)
+        for duration in SERVICE_DURATIONS:
+            engine.append(filter_available_slots(all_slots, day, duration, BUFFER, occupancy=occupancy))
+    engine_time = time.perf_counter() - start
+
+    if legacy != engine:
+        raise SystemExit("❌ Engine results differ from legacy implementation")
+
+    checks = ROUNDS * len(SERVICE_DURATIONS)
+    print(f"📅 {bookings} bookings/day, {len(all_slots)} candidate slots, {checks} availability checks")
+    print(f"   legacy loop : {legacy_time * 1000:8.1f} ms ({legacy_time / checks * 1e6:7.1f} µs/check)")
+    print(f"   occupancy   : {engine_time * 1000:8.1f} ms ({engine_time / checks * 1e6:7.1f} µs/check)")
+    print(f"   speedup     : {legacy_time / engine_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [5, 20, 40]
+    for size in sizes:
+        run(size)
@@ -3,8 +3,9 @@ Booking Service - Smart Availability Management
 Handles time slot calculations and overlap detection
 """
 
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import List, Dict, Optional, Tuple
 import logging
 import re
 
@@ -44,6 +45,28 @@ def parse_duration(duration_str: str) -> int:
     return 60  # Default 60 minutes
 
 
+def parse_price(price_str: Optional[str]) -> float:
+    """
+    Parse a catalog price string to a number
+    
+    Examples:
+        "CHF 45" → 45.0
+        "45.50 CHF" → 45.5
+        "CHF 45,50" → 45.5
+        "CHF 45-60" → 45.0 (ranges count at their lower bound)
+    
+    Args:
+        price_str: Price string in various formats
+    
+    Returns:
+        Price as float (0.0 if no number is found)
+    """
+    match = re.search(r'\d+(?:[.,]\d+)?', price_str or "")
+    if not match:
+        return 0.0
+    return float(match.group(0).replace(",", "."))
+
+
 def time_to_minutes(time_str: str) -> int:
     """
     Convert time string to minutes from midnight
@@ -85,6 +108,29 @@ def minutes_to_time(minutes: int) -> str:
     return f"{hour:02d}:{minute:02d}"
 
 
+def compute_appointment_timing(appointment_time: str, service_duration: str) -> Dict[str, int]:
+    """
+    Compute the stored timing fields of an appointment
+
+    Stored on the appointment at create/update time so availability checks
+    never have to look up the service again.
+
+    Args:
+        appointment_time: Start time in HH:MM format
+        service_duration: Service duration string (e.g. "45 min")
+
+    Returns:
+        {"duration_minutes": 45, "start_minutes": 600, "end_minutes": 645}
+    """
+    duration = parse_duration(service_duration or "60 min")
+    start = time_to_minutes(appointment_time)
+    return {
+        "duration_minutes": duration,
+        "start_minutes": start,
+        "end_minutes": start + duration
+    }
+
+
 def check_overlap(start1: int, duration1: int, start2: int, duration2: int) -> bool:
     """
     Check if two time slots overlap
@@ -137,65 +183,339 @@ def generate_time_slots(
     return slots
 
 
+BLOCKING_STATUSES = ["pending", "confirmed"]
+
+# Only the fields availability needs; keeps the indexed query lean
+BLOCKED_SLOT_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "service_id": 1,
+    "appointment_time": 1,
+    "duration_minutes": 1,
+    "start_minutes": 1
+}
+
+
+# Fields of a slot hold that block time
+HOLD_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "artist_id": 1,
+    "appointment_date": 1,
+    "appointment_time": 1,
+    "duration_minutes": 1,
+    "start_minutes": 1
+}
+
+
 async def get_blocked_slots(
     db,
     artist_id: str,
     date: str,
-    exclude_appointment_id: Optional[str] = None
+    exclude_appointment_id: Optional[str] = None,
+    exclude_hold_id: Optional[str] = None
 ) -> List[Dict]:
     """
     Get all blocked time slots for an artist on a specific date
+
+    One query on (artist_id, appointment_date, status). Appointments carry
+    their own duration_minutes, so services are only consulted for legacy
+    rows that have not been backfilled yet (see backfill_appointment_timing.py).
     
     Args:
         db: MongoDB database instance
         artist_id: Artist ID
         date: Date in YYYY-MM-DD format
         exclude_appointment_id: Appointment ID to exclude (for rescheduling)
+        exclude_hold_id: Slot hold to ignore (the customer's own hold)
     
     Returns:
-        List of blocked slots with start time and duration
-        Example: [{"start": "10:00", "duration": 45}, ...]
+        List of blocked slots with start time and duration; unexpired
+        checkout holds are included with a hold_id instead of appointment_id
+        Example: [{"start": "10:00", "duration": 45, "start_minutes": 600}, ...]
     """
     query = {
         "artist_id": artist_id,
         "appointment_date": date,
-        "status": {"$in": ["pending", "confirmed"]}  # Ignore cancelled/completed
+        "status": {"$in": BLOCKING_STATUSES}  # Ignore cancelled/completed
     }
     
     if exclude_appointment_id:
         query["id"] = {"$ne": exclude_appointment_id}
     
-    # Get all appointments for this artist on this date
-    appointments = await db.appointments.find(query, {"_id": 0}).to_list(1000)
-    
+    appointments = await db.appointments.find(query, BLOCKED_SLOT_PROJECTION).to_list(1000)
+    blocked_slots = await appointments_to_blocked_slots(db, appointments)
+
+    hold_query = {
+        "artist_id": artist_id,
+        "appointment_date": date,
+        "expires_at": {"$gt": datetime.now(timezone.utc)}
+    }
+    if exclude_hold_id:
+        hold_query["id"] = {"$ne": exclude_hold_id}
+    holds = await db.slot_holds.find(hold_query, HOLD_PROJECTION).to_list(1000)
+
+    return blocked_slots + holds_to_blocked_slots(holds)
+
+
+async def get_blocked_slots_bulk(
+    db,
+    artist_ids: List[str],
+    dates: List[str]
+) -> Dict[Tuple[str, str], List[Dict]]:
+    """
+    Get blocked slots for many artists and dates with a single query
+
+    Args:
+        db: MongoDB database instance
+        artist_ids: Artist IDs to load
+        dates: Dates in YYYY-MM-DD format
+
+    Returns:
+        {(artist_id, date): [blocked slot, ...]} - every requested pair is present
+    """
+    return await _group_blocked_slots(db, artist_ids, dates, {"$in": dates})
+
+
+async def get_blocked_slots_for_range(
+    db,
+    artist_ids: List[str],
+    start_date: str,
+    end_date: str
+) -> Dict[Tuple[str, str], List[Dict]]:
+    """
+    Get blocked slots for many artists over a date range with one range query
+
+    Args:
+        db: MongoDB database instance
+        artist_ids: Artist IDs to load
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format (inclusive)
+
+    Returns:
+        {(artist_id, date): [blocked slot, ...]} for every artist and date in range
+    """
+    return await _group_blocked_slots(
+        db,
+        artist_ids,
+        date_range(start_date, end_date),
+        {"$gte": start_date, "$lte": end_date}
+    )
+
+
+async def _group_blocked_slots(
+    db,
+    artist_ids: List[str],
+    dates: List[str],
+    date_filter: Dict
+) -> Dict[Tuple[str, str], List[Dict]]:
+    """Run one appointments query and bucket the blocked slots by artist-day"""
+    blocked_by_day = {(artist_id, date): [] for artist_id in artist_ids for date in dates}
+    if not blocked_by_day:
+        return blocked_by_day
+
+    appointments = await db.appointments.find(
+        {
+            "artist_id": {"$in": artist_ids},
+            "appointment_date": date_filter,
+            "status": {"$in": BLOCKING_STATUSES}
+        },
+        {**BLOCKED_SLOT_PROJECTION, "artist_id": 1, "appointment_date": 1}
+    ).to_list(None)
+
+    # Convert in one go so legacy rows still cost a single service lookup
+    blocked_slots = await appointments_to_blocked_slots(db, appointments)
+    days = {appt["id"]: (appt["artist_id"], appt["appointment_date"]) for appt in appointments}
+    for blocked in blocked_slots:
+        blocked_by_day[days[blocked["appointment_id"]]].append(blocked)
+
+    holds = await db.slot_holds.find(
+        {
+            "artist_id": {"$in": artist_ids},
+            "appointment_date": date_filter,
+            "expires_at": {"$gt": datetime.now(timezone.utc)}
+        },
+        HOLD_PROJECTION
+    ).to_list(None)
+    for hold, blocked in zip(holds, holds_to_blocked_slots(holds)):
+        day = (hold["artist_id"], hold["appointment_date"])
+        if day in blocked_by_day:
+            blocked_by_day[day].append(blocked)
+
+    return blocked_by_day
+
+
+def holds_to_blocked_slots(holds: List[Dict]) -> List[Dict]:
+    """Convert slot hold documents to blocked slot dicts"""
+    return [
+        {
+            "start": hold["appointment_time"],
+            "duration": hold["duration_minutes"],
+            "start_minutes": hold["start_minutes"],
+            "hold_id": hold["id"]
+        }
+        for hold in holds
+    ]
+
+
+async def appointments_to_blocked_slots(db, appointments: List[Dict]) -> List[Dict]:
+    """
+    Convert appointment documents to blocked slot dicts
+
+    Legacy appointments without duration_minutes are resolved with a single
+    batched service lookup instead of one find_one per row.
+    """
+    legacy_service_ids = {
+        appt["service_id"] for appt in appointments
+        if appt.get("duration_minutes") is None and appt.get("service_id")
+    }
+    legacy_durations = {}
+    if legacy_service_ids:
+        logger.warning(
+            f"{len(legacy_service_ids)} service(s) looked up for appointments without "
+            f"duration_minutes; run backfill_appointment_timing.py"
+        )
+        services = await db.services.find(
+            {"id": {"$in": list(legacy_service_ids)}},
+            {"_id": 0, "id": 1, "duration": 1}
+        ).to_list(len(legacy_service_ids))
+        legacy_durations = {
+            service["id"]: parse_duration(service.get("duration", "60 min"))
+            for service in services
+        }
+
     blocked_slots = []
     
     for appt in appointments:
-        # Get service details to know duration
-        service = await db.services.find_one({"id": appt["service_id"]}, {"_id": 0})
-        
-        if service:
-            duration = parse_duration(service.get("duration", "60 min"))
-            
-            blocked_slots.append({
-                "start": appt["appointment_time"],
-                "duration": duration,
-                "appointment_id": appt["id"]
-            })
-            
-            logger.debug(
-                f"Blocked slot: {appt['appointment_time']} "
-                f"for {duration} min (appointment {appt['id']})"
-            )
+        duration = appt.get("duration_minutes")
+        if duration is None:
+            duration = legacy_durations.get(appt.get("service_id"))
+            if duration is None:
+                # Service was deleted; nothing to base the block on
+                continue
+
+        start_minutes = appt.get("start_minutes")
+        if start_minutes is None:
+            start_minutes = time_to_minutes(appt["appointment_time"])
+
+        blocked_slots.append({
+            "start": appt["appointment_time"],
+            "duration": duration,
+            "start_minutes": start_minutes,
+            "appointment_id": appt["id"]
+        })
     
     return blocked_slots
 
 
+class DayOccupancy:
+    """
+    Minute-level occupancy of one artist-day, built once from blocked slots
+
+    Blocked intervals are painted into a minute bitmap and turned into a
+    prefix-sum table, so "is [start, end) free?" is two lookups no matter
+    how many appointments the day holds.
+
+    The buffer is applied at query time, not build time: a candidate
+    [start, start + duration + buffer) collides with a blocked
+    [b_start, b_end + buffer) exactly when [start - buffer,
+    start + duration + buffer) touches the raw [b_start, b_end). One
+    occupancy therefore serves every service duration and buffer.
+    """
+
+    def __init__(self, intervals: List[Tuple[int, int]]):
+        self.intervals = sorted(
+            (start, end) for start, end in intervals if end > start
+        )
+        size = max((end for _, end in self.intervals), default=0)
+        busy = bytearray(size)
+        for start, end in self.intervals:
+            start = max(start, 0)
+            busy[start:end] = b"\x01" * (end - start)
+
+        # prefix[i] = number of busy minutes in [0, i)
+        self._prefix = [0, *accumulate(busy)]
+        self._size = size
+
+    @classmethod
+    def from_blocked_slots(cls, blocked_slots: List[Dict]) -> "DayOccupancy":
+        """
+        Build occupancy from get_blocked_slots() output
+
+        Args:
+            blocked_slots: [{"start": "10:00", "duration": 45, ...}, ...]
+
+        Returns:
+            DayOccupancy for the day
+        """
+        intervals = []
+        for blocked in blocked_slots:
+            start = blocked.get("start_minutes")
+            if start is None:
+                start = time_to_minutes(blocked["start"])
+            intervals.append((start, start + blocked["duration"]))
+        return cls(intervals)
+
+    def busy_minutes(self, start: int, end: int) -> int:
+        """Number of occupied minutes in [start, end)"""
+        start = min(max(start, 0), self._size)
+        end = min(max(end, 0), self._size)
+        if end <= start:
+            return 0
+        return self._prefix[end] - self._prefix[start]
+
+    def is_free(self, start: int, duration: int, buffer_time: int = 10) -> bool:
+        """
+        Check whether a booking fits without touching any blocked interval
+
+        Args:
+            start: Start time in minutes from midnight
+            duration: Service duration in minutes
+            buffer_time: Buffer between appointments (default 10 min)
+
+        Returns:
+            True if the slot (plus buffer on both sides) is free
+        """
+        return self.busy_minutes(
+            start - buffer_time,
+            start + duration + buffer_time
+        ) == 0
+
+    def free_starts(self, starts: List[int], duration: int, buffer_time: int = 10) -> List[int]:
+        """
+        Batch version of is_free() for many candidate starts
+
+        Args:
+            starts: Candidate start times in minutes from midnight
+            duration: Service duration in minutes
+            buffer_time: Buffer between appointments (default 10 min)
+
+        Returns:
+            The candidate starts that fit, in input order
+        """
+        prefix = self._prefix
+        size = self._size
+        lead = buffer_time
+        tail = duration + buffer_time
+        free = []
+        for start in starts:
+            lo = start - lead
+            hi = start + tail
+            if lo < 0:
+                lo = 0
+            if hi > size:
+                hi = size
+            if hi <= lo or prefix[hi] == prefix[lo]:
+                free.append(start)
+        return free
+
+
 def filter_available_slots(
     all_slots: List[str],
     blocked_slots: List[Dict],
     required_duration: int,
-    buffer_time: int = 10
+    buffer_time: int = 10,
+    occupancy: Optional[DayOccupancy] = None
 ) -> List[str]:
     """
     Filter available time slots based on blocked slots and duration
@@ -205,6 +525,7 @@ def filter_available_slots(
         blocked_slots: Currently blocked slots
         required_duration: Required duration for the service
         buffer_time: Buffer time between appointments (default 10 min)
+        occupancy: Prebuilt DayOccupancy (built from blocked_slots if omitted)
     
     Returns:
         List of available time slots
@@ -215,35 +536,12 @@ def filter_available_slots(
         - 09:30 is NOT available (ends at 10:15, overlaps with 10:00)
         - 11:00 is available (starts after blocked slot)
     """
-    available = []
-    
-    for slot in all_slots:
-        slot_minutes = time_to_minutes(slot)
-        is_available = True
-        
-        # Check if this slot + duration + buffer overlaps with any blocked slot
-        for blocked in blocked_slots:
-            blocked_start = time_to_minutes(blocked["start"])
-            blocked_duration = blocked["duration"] + buffer_time
-            
-            # Check overlap
-            if check_overlap(
-                slot_minutes,
-                required_duration + buffer_time,
-                blocked_start,
-                blocked_duration
-            ):
-                is_available = False
-                logger.debug(
-                    f"Slot {slot} not available: overlaps with "
-                    f"{blocked['start']} ({blocked['duration']}min)"
-                )
-                break
-        
-        if is_available:
-            available.append(slot)
-    
-    return available
+    if occupancy is None:
+        occupancy = DayOccupancy.from_blocked_slots(blocked_slots)
+
+    slot_minutes = {time_to_minutes(slot): slot for slot in all_slots}
+    free = occupancy.free_starts(list(slot_minutes), required_duration, buffer_time)
+    return [slot_minutes[minutes] for minutes in free]
 
 
 def get_business_hours(date_str: str) -> Dict[str, int]:
@@ -279,10 +577,33 @@ def get_business_hours(date_str: str) -> Dict[str, int]:
         return {"start_hour": 9, "end_hour": 19}
 
 
+def date_range(start_date: str, end_date: str) -> List[str]:
+    """
+    List all dates from start_date to end_date (inclusive)
+
+    Args:
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format
+
+    Returns:
+        List of YYYY-MM-DD strings (empty if end_date < start_date)
+    """
+    current = datetime.strptime(start_date, "%Y-%m-%d").date()
+    last = datetime.strptime(end_date, "%Y-%m-%d").date()
+    dates = []
+    while current <= last:
+        dates.append(current.strftime("%Y-%m-%d"))
+        current += timedelta(days=1)
+    return dates
+
+
 def is_valid_booking_date(date_str: str) -> tuple[bool, str]:
     """
     Validate if a date is valid for booking
     
+    Only the booking window is checked here; whether anyone works that day
+    is up to the artists' compiled working hours (WorkingDay.is_open).
+    
     Args:
         date_str: Date in YYYY-MM-DD format
     
@@ -302,11 +623,6 @@ def is_valid_booking_date(date_str: str) -> tuple[bool, str]:
         if date > max_date:
             return False, "Cannot book more than 3 months in advance"
         
-        # Check if business is open on this day
-        hours = get_business_hours(date_str)
-        if hours["start_hour"] == 0:
-            return False, "Business is closed on this day (Sunday)"
-        
         return True, ""
     
     except Exception as e:
@@ -0,0 +1,350 @@
+"""
+Calendar Feed - iCalendar (.ics) feeds of bookings per artist and for the salon
+Feeds cover a bounded date window and are rendered once, then served from
+memory until an appointment of that artist changes, so polling calendar
+clients cost no database reads between changes.
+"""
+
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from booking_service import minutes_to_time, parse_duration, time_to_minutes
+
+logger = logging.getLogger(__name__)
+
+# Feed window relative to today
+FEED_PAST_DAYS = 30
+FEED_FUTURE_DAYS = 180
+
+SALON_FEED = "*"  # Cache key of the whole-salon feed
+
+FEED_STATUSES = ["pending", "confirmed", "completed"]
+
+FEED_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "artist_id": 1,
+    "service_id": 1,
+    "appointment_date": 1,
+    "appointment_time": 1,
+    "duration_minutes": 1,
+    "start_minutes": 1,
+    "end_minutes": 1,
+    "status": 1,
+    "customer_name": 1,
+    "customer_phone": 1,
+    "notes": 1,
+    "created_at": 1
+}
+
+# The salon-wide feed is shared more widely: no phone numbers or notes
+SALON_FEED_PROJECTION = {
+    field: value for field, value in FEED_PROJECTION.items()
+    if field not in ("customer_phone", "notes")
+}
+
+FEED_TIMEZONE = "Europe/Berlin"
+
+# Appointment times are salon-local wall-clock times
+VTIMEZONE = [
+    "BEGIN:VTIMEZONE",
+    f"TZID:{FEED_TIMEZONE}",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:+0100",
+    "TZOFFSETTO:+0200",
+    "TZNAME:CEST",
+    "DTSTART:19700329T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0100",
+    "TZNAME:CET",
+    "DTSTART:19701025T030000",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+]
+
+
+def feed_window(today: Optional[datetime] = None) -> Tuple[str, str]:
+    """(first, last) date a feed generated today covers"""
+    today = today or datetime.now()
+    return (
+        (today - timedelta(days=FEED_PAST_DAYS)).strftime("%Y-%m-%d"),
+        (today + timedelta(days=FEED_FUTURE_DAYS)).strftime("%Y-%m-%d"),
+    )
+
+
+def _escape(text: str) -> str:
+    """Escape a TEXT value (RFC 5545 §3.3.11)"""
+    return (
+        str(text)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 §3.1)"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        limit = 75 if not parts else 74  # Continuation lines start with a space
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1  # Never split a UTF-8 sequence
+        parts.append(encoded[:cut].decode("utf-8"))
+        encoded = encoded[cut:]
+    return "\r\n ".join(parts)
+
+
+def _local(date: str, minutes: int) -> str:
+    """YYYY-MM-DD + minutes → 20251115T100000 (minutes may run past midnight)"""
+    moment = datetime.strptime(date, "%Y-%m-%d") + timedelta(minutes=minutes)
+    return moment.strftime("%Y%m%dT%H%M%S")
+
+
+def _stamp(created_at) -> str:
+    """DTSTAMP from the booking time, so re-rendering unchanged data yields the same ETag"""
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except ValueError:
+            created_at = None
+    if not isinstance(created_at, datetime):
+        created_at = datetime(2000, 1, 1, tzinfo=timezone.utc)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_feed(
+    calendar_name: str,
+    appointments: List[Dict],
+    services: Dict[str, Dict],
+    artists: Dict[str, Dict],
+    include_artist: bool = False,
+    include_contact: bool = True
+) -> str:
+    """
+    Render appointments as a VCALENDAR document
+
+    Args:
+        calendar_name: Shown by calendar apps (X-WR-CALNAME)
+        appointments: Appointments with FEED_PROJECTION fields
+        services: {service_id: service} for names and legacy durations
+        artists: {artist_id: artist} for the salon feed
+        include_artist: Prefix event titles with the artist's name
+        include_contact: Add the customer's phone and notes to descriptions
+
+    Returns:
+        iCalendar text with CRLF line endings
+    """
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Fabulous Nails & Spa//Booking Calendar//DE",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(calendar_name)}",
+        f"X-WR-TIMEZONE:{FEED_TIMEZONE}",
+        *VTIMEZONE,
+    ]
+
+    for appt in appointments:
+        service = services.get(appt.get("service_id"), {})
+        start = appt.get("start_minutes")
+        if start is None:
+            start = time_to_minutes(appt["appointment_time"])
+        duration = appt.get("duration_minutes")
+        if duration is None:
+            duration = parse_duration(service.get("duration", "60 min"))
+
+        service_name = service.get("name_de") or service.get("name_en") or "Termin"
+        summary = f"{service_name} – {appt.get('customer_name', '')}"
+        if include_artist:
+            artist_name = artists.get(appt.get("artist_id"), {}).get("name", "")
+            if artist_name:
+                summary = f"{artist_name}: {summary}"
+
+        description = [f"{minutes_to_time(start)}–{minutes_to_time(start + duration)}"]
+        if include_contact and appt.get("customer_phone"):
+            description.append(f"Tel.: {appt['customer_phone']}")
+        if include_contact and appt.get("notes"):
+            description.append(f"Notizen: {appt['notes']}")
+
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{appt['id']}@fabulous-nails",
+            f"DTSTAMP:{_stamp(appt.get('created_at'))}",
+            f"DTSTART;TZID={FEED_TIMEZONE}:{_local(appt['appointment_date'], start)}",
+            f"DTEND;TZID={FEED_TIMEZONE}:{_local(appt['appointment_date'], start + duration)}",
+            f"SUMMARY:{_escape(summary)}",
+            f"DESCRIPTION:{_escape(chr(10).join(description))}",
+            f"STATUS:{'TENTATIVE' if appt.get('status') == 'pending' else 'CONFIRMED'}",
+            "END:VEVENT",
+        ]
+
+    lines.append("END:VCALENDAR")
+    return "".join(_fold(line) + "\r\n" for line in lines)
+
+
+async def build_feed(db, artist_id: Optional[str] = None) -> Optional[str]:
+    """
+    Load and render the feed of one artist, or of the salon if artist_id is None
+
+    One appointments query for the window plus one $in lookup each for the
+    services and artists it references.
+
+    Returns:
+        iCalendar text, or None if the artist does not exist
+    """
+    artists: Dict[str, Dict] = {}
+    if artist_id:
+        artist = await db.artists.find_one({"id": artist_id}, {"_id": 0, "id": 1, "name": 1})
+        if not artist:
+            return None
+        artists[artist_id] = artist
+
+    first, last = feed_window()
+    query: Dict = {
+        "appointment_date": {"$gte": first, "$lte": last},
+        "status": {"$in": FEED_STATUSES}
+    }
+    if artist_id:
+        query["artist_id"] = artist_id
+    projection = FEED_PROJECTION if artist_id else SALON_FEED_PROJECTION
+    appointments = await db.appointments.find(query, projection).sort([
+        ("appointment_date", 1),
+        ("appointment_time", 1)
+    ]).to_list(None)
+
+    service_ids = list({appt["service_id"] for appt in appointments if appt.get("service_id")})
+    services = {
+        service["id"]: service
+        for service in await db.services.find(
+            {"id": {"$in": service_ids}},
+            {"_id": 0, "id": 1, "name_de": 1, "name_en": 1, "duration": 1}
+        ).to_list(None)
+    }
+
+    if not artist_id:
+        artist_ids = list({appt["artist_id"] for appt in appointments if appt.get("artist_id")})
+        artists = {
+            artist["id"]: artist
+            for artist in await db.artists.find(
+                {"id": {"$in": artist_ids}},
+                {"_id": 0, "id": 1, "name": 1}
+            ).to_list(None)
+        }
+
+    if artist_id:
+        name = f"Fabulous Nails – {artists[artist_id].get('name', '')}"
+    else:
+        name = "Fabulous Nails – Alle Termine"
+    return render_feed(
+        name,
+        appointments,
+        services,
+        artists,
+        include_artist=not artist_id,
+        include_contact=bool(artist_id)
+    )
+
+
+class CalendarFeedCache:
+    """
+    Rendered feeds keyed by artist_id (SALON_FEED for the salon)
+
+    An entry stays valid until invalidate() is called for its artist or the
+    feed window moves on to a new day. Renders of the same feed are
+    serialized, so a burst of polls after a change renders once. A
+    generation counter per key discards renders that raced with an
+    invalidation.
+    """
+
+    def __init__(self):
+        self._feeds: Dict[str, Dict] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.renders = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached feed if still current, without any I/O"""
+        feed = self._feeds.get(key)
+        if feed and feed["window"] == feed_window():
+            self.hits += 1
+            return feed
+        return None
+
+    async def get_or_render(self, key: str, render: Callable[[], Awaitable[Optional[str]]]) -> Optional[Dict]:
+        """
+        Cached feed, rendering it first if needed
+
+        Returns:
+            {"body", "etag", "last_modified", "window"} or None if render() returned None
+        """
+        feed = self.get(key)
+        if feed:
+            return feed
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            feed = self.get(key)
+            if feed:
+                return feed
+
+            generation = self._generations.get(key, 0)
+            window = feed_window()
+            body = await render()
+            if body is None:
+                return None
+            self.renders += 1
+
+            etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+            previous = self._feeds.get(key)
+            if previous and previous["etag"] == etag:
+                last_modified = previous["last_modified"]  # Window moved, content did not
+            else:
+                last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+
+            feed = {"body": body, "etag": etag, "last_modified": last_modified, "window": window}
+            if self._generations.get(key, 0) == generation:
+                self._feeds[key] = feed
+            return feed
+
+    def invalidate(self, artist_id: str):
+        """Drop an artist's feed and the salon feed"""
+        for key in (artist_id, SALON_FEED):
+            self._generations[key] = self._generations.get(key, 0) + 1
+            if self._feeds.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        """Drop every feed (e.g. after a service or artist rename)"""
+        for key in set(self._generations) | set(self._feeds):
+            self._generations[key] = self._generations.get(key, 0) + 1
+        self.invalidations += len(self._feeds)
+        self._feeds.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "feeds": len(self._feeds),
+            "hits": self.hits,
+            "renders": self.renders,
+            "invalidations": self.invalidations
+        }
+
+
+calendar_feeds = CalendarFeedCache()
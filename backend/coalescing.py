@@ -0,0 +1,51 @@
+"""
+Coalescing - Share one in-flight computation between concurrent callers
+Caches use this on a miss so a burst of identical requests costs a single
+computation: the first caller computes, the others await its result.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator
+
+
+class CoalescedCalls:
+    """In-flight computations by key"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._inflight))
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Result of compute(), or of the computation already running for key
+
+        The computation runs in its own task, so a caller that is cancelled
+        (e.g. on client disconnect) stops waiting without failing the others.
+        Errors are raised to every caller of that computation.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(self._compute(key, compute))
+            task.add_done_callback(_retrieve_exception)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await compute()
+        finally:
+            self._inflight.pop(key, None)
+
+
+def _retrieve_exception(task: asyncio.Task):
+    """Mark a failure as seen: every caller may have stopped waiting already"""
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,61 @@
+"""
+Counter Documents - Shared write path for recounted materialized counters
+user_stats and analytics_daily are kept up to date with $inc on every
+appointment write and periodically recounted from appointments. The
+recount only overwrites documents no write touched while it ran.
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+
+async def replace_if_unchanged(
+    collection,
+    doc_id: str,
+    stored: Optional[Dict],
+    expected: Optional[Dict],
+    started_at: datetime
+) -> bool:
+    """
+    Overwrite (or remove) one counter document unless it changed since started_at
+
+    A write after the recount began already carries its own increment, so
+    such documents are left for the next run rather than overwritten with a
+    count that might miss it.
+
+    Args:
+        collection: Motor collection holding the counters
+        doc_id: _id of the document
+        stored: Document as read at the start of the recount (None if missing)
+        expected: Recounted contents, or None to remove the document
+        started_at: When the recount started (UTC)
+
+    Returns:
+        True if the document was written or removed
+    """
+    if stored is None:
+        if expected is None:
+            return False
+        try:
+            result = await collection.update_one(
+                {"_id": doc_id, "updated_at": {"$exists": False}},
+                {"$set": {**expected, "updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False  # Created concurrently by an appointment write
+        return result.modified_count > 0 or result.upserted_id is not None
+
+    updated_at = stored.get("updated_at")
+    if updated_at is not None and updated_at.replace(tzinfo=timezone.utc) >= started_at:
+        return False
+    if expected is None:
+        result = await collection.delete_one({"_id": doc_id, "updated_at": updated_at})
+        return result.deleted_count > 0
+    result = await collection.replace_one(
+        {"_id": doc_id, "updated_at": updated_at},
+        {**expected, "updated_at": datetime.now(timezone.utc)}
+    )
+    return result.modified_count > 0
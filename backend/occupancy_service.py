@@ -0,0 +1,322 @@
+"""
+Occupancy Service - Materialized per-artist-day occupancy
+Keeps one document per artist and day in the `schedules` collection, updated
+incrementally on every appointment and hold write, so availability reads are
+a single find_one by _id instead of a scan over appointments.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from booking_service import (
+    BLOCKING_STATUSES,
+    BLOCKED_SLOT_PROJECTION,
+    HOLD_PROJECTION,
+    appointments_to_blocked_slots,
+    get_blocked_slots,
+    get_blocked_slots_bulk,
+    minutes_to_time,
+)
+
+logger = logging.getLogger(__name__)
+
+# Schedule document (one per artist-day):
+#     {
+#         "_id": "<artist_id>|2025-11-15",
+#         "artist_id": "...",
+#         "date": "2025-11-15",
+#         "bookings": {"<appointment_id>": [600, 645], ...},          # [start, end) minutes
+#         "holds": {"<hold_id>": [660, 705, <expires_at>], ...},      # checkout holds
+#         "version": 12,
+#         "updated_at": <datetime>
+#     }
+# Keying entries by id makes every write a single idempotent $set/$unset.
+#
+# Days booked before the collection existed have no document. Reads fall back
+# to the appointments query for them, and the first write to such a day seeds
+# the new document from appointments, so older bookings are never dropped.
+# rebuild_schedules.py materializes all of them at once after deploying.
+
+
+def schedule_id(artist_id: str, date: str) -> str:
+    """_id of the schedule document for an artist-day"""
+    return f"{artist_id}|{date}"
+
+
+def _blocking_day(appointment: Optional[Dict]) -> Optional[Tuple[str, str]]:
+    """(artist_id, date) an appointment occupies, or None if it blocks nothing"""
+    if not appointment or appointment.get("status") not in BLOCKING_STATUSES:
+        return None
+    if appointment.get("start_minutes") is None or appointment.get("end_minutes") is None:
+        return None
+    return appointment["artist_id"], appointment["appointment_date"]
+
+
+async def _update_schedule(db, artist_id: str, date: str, update: Dict):
+    """Apply an update to a schedule document, creating it if needed"""
+    update.setdefault("$set", {})["updated_at"] = datetime.now(timezone.utc)
+    update["$setOnInsert"] = {"artist_id": artist_id, "date": date}
+    update["$inc"] = {"version": 1}
+    result = await db.schedules.update_one({"_id": schedule_id(artist_id, date)}, update, upsert=True)
+    if result.upserted_id is not None:
+        # First write for this day: include bookings and holds made before it
+        await _seed_schedule(db, artist_id, date)
+
+
+async def _seed_schedule(db, artist_id: str, date: str):
+    """Add the day's existing appointments and holds to a just-created schedule document"""
+    appointments = await db.appointments.find(
+        {"artist_id": artist_id, "appointment_date": date, "status": {"$in": BLOCKING_STATUSES}},
+        BLOCKED_SLOT_PROJECTION
+    ).to_list(None)
+    entries = {
+        f"bookings.{blocked['appointment_id']}": [
+            blocked["start_minutes"],
+            blocked["start_minutes"] + blocked["duration"]
+        ]
+        for blocked in await appointments_to_blocked_slots(db, appointments)
+    }
+    async for hold in db.slot_holds.find(
+        {"artist_id": artist_id, "appointment_date": date, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+        {**HOLD_PROJECTION, "end_minutes": 1, "expires_at": 1}
+    ):
+        entries[f"holds.{hold['id']}"] = [hold["start_minutes"], hold["end_minutes"], hold["expires_at"]]
+    if entries:
+        await db.schedules.update_one(
+            {"_id": schedule_id(artist_id, date)},
+            {"$set": {**entries, "updated_at": datetime.now(timezone.utc)}, "$inc": {"version": 1}}
+        )
+
+
+async def sync_appointment_schedule(db, previous: Optional[Dict], current: Optional[Dict]):
+    """
+    Bring schedule documents in line with one appointment write
+
+    Args:
+        db: MongoDB database instance
+        previous: Appointment before the write (None for a new booking)
+        current: Appointment after the write (None for a deletion)
+
+    Both arguments need timing fields; rows without them are skipped here
+    and picked up by rebuild_schedules.py.
+    """
+    appointment_id = (current or previous)["id"]
+    previous_day = _blocking_day(previous)
+    current_day = _blocking_day(current)
+
+    if previous_day and previous_day != current_day:
+        await _update_schedule(db, *previous_day, {"$unset": {f"bookings.{appointment_id}": ""}})
+
+    if current_day:
+        entry = [current["start_minutes"], current["end_minutes"]]
+        if previous_day == current_day and [previous["start_minutes"], previous["end_minutes"]] == entry:
+            return  # Nothing that affects occupancy changed
+        await _update_schedule(db, *current_day, {"$set": {f"bookings.{appointment_id}": entry}})
+
+
+async def record_hold(db, hold: Dict):
+    """Add a checkout hold to its schedule document, pruning expired holds"""
+    now = datetime.now(timezone.utc)
+    existing = await db.schedules.find_one(
+        {"_id": schedule_id(hold["artist_id"], hold["appointment_date"])},
+        {"holds": 1}
+    )
+    expired = [
+        hold_id for hold_id, entry in ((existing or {}).get("holds") or {}).items()
+        if _hold_expired(entry, now)
+    ]
+
+    update: Dict = {"$set": {
+        f"holds.{hold['id']}": [hold["start_minutes"], hold["end_minutes"], hold["expires_at"]]
+    }}
+    if expired:
+        update["$unset"] = {f"holds.{hold_id}": "" for hold_id in expired}
+    await _update_schedule(db, hold["artist_id"], hold["appointment_date"], update)
+
+
+async def remove_hold(db, hold: Dict):
+    """Drop a released or converted hold from its schedule document"""
+    await _update_schedule(
+        db,
+        hold["artist_id"],
+        hold["appointment_date"],
+        {"$unset": {f"holds.{hold['id']}": ""}}
+    )
+
+
+def _hold_expired(entry: List, now: datetime) -> bool:
+    expires_at = entry[2]
+    if expires_at.tzinfo is None:
+        # Motor returns naive UTC datetimes unless tz_aware is set
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at <= now
+
+
+def schedule_to_blocked_slots(
+    schedule: Optional[Dict],
+    exclude_appointment_id: Optional[str] = None,
+    exclude_hold_id: Optional[str] = None
+) -> List[Dict]:
+    """
+    Decode a schedule document into blocked slot dicts
+
+    Same shape as booking_service.get_blocked_slots(); expired holds are
+    skipped.
+    """
+    if not schedule:
+        return []
+
+    blocked_slots = [
+        {
+            "start": minutes_to_time(start),
+            "duration": end - start,
+            "start_minutes": start,
+            "appointment_id": appointment_id
+        }
+        for appointment_id, (start, end) in (schedule.get("bookings") or {}).items()
+        if appointment_id != exclude_appointment_id
+    ]
+
+    now = datetime.now(timezone.utc)
+    for hold_id, entry in (schedule.get("holds") or {}).items():
+        if hold_id == exclude_hold_id or _hold_expired(entry, now):
+            continue
+        blocked_slots.append({
+            "start": minutes_to_time(entry[0]),
+            "duration": entry[1] - entry[0],
+            "start_minutes": entry[0],
+            "hold_id": hold_id
+        })
+
+    return sorted(blocked_slots, key=lambda blocked: blocked["start_minutes"])
+
+
+async def get_schedule_blocked_slots(
+    db,
+    artist_id: str,
+    date: str,
+    exclude_appointment_id: Optional[str] = None,
+    exclude_hold_id: Optional[str] = None
+) -> List[Dict]:
+    """
+    Blocked slots of one artist-day from its schedule document
+
+    Args:
+        db: MongoDB database instance
+        artist_id: Artist ID
+        date: Date in YYYY-MM-DD format
+        exclude_appointment_id: Appointment ID to exclude (for rescheduling)
+        exclude_hold_id: Slot hold to ignore (the customer's own hold)
+
+    Returns:
+        Blocked slots, e.g. [{"start": "10:00", "duration": 45, "start_minutes": 600, ...}]
+        Days without a schedule document are read from appointments.
+    """
+    schedule = await db.schedules.find_one({"_id": schedule_id(artist_id, date)})
+    if schedule is None:
+        return await get_blocked_slots(db, artist_id, date, exclude_appointment_id, exclude_hold_id)
+    return schedule_to_blocked_slots(schedule, exclude_appointment_id, exclude_hold_id)
+
+
+async def get_schedule_blocked_slots_bulk(
+    db,
+    artist_ids: List[str],
+    dates: List[str]
+) -> Dict[Tuple[str, str], List[Dict]]:
+    """
+    Blocked slots for many artist-days with one _id $in query
+
+    Artist-days without a schedule document are read with one appointments
+    query (get_blocked_slots_bulk) covering just those artists and dates.
+
+    Returns:
+        {(artist_id, date): [blocked slot, ...]} - every requested pair is present
+    """
+    days = {schedule_id(artist_id, date): (artist_id, date) for artist_id in artist_ids for date in dates}
+    blocked_by_day = {day: [] for day in days.values()}
+    if not days:
+        return blocked_by_day
+
+    missing = set(days.values())
+    async for schedule in db.schedules.find({"_id": {"$in": list(days)}}):
+        day = days[schedule["_id"]]
+        blocked_by_day[day] = schedule_to_blocked_slots(schedule)
+        missing.discard(day)
+
+    if missing:
+        fallback = await get_blocked_slots_bulk(
+            db,
+            sorted({artist_id for artist_id, _ in missing}),
+            sorted({date for _, date in missing})
+        )
+        for day in missing:
+            blocked_by_day[day] = fallback[day]
+    return blocked_by_day
+
+
+async def compute_schedules(db, from_date: Optional[str] = None) -> Dict[str, Dict]:
+    """
+    Recompute schedule contents from appointments and slot holds
+
+    Appointments are streamed in (artist_id, appointment_date) order with
+    the availability projection, so memory stays proportional to the
+    number of artist-days rather than the number of fields.
+
+    Args:
+        db: MongoDB database instance
+        from_date: Only days on or after this date (None = all days)
+
+    Returns:
+        {schedule_id: {"artist_id", "date", "bookings", "holds"}}
+    """
+    query: Dict = {"status": {"$in": BLOCKING_STATUSES}}
+    if from_date:
+        query["appointment_date"] = {"$gte": from_date}
+
+    expected: Dict[str, Dict] = {}
+
+    def day(artist_id: str, date: str) -> Dict:
+        return expected.setdefault(schedule_id(artist_id, date), {
+            "artist_id": artist_id,
+            "date": date,
+            "bookings": {},
+            "holds": {}
+        })
+
+    cursor = db.appointments.find(
+        query,
+        {**BLOCKED_SLOT_PROJECTION, "artist_id": 1, "appointment_date": 1}
+    ).sort([("artist_id", 1), ("appointment_date", 1)])
+    batch = []
+    async for appointment in cursor:
+        batch.append(appointment)
+        if len(batch) >= 500:
+            await _add_bookings(db, batch, day)
+            batch = []
+    await _add_bookings(db, batch, day)
+
+    hold_query: Dict = {"expires_at": {"$gt": datetime.now(timezone.utc)}}
+    if from_date:
+        hold_query["appointment_date"] = {"$gte": from_date}
+    async for hold in db.slot_holds.find(hold_query, {**HOLD_PROJECTION, "end_minutes": 1, "expires_at": 1}):
+        day(hold["artist_id"], hold["appointment_date"])["holds"][hold["id"]] = [
+            hold["start_minutes"],
+            hold["end_minutes"],
+            hold["expires_at"]
+        ]
+
+    return expected
+
+
+async def _add_bookings(db, appointments: List[Dict], day):
+    """Resolve a batch of appointments (legacy rows included) into schedule entries"""
+    if not appointments:
+        return
+    days = {appt["id"]: (appt["artist_id"], appt["appointment_date"]) for appt in appointments}
+    for blocked in await appointments_to_blocked_slots(db, appointments):
+        start = blocked["start_minutes"]
+        day(*days[blocked["appointment_id"]])["bookings"][blocked["appointment_id"]] = [
+            start,
+            start + blocked["duration"]
+        ]
@@ -0,0 +1,155 @@
+"""
+Overlap Audit - Find double bookings already stored in appointments
+Streams active appointments sorted by (artist_id, appointment_date,
+start_minutes) and sweeps each artist-day once, so memory is bounded by the
+busiest single day rather than the size of the collection.
+"""
+
+import heapq
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+from booking_service import BLOCKING_STATUSES, minutes_to_time, parse_duration, time_to_minutes
+
+logger = logging.getLogger(__name__)
+
+AUDIT_BATCH_SIZE = 1000
+
+AUDIT_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "artist_id": 1,
+    "appointment_date": 1,
+    "appointment_time": 1,
+    "start_minutes": 1,
+    "duration_minutes": 1,
+    "status": 1,
+    "customer_name": 1,
+    "service_id": 1
+}
+
+
+def sweep_day(appointments: List[Dict], buffer_time: int = 10) -> List[Dict]:
+    """
+    Every conflicting pair within one artist-day
+
+    Sweep line over start times: a min-heap holds the bookings still
+    "open" (end + buffer after the current start); each new booking
+    conflicts with exactly the bookings left in the heap. O(n log n + k)
+    for n bookings and k conflicts.
+
+    Args:
+        appointments: Bookings of one artist-day with "start" and "end" minutes
+        buffer_time: Required gap between bookings (default 10 min)
+
+    Returns:
+        [{"first": {...}, "second": {...}, "overlap_minutes": 15}, ...]
+        overlap_minutes is 0 when only the buffer is violated
+    """
+    conflicts = []
+    active: List = []  # (end + buffer, index)
+    ordered = sorted(appointments, key=lambda appt: appt["start"])
+    for index, appt in enumerate(ordered):
+        while active and active[0][0] <= appt["start"]:
+            heapq.heappop(active)
+        for _, other_index in sorted(active, key=lambda entry: entry[1]):
+            other = ordered[other_index]
+            conflicts.append({
+                "first": _describe(other),
+                "second": _describe(appt),
+                "overlap_minutes": max(0, min(other["end"], appt["end"]) - appt["start"])
+            })
+        heapq.heappush(active, (appt["end"] + buffer_time, index))
+    return conflicts
+
+
+def _describe(appt: Dict) -> Dict:
+    return {
+        "id": appt["id"],
+        "time": minutes_to_time(appt["start"]),
+        "end": minutes_to_time(appt["end"]),
+        "status": appt.get("status"),
+        "customer_name": appt.get("customer_name", "")
+    }
+
+
+async def find_overlaps(
+    db,
+    buffer_time: int = 10,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None
+) -> AsyncIterator[Dict]:
+    """
+    Yield every conflicting pair of active appointments, artist-day by artist-day
+
+    The cursor is sorted by (artist_id, appointment_date, start_minutes)
+    (indexed), so one artist-day is buffered at a time. Legacy rows without
+    timing fields are resolved from a one-off services map.
+
+    Yields:
+        {"type": "conflict", "artist_id", "date", "first", "second", "overlap_minutes"}
+        and finally {"type": "summary", "appointments", "artist_days", "conflicts",
+        "artist_days_with_conflicts", "skipped"}
+    """
+    services = await db.services.find({}, {"_id": 0, "id": 1, "duration": 1}).to_list(None)
+    durations = {service["id"]: parse_duration(service.get("duration", "60 min")) for service in services}
+
+    query: Dict = {"status": {"$in": BLOCKING_STATUSES}}
+    date_filter = {}
+    if from_date:
+        date_filter["$gte"] = from_date
+    if to_date:
+        date_filter["$lte"] = to_date
+    if date_filter:
+        query["appointment_date"] = date_filter
+
+    cursor = db.appointments.find(query, AUDIT_PROJECTION).sort([
+        ("artist_id", 1),
+        ("appointment_date", 1),
+        ("start_minutes", 1)
+    ]).batch_size(AUDIT_BATCH_SIZE)
+
+    summary = {
+        "type": "summary",
+        "appointments": 0,
+        "artist_days": 0,
+        "conflicts": 0,
+        "artist_days_with_conflicts": 0,
+        "skipped": 0
+    }
+    current_day = None
+    day: List[Dict] = []
+
+    def flush() -> List[Dict]:
+        if not day:
+            return []
+        summary["artist_days"] += 1
+        conflicts = sweep_day(day, buffer_time)
+        if conflicts:
+            summary["artist_days_with_conflicts"] += 1
+            summary["conflicts"] += len(conflicts)
+        return conflicts
+
+    async for appt in cursor:
+        summary["appointments"] += 1
+        key = (appt["artist_id"], appt["appointment_date"])
+        if key != current_day:
+            for conflict in flush():
+                yield {"type": "conflict", "artist_id": current_day[0], "date": current_day[1], **conflict}
+            current_day = key
+            day = []
+
+        duration = appt.get("duration_minutes")
+        if duration is None:
+            duration = durations.get(appt.get("service_id"))
+        if duration is None or not appt.get("appointment_time"):
+            summary["skipped"] += 1  # Deleted service, nothing to measure
+            continue
+        start = appt.get("start_minutes")
+        if start is None:
+            start = time_to_minutes(appt["appointment_time"])
+        day.append({**appt, "start": start, "end": start + duration})
+
+    for conflict in flush():
+        yield {"type": "conflict", "artist_id": current_day[0], "date": current_day[1], **conflict}
+    yield summary
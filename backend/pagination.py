@@ -0,0 +1,123 @@
+"""
+Pagination - Opaque-cursor keyset pagination for list endpoints
+A cursor encodes the sort key values of the last item of a page; the next
+page continues with a range condition on those keys, so every page is a
+bounded index scan however deep the client pages (no skip).
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 1000
+# Without a limit a page is as large as these lists were before paging, so
+# clients that ignore X-Next-Cursor keep seeing the same rows
+DEFAULT_PAGE_SIZE = MAX_PAGE_SIZE
+
+# Response header carrying the next page's cursor (absent on the last page)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+Sort = List[Tuple[str, int]]
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """
+    Opaque cursor for a list of sort key values
+
+    Datetimes are tagged so they decode back to datetimes and keep
+    comparing against BSON dates rather than strings.
+    """
+    tagged = [{"$date": value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(tagged, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: Sort) -> List[Any]:
+    """
+    Sort key values from a cursor
+
+    Raises:
+        ValueError: If the cursor is malformed or does not fit the sort
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != len(sort):
+        raise ValueError("Invalid cursor")
+    return [
+        datetime.fromisoformat(value["$date"]) if isinstance(value, dict) and "$date" in value else value
+        for value in values
+    ]
+
+
+def keyset_filter(sort: Sort, values: List[Any]) -> Dict:
+    """
+    Condition selecting the items strictly after `values` in `sort` order
+
+    Example:
+        sort [("date", -1), ("id", -1)], values ["2025-11-15", "abc"] →
+        {"$or": [{"date": {"$lt": "2025-11-15"}},
+                 {"date": "2025-11-15", "id": {"$lt": "abc"}}]}
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        branch = {sort[j][0]: values[j] for j in range(i)}
+        branch[field] = {"$gt" if direction > 0 else "$lt": values[i]}
+        branches.append(branch)
+    return {"$or": branches}
+
+
+def page_size(limit: Optional[int]) -> int:
+    """Clamp a requested page size to 1..MAX_PAGE_SIZE"""
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+async def fetch_page(
+    collection,
+    query: Dict,
+    sort: Sort,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    projection: Optional[Dict] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of a keyset-paginated query
+
+    Args:
+        collection: Motor collection
+        query: Filters (combined with the cursor condition)
+        sort: Sort keys, ending in a unique field such as "id"
+        limit: Page size (clamped, default DEFAULT_PAGE_SIZE)
+        cursor: Cursor returned with the previous page
+        projection: Projection; sort fields are always included
+
+    Returns:
+        (items, next_cursor) - next_cursor is None on the last page
+
+    Raises:
+        ValueError: If the cursor is invalid
+    """
+    size = page_size(limit)
+    if cursor:
+        after = keyset_filter(sort, decode_cursor(cursor, sort))
+        query = {"$and": [query, after]} if query else after
+
+    if projection is not None and any(value for key, value in projection.items() if key != "_id"):
+        projection = {**projection, **{field: 1 for field, _ in sort}}
+
+    # One extra item tells whether another page follows
+    items = await collection.find(query, projection).sort(sort).limit(size + 1).to_list(size + 1)
+
+    next_cursor = None
+    if len(items) > size:
+        items = items[:size]
+        next_cursor = encode_cursor([items[-1].get(field) for field, _ in sort])
+    return items, next_cursor
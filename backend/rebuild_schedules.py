@@ -0,0 +1,145 @@
+"""
+Rebuild Materialized Schedules
+Recomputes the per-artist-day `schedules` documents from appointments and
+slot holds, reports drift and repairs it. Run it any time drift is suspected.
+Migration: run it once right after deploying the schedules collection.
+Until then availability falls back to the appointments query for days
+without a schedule document, which is correct but slower.
+Safe to run while the API is serving traffic (version-guarded writes)
+Run: python rebuild_schedules.py [--dry-run] [--all]
+"""
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
+
+from occupancy_service import compute_schedules
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+MAX_REPORTED_DAYS = 20
+
+
+def _live_hold_ids(holds: dict, now: datetime) -> set:
+    """Hold ids whose expiry is still in the future"""
+    live = set()
+    for hold_id, entry in (holds or {}).items():
+        expires_at = entry[2]
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        if expires_at > now:
+            live.add(hold_id)
+    return live
+
+
+async def rebuild_schedules(dry_run: bool = False, include_past: bool = False):
+    """Compare stored schedules with recomputed ones and repair the differences"""
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    from_date = None if include_past else datetime.now().strftime("%Y-%m-%d")
+    print(f"🔧 Rebuilding schedules {'(dry run) ' if dry_run else ''}"
+          f"{'for all days' if include_past else f'from {from_date}'}...")
+
+    try:
+        # Stored documents are read first: any write after this point bumps
+        # their version, so the guarded repairs below never clobber it
+        stored_query = {"date": {"$gte": from_date}} if from_date else {}
+        stored = {
+            schedule["_id"]: schedule
+            async for schedule in db.schedules.find(
+                stored_query,
+                {"_id": 1, "bookings": 1, "holds": 1, "version": 1}
+            )
+        }
+        expected = await compute_schedules(db, from_date)
+        print(f"📚 {len(stored)} stored, {len(expected)} expected artist-days")
+
+        now = datetime.now(timezone.utc)
+        missing, stale, mismatched = [], [], []
+        for day_id, schedule in expected.items():
+            current = stored.get(day_id)
+            if current is None:
+                missing.append(day_id)
+            elif (
+                (current.get("bookings") or {}) != schedule["bookings"]
+                or _live_hold_ids(current.get("holds"), now) != set(schedule["holds"])
+            ):
+                mismatched.append(day_id)
+        for day_id, current in stored.items():
+            if day_id not in expected and (current.get("bookings") or _live_hold_ids(current.get("holds"), now)):
+                stale.append(day_id)
+
+        print(f"\n📊 Drift report")
+        print(f"   missing    : {len(missing)} artist-days with bookings but no schedule")
+        print(f"   mismatched : {len(mismatched)} artist-days with wrong entries")
+        print(f"   stale      : {len(stale)} schedules with entries but no bookings")
+        for day_id in (missing + mismatched + stale)[:MAX_REPORTED_DAYS]:
+            print(f"   - {day_id}")
+
+        if dry_run:
+            print("\nℹ️  Dry run, nothing written")
+            return
+
+        repaired = 0
+        changed = 0
+        for day_id in missing + mismatched:
+            schedule = expected[day_id]
+            update = {
+                "$set": {**schedule, "updated_at": datetime.now(timezone.utc)},
+                "$inc": {"version": 1}
+            }
+            try:
+                if day_id in stored:
+                    result = await db.schedules.update_one(
+                        {"_id": day_id, "version": stored[day_id].get("version")},
+                        update
+                    )
+                    matched = result.matched_count
+                else:
+                    await db.schedules.update_one(
+                        {"_id": day_id, "version": {"$exists": False}},
+                        update,
+                        upsert=True
+                    )
+                    matched = 1
+            except DuplicateKeyError:
+                matched = 0  # Created by a live write meanwhile
+
+            if matched:
+                repaired += 1
+            else:
+                changed += 1
+
+        for day_id in stale:
+            result = await db.schedules.update_one(
+                {"_id": day_id, "version": stored[day_id].get("version")},
+                {
+                    "$set": {"bookings": {}, "holds": {}, "updated_at": datetime.now(timezone.utc)},
+                    "$inc": {"version": 1}
+                }
+            )
+            if result.matched_count:
+                repaired += 1
+            else:
+                changed += 1
+
+        print(f"\n✅ Rebuild complete: {repaired} artist-days repaired")
+        if changed:
+            print(f"⚠️  {changed} artist-days changed during the rebuild; run again to verify them")
+
+    except Exception as e:
+        print(f"\n❌ Error during rebuild: {str(e)}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_schedules(dry_run="--dry-run" in sys.argv, include_past="--all" in sys.argv))
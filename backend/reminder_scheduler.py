@@ -9,6 +9,8 @@ from datetime import datetime, timedelta, timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
+from appointment_details import AppointmentDetailsLoader
+
 logger = logging.getLogger(__name__)
 
 class ReminderScheduler:
@@ -46,7 +48,7 @@ class ReminderScheduler:
                 {"_id": 0}
             ).to_list(1000)
             
-            sent_count = 0
+            due = []
             
             for appt in appointments:
                 try:
@@ -63,13 +65,21 @@ class ReminderScheduler:
                     
                     # Check if in reminder window (2-3 hours)
                     if reminder_start <= appt_datetime <= reminder_end:
-                        await self.send_reminder(appt)
-                        sent_count += 1
+                        due.append(appt)
                         
                 except Exception as e:
                     logger.error(f"Error processing appointment {appt.get('id')}: {str(e)}")
                     continue
             
+            # Services and artists of due legacy reminders (no snapshot) in one query each
+            loader = AppointmentDetailsLoader(self.db)
+            await loader.load(due)
+            
+            sent_count = 0
+            for appt in due:
+                if await self.send_reminder(appt, loader):
+                    sent_count += 1
+            
             if sent_count > 0:
                 logger.info(f"Reminder check complete: {sent_count} reminders sent")
             else:
@@ -78,27 +88,18 @@ class ReminderScheduler:
         except Exception as e:
             logger.error(f"Error in reminder check task: {str(e)}")
     
-    async def send_reminder(self, appointment):
+    async def send_reminder(self, appointment, loader: AppointmentDetailsLoader = None) -> bool:
         """ارسال reminder notification"""
         try:
             # فقط اگر user_id داشته باشد
             if not appointment.get("user_id"):
                 logger.debug(f"Skipping reminder for appointment {appointment['id']} - no user_id")
-                return
+                return False
             
-            # Get service details
-            service = await self.db.services.find_one(
-                {"id": appointment["service_id"]},
-                {"_id": 0}
-            )
-            service_name = service.get("name_de", "Ihr Service") if service else "Ihr Service"
-            
-            # Get artist details
-            artist = await self.db.artists.find_one(
-                {"id": appointment["artist_id"]},
-                {"_id": 0}
-            )
-            artist_name = artist.get("name", "Ihr Stylist") if artist else "Ihr Stylist"
+            # Service and artist names from the appointment's snapshot (looked up for legacy rows)
+            details = await (loader or AppointmentDetailsLoader(self.db)).snapshot(appointment)
+            service_name = details["service_name_de"] or "Ihr Service"
+            artist_name = details["artist_name"] or "Ihr Stylist"
             
             # Create notification با German text
             title_text = "Terminerinnerung 🔔"
@@ -131,9 +132,11 @@ class ReminderScheduler:
             )
             
             logger.info(f"Reminder sent for appointment {appointment['id']} to user {appointment['user_id']}")
+            return True
             
         except Exception as e:
             logger.error(f"Error sending reminder for appointment {appointment.get('id')}: {str(e)}")
+            return False
     
     def start(self):
         """شروع scheduler - هر 30 دقیقه چک می‌کند"""
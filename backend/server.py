@@ -1,17 +1,22 @@
 from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Request, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, validator, EmailStr
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 import uuid
 from datetime import datetime, timezone, timedelta
 import re
+import json
+import asyncio
+import hmac
+from email.utils import format_datetime, parsedate_to_datetime
 from translation_service import translation_service
 import shutil
 from PIL import Image
@@ -20,14 +25,67 @@ import httpx
 from notification_service import NotificationService
 from notification_cleanup_scheduler import initialize_cleanup_scheduler, shutdown_cleanup_scheduler
 from reminder_scheduler import initialize_reminder_scheduler, shutdown_reminder_scheduler
+from user_stats_scheduler import initialize_user_stats_scheduler, shutdown_user_stats_scheduler
+from analytics_scheduler import initialize_analytics_scheduler, shutdown_analytics_scheduler
+from user_stats_service import apply_appointment_change, read_user_stats
+from admin_stats import admin_stats_cache, compute_admin_stats
+from analytics_service import GROUP_BY_FIELDS, METRICS, apply_appointment_rollup, query_rollups
 from booking_service import (
     parse_duration,
+    parse_price,
     time_to_minutes,
-    generate_time_slots,
-    get_blocked_slots,
-    filter_available_slots,
-    check_overlap,
-    is_valid_booking_date
+    minutes_to_time,
+    is_valid_booking_date,
+    compute_appointment_timing,
+    date_range,
+    DayOccupancy,
+    BLOCKING_STATUSES
+)
+from utilization_service import SLOT_MINUTES, build_occupancy_tensor, summarize_utilization
+from overlap_audit import find_overlaps
+from appointment_details import (
+    AppointmentDetailsLoader,
+    appointment_snapshot,
+    booked_price,
+    has_snapshot,
+    propagate_artist_snapshot,
+    propagate_service_snapshot,
+    schedule_snapshot_propagation,
+)
+from pagination import NEXT_CURSOR_HEADER, fetch_page
+from user_listing import list_users_with_stats, user_search_query
+from calendar_feed import SALON_FEED, build_feed, calendar_feeds
+from waitlist_service import match_freed_slot, waitlist_expiry, waitlist_match_keys
+from availability_events import availability_broker, diff_slots
+from availability_service import (
+    availability_cache,
+    available_starts,
+    schedule_cache,
+    default_weekly_schedule,
+    DEFAULT_SLOT_INTERVAL,
+    find_combo_placements,
+    find_next_available,
+    get_available_slots,
+    get_available_slots_bulk,
+    get_working_day
+)
+from occupancy_service import (
+    get_schedule_blocked_slots,
+    sync_appointment_schedule
+)
+from slot_claims import (
+    SlotTakenError,
+    HoldMismatchError,
+    AppointmentChangedError,
+    HOLD_TTL_MINUTES,
+    book_appointment,
+    book_appointments,
+    book_from_hold,
+    claim_appointment,
+    move_appointment,
+    place_hold,
+    release_claims,
+    release_hold
 )
 # Rate Limiting
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -77,6 +135,7 @@ class Service(BaseModel):
     description_fr: str
     category: str
     price: str
+    price_value: Optional[float] = None  # price parsed to a number (analytics)
     duration: str
     image_url: Optional[str] = None
 
@@ -106,12 +165,20 @@ class Appointment(BaseModel):
     # Reminder fields
     reminder_sent: bool = False  # آیا reminder ارسال شده
     reminder_sent_at: Optional[str] = None  # زمان ارسال reminder (ISO format)
-    # Populated fields (not stored in DB, only for API response)
+    # Timing fields (stored so availability never needs a service lookup)
+    duration_minutes: Optional[int] = None
+    start_minutes: Optional[int] = None
+    end_minutes: Optional[int] = None
+    combo_id: Optional[str] = None  # Shared by appointments booked together as one bundle
+    # Snapshot of service/artist at booking time (kept current for upcoming appointments)
     service_name_en: Optional[str] = None
     service_name_de: Optional[str] = None
     service_name_fr: Optional[str] = None
     service_duration: Optional[str] = None  # Duration as string (e.g., "45 min")
     artist_name: Optional[str] = None
+    # Price and category at booking time (never propagated; analytics revenue)
+    service_price: Optional[float] = None
+    service_category: Optional[str] = None
 
 
 class AppointmentCreate(BaseModel):
@@ -123,6 +190,7 @@ class AppointmentCreate(BaseModel):
     appointment_date: str
     appointment_time: str
     notes: Optional[str] = None
+    hold_id: Optional[str] = None  # Checkout hold to convert into this booking
     
     @validator('customer_name')
     def validate_name(cls, v):
@@ -162,18 +230,11 @@ class AppointmentCreate(BaseModel):
     
     @validator('appointment_time')
     def validate_time(cls, v):
-        """Validate appointment time"""
+        """Validate appointment time format (working hours are checked per artist)"""
         try:
-            time_obj = datetime.strptime(v, '%H:%M').time()
-            # Business hours: 9 AM - 7 PM
-            if time_obj < datetime.strptime('09:00', '%H:%M').time():
-                raise ValueError('Appointment time must be after 9:00 AM')
-            if time_obj >= datetime.strptime('19:00', '%H:%M').time():
-                raise ValueError('Appointment time must be before 7:00 PM')
+            datetime.strptime(v, '%H:%M')
             return v
-        except ValueError as e:
-            if 'after' in str(e) or 'before' in str(e):
-                raise
+        except ValueError:
             raise ValueError('Invalid time format. Use HH:MM')
     
     @validator('notes')
@@ -687,12 +748,14 @@ async def create_service(input: ServiceCreate):
         description_fr=desc_translations['fr'],
         category=input.category,
         price=input.price,
+        price_value=parse_price(input.price),
         duration=input.duration,
         image_url=input.image_url
     )
     
     doc = service_obj.model_dump()
     await db.services.insert_one(doc)
+    admin_stats_cache.invalidate()
     return service_obj
 
 # Appointment Routes
@@ -705,7 +768,8 @@ async def get_appointment_availability(
     artist_id: str,
     date: str,
     service_id: str,
-    exclude_appointment_id: Optional[str] = None
+    exclude_appointment_id: Optional[str] = None,
+    hold_id: Optional[str] = None
 ):
     """
     Get available time slots for an artist on a specific date
@@ -715,6 +779,7 @@ async def get_appointment_availability(
         - date: Date in YYYY-MM-DD format
         - service_id: Service ID (to get duration)
         - exclude_appointment_id: Optional, for rescheduling
+        - hold_id: Optional, the caller's own checkout hold (not counted as blocked)
 
     Returns:
         {
@@ -747,27 +812,15 @@ async def get_appointment_availability(
         # Parse duration
         service_duration = parse_duration(service.get("duration", "60 min"))
 
-        # Get all possible time slots (9 AM - 7 PM, 30 min intervals)
-        all_slots = generate_time_slots(
-            start_hour=9,
-            end_hour=19,
-            interval=30
-        )
-
-        # Get blocked slots for this artist on this date
-        blocked_slots = await get_blocked_slots(
+        # Artist's compiled working day minus booked occupancy
+        available_slots, blocked_slots = await get_available_slots(
             db,
             artist_id,
             date,
-            exclude_appointment_id
-        )
-
-        # Filter available slots
-        available_slots = filter_available_slots(
-            all_slots,
-            blocked_slots,
             service_duration,
-            buffer_time=10  # 10 min buffer between appointments
+            buffer_time=10,  # 10 min buffer between appointments
+            exclude_appointment_id=exclude_appointment_id,
+            exclude_hold_id=hold_id
         )
 
         logger.info(
@@ -802,6 +855,7 @@ class AvailabilityCheckRequest(BaseModel):
     time: str
     service_id: str
     exclude_appointment_id: Optional[str] = None
+    hold_id: Optional[str] = None
 
 
 @api_router.post("/appointments/check-availability")
@@ -815,7 +869,8 @@ async def check_specific_availability(request_data: AvailabilityCheckRequest):
             "date": "2025-11-15",
             "time": "14:00",
             "service_id": "service-id",
-            "exclude_appointment_id": "optional-for-rescheduling"
+            "exclude_appointment_id": "optional-for-rescheduling",
+            "hold_id": "optional-own-checkout-hold"
         }
 
     Returns:
@@ -837,31 +892,32 @@ async def check_specific_availability(request_data: AvailabilityCheckRequest):
 
         service_duration = parse_duration(service.get("duration", "60 min"))
 
-        # Get blocked slots
-        blocked_slots = await get_blocked_slots(
+        # Check the artist's working hours first (cached, no query on a hit)
+        requested_minutes = time_to_minutes(request_data.time)
+        working_day = await get_working_day(db, request_data.artist_id, request_data.date)
+        if not working_day.contains(requested_minutes, service_duration):
+            return {
+                "available": False,
+                "reason": "This time is outside the artist's working hours"
+            }
+
+        # Get blocked slots from the artist-day's schedule document
+        blocked_slots = await get_schedule_blocked_slots(
             db,
             request_data.artist_id,
             request_data.date,
-            request_data.exclude_appointment_id
+            request_data.exclude_appointment_id,
+            exclude_hold_id=request_data.hold_id
         )
 
-        # Check if requested time is available
-        requested_minutes = time_to_minutes(request_data.time)
+        # Check if requested time is free (10 min buffer)
+        occupancy = DayOccupancy.from_blocked_slots(blocked_slots)
 
-        for blocked in blocked_slots:
-            blocked_start = time_to_minutes(blocked["start"])
-            blocked_duration = blocked["duration"] + 10  # Add 10 min buffer
-
-            if check_overlap(
-                requested_minutes,
-                service_duration + 10,
-                blocked_start,
-                blocked_duration
-            ):
-                return {
-                    "available": False,
-                    "reason": "This time slot overlaps with an existing appointment"
-                }
+        if not occupancy.is_free(requested_minutes, service_duration, buffer_time=10):
+            return {
+                "available": False,
+                "reason": "This time slot overlaps with an existing appointment"
+            }
 
         logger.info(
             f"Availability confirmed: {request_data.artist_id} - "
@@ -879,32 +935,688 @@ async def check_specific_availability(request_data: AvailabilityCheckRequest):
             detail=f"Failed to check availability: {str(e)}"
         )
 
+MAX_MULTI_ARTIST_RANGE_DAYS = 7
+
+
+@api_router.get("/appointments/availability/artists")
+async def get_multi_artist_availability(
+    service_id: str,
+    date: str,
+    end_date: Optional[str] = None
+):
+    """
+    Get available time slots for all active artists at once ("any stylist")
+
+    Query Parameters:
+        - service_id: Service ID (to get duration)
+        - date: Date in YYYY-MM-DD format
+        - end_date: Optional last date of a short range (max 7 days)
+
+    Returns:
+        {
+            "success": true,
+            "service_duration": 45,
+            "days": [
+                {
+                    "date": "2025-11-15",
+                    "artists": [
+                        {"artist_id": "...", "artist_name": "...", "available_slots": ["09:00", ...]}
+                    ],
+                    "first_available": {"artist_id": "...", "time": "09:00"}
+                }
+            ]
+        }
+    """
+    try:
+        dates = date_range(date, end_date or date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    if not dates:
+        raise HTTPException(status_code=400, detail="end_date must not be before date")
+    if len(dates) > MAX_MULTI_ARTIST_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range too long (max {MAX_MULTI_ARTIST_RANGE_DAYS} days)"
+        )
+
+    try:
+        service = await db.services.find_one({"id": service_id}, {"_id": 0, "duration": 1})
+        if not service:
+            raise HTTPException(status_code=404, detail="Service not found")
+        service_duration = parse_duration(service.get("duration", "60 min"))
+
+        artists = await db.artists.find(
+            {"active": True},
+            {"_id": 0, "id": 1, "name": 1}
+        ).to_list(1000)
+        artist_ids = [artist["id"] for artist in artists]
+
+        # Out-of-range days are reported empty without querying them; closed
+        # days come back empty from the artists' working hours
+        bookable_dates = [d for d in dates if is_valid_booking_date(d)[0]]
+
+        # One query for every artist-day, working hours from the schedule cache
+        available_by_day = await get_available_slots_bulk(
+            db,
+            artist_ids,
+            bookable_dates,
+            service_duration,
+            buffer_time=10
+        )
+
+        days = []
+        for day in dates:
+            day_artists = []
+            first_available = None
+            if day in bookable_dates:
+                for artist in artists:
+                    available_slots = available_by_day[(artist["id"], day)]
+                    day_artists.append({
+                        "artist_id": artist["id"],
+                        "artist_name": artist.get("name", ""),
+                        "available_slots": available_slots
+                    })
+                    if available_slots and (
+                        first_available is None
+                        or time_to_minutes(available_slots[0]) < time_to_minutes(first_available["time"])
+                    ):
+                        first_available = {"artist_id": artist["id"], "time": available_slots[0]}
+
+            days.append({
+                "date": day,
+                "artists": day_artists,
+                "first_available": first_available
+            })
+
+        logger.info(
+            f"Multi-artist availability: service={service_id}, dates={dates[0]}..{dates[-1]}, "
+            f"artists={len(artists)}"
+        )
+
+        return {
+            "success": True,
+            "service_duration": service_duration,
+            "days": days
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting multi-artist availability: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get availability: {str(e)}"
+        )
+
+@api_router.get("/appointments/availability/calendar")
+async def get_availability_calendar(
+    service_id: str,
+    month: str,
+    artist_id: Optional[str] = None
+):
+    """
+    Get a month view of availability (per-day free-slot counts)
+
+    Query Parameters:
+        - service_id: Service ID (to get duration)
+        - month: Month in YYYY-MM format
+        - artist_id: Optional, defaults to all active artists
+
+    Returns:
+        {
+            "success": true,
+            "month": "2025-11",
+            "service_duration": 45,
+            "days": [
+                {"date": "2025-11-15", "bookable": true, "free_slots": 12, "first_available": "09:00"},
+                {"date": "2025-11-16", "bookable": false, "free_slots": 0, "first_available": null}
+            ]
+        }
+
+    With all artists, free_slots counts start times where at least one
+    artist is free.
+    """
+    try:
+        month_start = datetime.strptime(month, "%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month format. Use YYYY-MM")
+
+    next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    dates = date_range(
+        month_start.strftime("%Y-%m-%d"),
+        (next_month - timedelta(days=1)).strftime("%Y-%m-%d")
+    )
+
+    try:
+        service = await db.services.find_one({"id": service_id}, {"_id": 0, "duration": 1})
+        if not service:
+            raise HTTPException(status_code=404, detail="Service not found")
+        service_duration = parse_duration(service.get("duration", "60 min"))
+
+        if artist_id:
+            artist_ids = [artist_id]
+        else:
+            artists = await db.artists.find({"active": True}, {"_id": 0, "id": 1}).to_list(1000)
+            artist_ids = [artist["id"] for artist in artists]
+
+        # Past and too far ahead days are never queried; closed days have no
+        # working hours and so no free slots
+        bookable_dates = [d for d in dates if is_valid_booking_date(d)[0]]
+        bookable = set(bookable_dates)
+
+        available_by_day = {}
+        if bookable_dates:
+            # One schedules query for every artist-day of the month
+            available_by_day = await get_available_slots_bulk(
+                db,
+                artist_ids,
+                bookable_dates,
+                service_duration,
+                buffer_time=10
+            )
+
+        days = []
+        for day in dates:
+            free_times = set()
+            if day in bookable:
+                for aid in artist_ids:
+                    free_times.update(available_by_day[(aid, day)])
+            first_available = min(free_times, key=time_to_minutes) if free_times else None
+            days.append({
+                "date": day,
+                "bookable": day in bookable,
+                "free_slots": len(free_times),
+                "first_available": first_available
+            })
+
+        return {
+            "success": True,
+            "month": month,
+            "service_duration": service_duration,
+            "days": days
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting availability calendar: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get availability calendar: {str(e)}"
+        )
+
+AVAILABILITY_STREAM_KEEPALIVE_SECONDS = 15
+
+
+def sse_event(event: str, data: Dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@api_router.get("/appointments/availability/stream")
+async def stream_availability(request: Request, artist_id: str, date: str, service_id: str):
+    """
+    Live availability for an open booking page (Server-Sent Events)
+
+    Query Parameters:
+        - artist_id: Artist ID
+        - date: Date in YYYY-MM-DD format
+        - service_id: Service ID (to get duration)
+
+    Events:
+        event: snapshot   data: {"available_slots": ["09:00", ...], "service_duration": 45}
+        event: diff       data: {"added": ["14:00"], "removed": ["10:00"]}
+
+    Every booking, move, cancellation or hold on the artist-day publishes
+    the new occupancy once; this stream turns it into a diff for its own
+    service duration in memory. A comment line is sent every 15s as a
+    keepalive. Streams live in this process only.
+    """
+    is_valid, error_msg = is_valid_booking_date(date)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+
+    service = await db.services.find_one({"id": service_id}, {"_id": 0, "duration": 1})
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    service_duration = parse_duration(service.get("duration", "60 min"))
+
+    if availability_broker.is_full:
+        raise HTTPException(status_code=503, detail="Too many open availability streams")
+
+    async def events():
+        # Subscribed inside the generator so the finally below always runs
+        subscription = availability_broker.subscribe(artist_id, date)
+        if subscription is None:
+            return
+        try:
+            available, _ = await get_available_slots(db, artist_id, date, service_duration, buffer_time=10)
+            yield "retry: 5000\n\n"
+            yield sse_event("snapshot", {
+                "available_slots": available,
+                "service_duration": service_duration
+            })
+
+            while not await request.is_disconnected():
+                blocked_slots = await subscription.next_change(AVAILABILITY_STREAM_KEEPALIVE_SECONDS)
+                if blocked_slots is None:
+                    yield ": keepalive\n\n"
+                    continue
+
+                working_day = await get_working_day(db, artist_id, date)
+                current = [
+                    minutes_to_time(start)
+                    for start in available_starts(
+                        working_day,
+                        DayOccupancy.from_blocked_slots(blocked_slots),
+                        service_duration,
+                        buffer_time=10
+                    )
+                ]
+                diff = diff_slots(available, current)
+                available = current
+                if diff["added"] or diff["removed"]:
+                    yield sse_event("diff", diff)
+        finally:
+            availability_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+MAX_NEXT_AVAILABLE_RESULTS = 20
+
+
+@api_router.get("/appointments/next-available")
+async def get_next_available(
+    service_id: str,
+    from_date: Optional[str] = None,
+    from_time: Optional[str] = None,
+    artist_id: Optional[str] = None,
+    limit: int = 3
+):
+    """
+    Find the next free appointments for a service
+
+    Query Parameters:
+        - service_id: Service ID (to get duration)
+        - from_date: Optional start date in YYYY-MM-DD format (default today)
+        - from_time: Optional earliest time on from_date in HH:MM format
+        - artist_id: Optional, defaults to all active artists
+        - limit: Number of slots to return (default 3, max 20)
+
+    Returns:
+        {
+            "success": true,
+            "service_duration": 45,
+            "slots": [
+                {"date": "2025-11-15", "time": "09:00", "artist_id": "...", "artist_name": "..."}
+            ]
+        }
+    """
+    if limit < 1 or limit > MAX_NEXT_AVAILABLE_RESULTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {MAX_NEXT_AVAILABLE_RESULTS}"
+        )
+
+    start_date = from_date or datetime.now().strftime("%Y-%m-%d")
+    try:
+        datetime.strptime(start_date, "%Y-%m-%d")
+        if from_time:
+            datetime.strptime(from_time, "%H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date or time format")
+
+    try:
+        service = await db.services.find_one({"id": service_id}, {"_id": 0, "duration": 1})
+        if not service:
+            raise HTTPException(status_code=404, detail="Service not found")
+        service_duration = parse_duration(service.get("duration", "60 min"))
+
+        artist_query = {"id": artist_id} if artist_id else {"active": True}
+        artists = await db.artists.find(artist_query, {"_id": 0, "id": 1, "name": 1}).to_list(1000)
+        if artist_id and not artists:
+            raise HTTPException(status_code=404, detail="Artist not found")
+        artist_names = {artist["id"]: artist.get("name", "") for artist in artists}
+
+        slots = await find_next_available(
+            db,
+            list(artist_names),
+            service_duration,
+            start_date,
+            start_minutes=time_to_minutes(from_time) if from_time else 0,
+            limit=limit,
+            buffer_time=10
+        )
+        for slot in slots:
+            slot["artist_name"] = artist_names[slot["artist_id"]]
+
+        return {
+            "success": True,
+            "service_duration": service_duration,
+            "slots": slots
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error finding next available slot: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to find next available slot: {str(e)}"
+        )
+
+class SlotHoldCreate(BaseModel):
+    """Request model for holding a slot during checkout"""
+    artist_id: str
+    date: str
+    time: str
+    service_id: str
+
+
+@api_router.post("/appointments/holds")
+async def create_slot_hold(input: SlotHoldCreate):
+    """
+    Hold a time slot for a few minutes while the customer fills in the form
+
+    Body:
+        {"artist_id": "...", "date": "2025-11-15", "time": "14:00", "service_id": "..."}
+
+    Returns:
+        {"success": true, "hold_id": "...", "expires_at": "2025-11-15T13:05:00+00:00"}
+
+    Pass hold_id to POST /appointments to convert the hold into the booking.
+    Expired holds are removed by a MongoDB TTL index.
+    """
+    is_valid, error_msg = is_valid_booking_date(input.date)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+    try:
+        datetime.strptime(input.time, "%H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid time format. Use HH:MM")
+
+    service = await db.services.find_one({"id": input.service_id}, {"_id": 0, "duration": 1})
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+
+    timing = compute_appointment_timing(input.time, service.get("duration"))
+    await ensure_within_working_hours(
+        input.artist_id,
+        input.date,
+        timing["start_minutes"],
+        timing["duration_minutes"]
+    )
+    hold = {
+        "id": str(uuid.uuid4()),
+        "artist_id": input.artist_id,
+        "appointment_date": input.date,
+        "appointment_time": input.time,
+        "service_id": input.service_id,
+        **timing,
+        "created_at": datetime.now(timezone.utc),
+        "expires_at": datetime.now(timezone.utc) + timedelta(minutes=HOLD_TTL_MINUTES)
+    }
+
+    try:
+        await place_hold(db, hold, buffer_time=10)
+    except SlotTakenError:
+        raise await slot_taken_exception(input.artist_id, input.date, timing["duration_minutes"])
+    await availability_changed(input.artist_id, input.date)
+
+    return {
+        "success": True,
+        "hold_id": hold["id"],
+        "expires_at": hold["expires_at"].isoformat()
+    }
+
+
+@api_router.delete("/appointments/holds/{hold_id}")
+async def delete_slot_hold(hold_id: str):
+    """Release a checkout hold early (e.g. customer picked another slot)"""
+    hold = await release_hold(db, hold_id)
+    if hold is None:
+        raise HTTPException(status_code=404, detail="Hold not found or already expired")
+    await availability_changed(hold["artist_id"], hold["appointment_date"])
+    return {"success": True, "message": "Hold released"}
+
+MAX_COMBO_ITEMS = 4
+MAX_COMBO_PLACEMENTS = 20
+
+
+class ComboItem(BaseModel):
+    """One service of a combo booking"""
+    service_id: str
+    artist_id: Optional[str] = None  # None = any active artist
+    guest: int = 0  # Services of the same guest run back to back, guests in parallel
+
+    @validator('guest')
+    def validate_guest(cls, v):
+        if v < 0 or v >= MAX_COMBO_ITEMS:
+            raise ValueError(f'guest must be between 0 and {MAX_COMBO_ITEMS - 1}')
+        return v
+
+
+class ComboAvailabilityRequest(BaseModel):
+    """Request model for combo (multi-service) availability"""
+    date: str
+    items: List[ComboItem]
+    from_time: Optional[str] = None
+    limit: int = 10
+
+    @validator('items')
+    def validate_items(cls, v):
+        if not v or len(v) > MAX_COMBO_ITEMS:
+            raise ValueError(f'A combo needs between 1 and {MAX_COMBO_ITEMS} services')
+        return v
+
+
+async def resolve_combo_items(items: List[Dict]) -> List[Dict]:
+    """
+    Attach durations and candidate artists to combo items
+
+    Services and active artists are loaded with one query each.
+
+    Args:
+        items: [{"service_id": "...", "artist_id": None, "guest": 0}]
+
+    Returns:
+        [{"service_id": "...", "duration": 45, "artist_ids": [...], "guest": 0}]
+    """
+    service_ids = list({item["service_id"] for item in items})
+    services = await db.services.find(
+        {"id": {"$in": service_ids}},
+        {"_id": 0, "id": 1, "duration": 1}
+    ).to_list(None)
+    durations = {service["id"]: parse_duration(service.get("duration", "60 min")) for service in services}
+    missing = [service_id for service_id in service_ids if service_id not in durations]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Service not found: {missing[0]}")
+
+    active_artists = None
+    resolved = []
+    for item in items:
+        if item.get("artist_id"):
+            artist_ids = [item["artist_id"]]
+        else:
+            if active_artists is None:
+                artists = await db.artists.find({"active": True}, {"_id": 0, "id": 1}).to_list(1000)
+                active_artists = [artist["id"] for artist in artists]
+            artist_ids = active_artists
+        resolved.append({
+            "service_id": item["service_id"],
+            "duration": durations[item["service_id"]],
+            "artist_ids": artist_ids,
+            "guest": item.get("guest", 0)
+        })
+    return resolved
+
+
+@api_router.post("/appointments/combo/availability")
+async def get_combo_availability(request_data: ComboAvailabilityRequest):
+    """
+    Find placements for several services booked together (e.g. manicure + pedicure)
+
+    Each guest's services are placed back to back, guests start together,
+    and any artist can be chosen per service unless one is given. The
+    whole bundle is searched in one pass over the day's occupancy.
+
+    Body:
+        {
+            "date": "2025-11-15",
+            "items": [
+                {"service_id": "manicure", "artist_id": null, "guest": 0},
+                {"service_id": "pedicure", "artist_id": null, "guest": 0},
+                {"service_id": "manicure", "artist_id": null, "guest": 1}
+            ],
+            "from_time": "10:00",
+            "limit": 10
+        }
+
+    Returns:
+        {
+            "success": true,
+            "date": "2025-11-15",
+            "placements": [
+                {
+                    "start_time": "10:00",
+                    "end_time": "11:45",
+                    "appointments": [
+                        {"service_id": "...", "artist_id": "...", "time": "10:00",
+                         "end_time": "10:45", "duration_minutes": 45, "guest": 0},
+                        ...
+                    ]
+                }
+            ]
+        }
+
+    Book a placement with POST /appointments/combo.
+    """
+    is_valid, error_msg = is_valid_booking_date(request_data.date)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+    if request_data.limit < 1 or request_data.limit > MAX_COMBO_PLACEMENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"limit must be between 1 and {MAX_COMBO_PLACEMENTS}"
+        )
+    try:
+        if request_data.from_time:
+            datetime.strptime(request_data.from_time, "%H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid time format. Use HH:MM")
+    start_minutes = time_to_minutes(request_data.from_time) if request_data.from_time else 0
+
+    try:
+        items = await resolve_combo_items([item.model_dump() for item in request_data.items])
+        placements = await find_combo_placements(
+            db,
+            items,
+            request_data.date,
+            start_minutes=start_minutes,
+            limit=request_data.limit,
+            buffer_time=10
+        )
+        return {
+            "success": True,
+            "date": request_data.date,
+            "placements": placements
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting combo availability: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get combo availability: {str(e)}"
+        )
+
 # ============= END SMART BOOKING ROUTES =============
 
+# Newest appointment dates first; id breaks ties so the cursor is unique
+APPOINTMENT_LIST_SORT = [("appointment_date", -1), ("appointment_time", -1), ("id", -1)]
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Expose the next page's cursor; the header is absent on the last page"""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def appointment_list_query(
+    status: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None
+) -> dict:
+    """Filters shared by the appointment list endpoints"""
+    query = {}
+    if status:
+        statuses = [value.strip() for value in status.split(",") if value.strip()]
+        query["status"] = statuses[0] if len(statuses) == 1 else {"$in": statuses}
+    date_filter = {}
+    for op, value in (("$gte", from_date), ("$lte", to_date)):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+            date_filter[op] = value
+    if date_filter:
+        query["appointment_date"] = date_filter
+    return query
+
+
+async def fetch_list_page(collection, query: dict, sort: list, limit: Optional[int], cursor: Optional[str], projection: dict):
+    """fetch_page() with an invalid cursor reported as 400"""
+    try:
+        return await fetch_page(collection, query, sort, limit, cursor, projection)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 # Get All Appointments
 @api_router.get("/appointments", response_model=List[Appointment])
-async def get_appointments():
-    appointments = await db.appointments.find({}, {"_id": 0}).to_list(1000)
+async def get_appointments(
+    response: Response,
+    status: Optional[str] = None,
+    artist_id: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """
+    Appointments, newest date first, one page at a time
+
+    Query Parameters:
+        - status: Status or comma-separated statuses, e.g. "pending,confirmed"
+        - artist_id: Only this artist's appointments
+        - from_date / to_date: Appointment date range (YYYY-MM-DD, inclusive)
+        - limit: Page size (default and max 1000)
+        - cursor: Value of the X-Next-Cursor header of the previous page
+
+    The response body is the page's list; X-Next-Cursor is set when
+    more appointments follow.
+    """
+    query = appointment_list_query(status, from_date, to_date)
+    if artist_id:
+        query["artist_id"] = artist_id
+    appointments, next_cursor = await fetch_list_page(
+        db.appointments, query, APPOINTMENT_LIST_SORT, limit, cursor, {"_id": 0}
+    )
+    set_next_cursor(response, next_cursor)
     
-    # Populate service and artist details
     for appt in appointments:
         if isinstance(appt.get('created_at'), str):
             appt['created_at'] = datetime.fromisoformat(appt['created_at'])
-        
-        # Get service details
-        if appt.get('service_id'):
-            service = await db.services.find_one({"id": appt['service_id']}, {"_id": 0})
-            if service:
-                appt['service_name_en'] = service.get('name_en', '')
-                appt['service_name_de'] = service.get('name_de', '')
-                appt['service_name_fr'] = service.get('name_fr', '')
-                appt['service_duration'] = service.get('duration', '')
-        
-        # Get artist details
-        if appt.get('artist_id'):
-            artist = await db.artists.find_one({"id": appt['artist_id']}, {"_id": 0})
-            if artist:
-                appt['artist_name'] = artist.get('name', '')
+    
+    # Populate service and artist details (one $in query per collection)
+    await AppointmentDetailsLoader(db).enrich(appointments)
     
     return appointments
 
@@ -918,6 +1630,185 @@ async def get_appointment(appointment_id: str):
         appointment['created_at'] = datetime.fromisoformat(appointment['created_at'])
     return appointment
 
+async def ensure_appointment_timing(appointment: dict) -> dict:
+    """Fill in timing fields for legacy appointments that predate them"""
+    if appointment.get("duration_minutes") is None:
+        service = await db.services.find_one({"id": appointment.get("service_id")}, {"_id": 0, "duration": 1})
+        appointment.update(compute_appointment_timing(
+            appointment["appointment_time"],
+            service.get("duration") if service else None
+        ))
+    return appointment
+
+
+async def update_schedule_documents(previous: Optional[dict], current: Optional[dict]):
+    """Materialized schedules collection (rebuild_schedules.py repairs drift)"""
+    for appointment in (previous, current):
+        if appointment and appointment.get("status") in BLOCKING_STATUSES:
+            await ensure_appointment_timing(appointment)
+    await sync_appointment_schedule(db, previous, current)
+
+
+async def invalidate_appointment_caches(previous: Optional[dict], current: Optional[dict]):
+    """Cached availability, admin stats and calendar feeds of the affected artist-days"""
+    admin_stats_cache.invalidate()
+    for artist_id, date in affected_days(previous, current):
+        availability_cache.invalidate(artist_id, date)
+        calendar_feeds.invalidate(artist_id)
+
+
+async def update_user_stats(previous: Optional[dict], current: Optional[dict]):
+    """Per-user booking counters (reconciled nightly)"""
+    await apply_appointment_change(db, previous, current)
+
+
+async def publish_availability(previous: Optional[dict], current: Optional[dict]):
+    """Push the new occupancy to open availability streams"""
+    for artist_id, date in affected_days(previous, current):
+        await publish_availability_change(artist_id, date)
+
+
+async def update_analytics(previous: Optional[dict], current: Optional[dict]):
+    """Daily analytics rollups (reconciled nightly)"""
+    await apply_appointment_rollup(db, previous, current)
+
+
+async def offer_freed_time(previous: Optional[dict], current: Optional[dict]):
+    """Offer time given up by a cancellation, deletion or move to the waitlist"""
+    if frees_time(previous, current):
+        await match_freed_slot(
+            db,
+            notification_service,
+            previous["artist_id"],
+            previous["appointment_date"],
+            previous["start_minutes"],
+            previous["end_minutes"]
+        )
+
+
+# Awaited in order before the request returns
+APPOINTMENT_WRITE_HOOKS = [
+    ("schedule", update_schedule_documents),
+    ("caches", invalidate_appointment_caches),
+    ("user stats", update_user_stats),
+]
+
+# Run after the response in a background task
+APPOINTMENT_BACKGROUND_HOOKS = [
+    ("availability streams", publish_availability),
+    ("analytics", update_analytics),
+    ("waitlist", offer_freed_time),
+]
+
+# Background hook runs still in progress; kept so they are not garbage collected
+_pending_appointment_hooks: Set[asyncio.Task] = set()
+
+
+def affected_days(previous: Optional[dict], current: Optional[dict]) -> set:
+    """(artist_id, date) pairs an appointment write touched"""
+    return {
+        (appointment["artist_id"], appointment["appointment_date"])
+        for appointment in (previous, current) if appointment
+    }
+
+
+async def run_appointment_hooks(hooks: list, previous: Optional[dict], current: Optional[dict]):
+    """Run hooks one after another; a failing hook is logged and does not stop the rest"""
+    appointment_id = (current or previous)["id"]
+    for name, hook in hooks:
+        try:
+            await hook(previous, current)
+        except Exception as e:
+            logger.error(f"Error in {name} hook for appointment {appointment_id}: {str(e)}")
+
+
+async def after_appointment_write(previous: Optional[dict], current: Optional[dict]):
+    """
+    Side effects of an appointment write, run after the write succeeded
+
+    Before the response: schedule documents, caches, user stats.
+    In the background: availability streams, analytics, waitlist offers.
+    Each hook is isolated; failures are logged, never raised.
+
+    Args:
+        previous: Appointment before the write (None for a new booking)
+        current: Appointment after the write (None for a deletion)
+    """
+    await run_appointment_hooks(APPOINTMENT_WRITE_HOOKS, previous, current)
+    task = asyncio.create_task(run_appointment_hooks(APPOINTMENT_BACKGROUND_HOOKS, previous, current))
+    _pending_appointment_hooks.add(task)
+    task.add_done_callback(_pending_appointment_hooks.discard)
+
+
+def frees_time(previous: Optional[dict], current: Optional[dict]) -> bool:
+    """Whether a write gave up the time range `previous` was blocking"""
+    if not previous or previous.get("status") not in BLOCKING_STATUSES or previous.get("start_minutes") is None:
+        return False
+    if not current or current.get("status") not in BLOCKING_STATUSES:
+        return True
+    return any(
+        current.get(field) != previous.get(field)
+        for field in ("artist_id", "appointment_date", "start_minutes", "end_minutes")
+    )
+
+
+async def availability_changed(artist_id: str, date: str):
+    """Drop cached availability of an artist-day and push the change to open streams"""
+    availability_cache.invalidate(artist_id, date)
+    await publish_availability_change(artist_id, date)
+
+
+async def publish_availability_change(artist_id: str, date: str):
+    """Push an artist-day's current occupancy to its open availability streams"""
+    if not availability_broker.has_subscribers(artist_id, date):
+        return
+    try:
+        # One read per write, however many booking pages are watching
+        blocked_slots = await get_schedule_blocked_slots(db, artist_id, date)
+        availability_broker.publish(artist_id, date, blocked_slots)
+    except Exception as e:
+        logger.error(f"Error publishing availability for {artist_id} {date}: {str(e)}")
+
+
+async def ensure_within_working_hours(artist_id: str, date: str, start_minutes: int, duration_minutes: int):
+    """Reject bookings outside the artist's compiled working hours"""
+    working_day = await get_working_day(db, artist_id, date)
+    if not working_day.contains(start_minutes, duration_minutes):
+        raise HTTPException(
+            status_code=400,
+            detail="Appointment time is outside the artist's working hours"
+        )
+
+
+async def slot_taken_exception(
+    artist_id: str,
+    date: str,
+    duration_minutes: int,
+    exclude_appointment_id: Optional[str] = None
+) -> HTTPException:
+    """Build the 409 returned when a slot is taken, with alternatives for that day"""
+    alternative_slots, _ = await get_available_slots(
+        db,
+        artist_id,
+        date,
+        duration_minutes,
+        buffer_time=10,
+        exclude_appointment_id=exclude_appointment_id
+    )
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "This time slot is no longer available",
+            "alternative_slots": alternative_slots
+        }
+    )
+
+
+async def get_claim_ids(appointment_id: str) -> List[str]:
+    """Claim ids currently held by an appointment"""
+    claims = await db.slot_claims.find({"owner": appointment_id}, {"_id": 1}).to_list(None)
+    return [claim["_id"] for claim in claims]
+
 # Create Appointment
 @api_router.post("/appointments", response_model=Appointment)
 @limiter.limit("10/minute")  # Max 10 appointments per minute
@@ -929,14 +1820,137 @@ async def create_appointment(request: Request, input: AppointmentCreate):
     if user:
         appt_dict["user_id"] = user.id
     
+    loader = AppointmentDetailsLoader(db)
+    service = await loader.service(input.service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    appt_dict.update(compute_appointment_timing(input.appointment_time, service.get("duration")))
+    appt_dict.update(appointment_snapshot(service, await loader.artist(input.artist_id)))
+    appt_dict.update(booked_price(service))
+    
     appt_obj = Appointment(**appt_dict)
+    await ensure_within_working_hours(
+        appt_obj.artist_id,
+        appt_obj.appointment_date,
+        appt_obj.start_minutes,
+        appt_obj.duration_minutes
+    )
     doc = appt_obj.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
-    await db.appointments.insert_one(doc)
+    
+    # Claim the time range atomically; concurrent bookings for it get a 409
+    try:
+        if input.hold_id:
+            await book_from_hold(db, input.hold_id, doc, buffer_time=10)
+        else:
+            await book_appointment(db, doc, buffer_time=10)
+    except HoldMismatchError:
+        raise HTTPException(status_code=400, detail="Appointment does not match the held slot")
+    except SlotTakenError:
+        raise await slot_taken_exception(
+            appt_obj.artist_id,
+            appt_obj.appointment_date,
+            appt_obj.duration_minutes
+        )
+    await after_appointment_write(None, doc)
     
     logger.info(f"Appointment created: {appt_obj.id} by {user.email if user else appt_dict['customer_email']}")
     return appt_obj
 
+class ComboBookingCreate(BaseModel):
+    """Several appointments booked all-or-nothing (one placement from combo availability)"""
+    appointments: List[AppointmentCreate]
+
+    @validator('appointments')
+    def validate_appointments(cls, v):
+        if not v or len(v) > MAX_COMBO_ITEMS:
+            raise ValueError(f'A combo needs between 1 and {MAX_COMBO_ITEMS} appointments')
+        if len({appt.appointment_date for appt in v}) > 1:
+            raise ValueError('All appointments of a combo must be on the same date')
+        return v
+
+
+# Create Combo Booking
+@api_router.post("/appointments/combo", response_model=List[Appointment])
+@limiter.limit("10/minute")
+async def create_combo_booking(request: Request, input: ComboBookingCreate):
+    """
+    Book several services at once; either every appointment is stored or none
+
+    On a conflict the response is a 409 whose detail carries alternative
+    placements for the same services on that day.
+    """
+    user = await get_current_user(request)
+    combo_id = str(uuid.uuid4())
+
+    # Every service and artist of the combo in one query each
+    loader = AppointmentDetailsLoader(db)
+    await loader.load([appt.model_dump() for appt in input.appointments])
+
+    appt_objs = []
+    for appt in input.appointments:
+        service = await loader.service(appt.service_id)
+        if not service:
+            raise HTTPException(status_code=404, detail=f"Service not found: {appt.service_id}")
+        appt_dict = appt.model_dump()
+        appt_dict["combo_id"] = combo_id
+        if user:
+            appt_dict["user_id"] = user.id
+        appt_dict.update(compute_appointment_timing(appt.appointment_time, service.get("duration")))
+        appt_dict.update(appointment_snapshot(service, await loader.artist(appt.artist_id)))
+        appt_dict.update(booked_price(service))
+        appt_obj = Appointment(**appt_dict)
+        await ensure_within_working_hours(
+            appt_obj.artist_id,
+            appt_obj.appointment_date,
+            appt_obj.start_minutes,
+            appt_obj.duration_minutes
+        )
+        appt_objs.append(appt_obj)
+
+    docs = []
+    for appt_obj in appt_objs:
+        doc = appt_obj.model_dump()
+        doc['created_at'] = doc['created_at'].isoformat()
+        docs.append(doc)
+
+    try:
+        await book_appointments(db, docs, buffer_time=10)
+    except SlotTakenError:
+        # Same services, same artists; each customer's services form one guest chain
+        guests: Dict[str, int] = {}
+        items = [
+            {
+                "service_id": appt.service_id,
+                "artist_id": appt.artist_id,
+                "guest": guests.setdefault(f"{appt.customer_email.lower()}|{appt.customer_name.lower()}", len(guests))
+            }
+            for appt in input.appointments
+        ]
+        alternatives = await find_combo_placements(
+            db,
+            await resolve_combo_items(items),
+            appt_objs[0].appointment_date,
+            limit=5,
+            buffer_time=10
+        )
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "One of the selected time slots is no longer available",
+                "alternative_placements": alternatives
+            }
+        )
+
+    for doc in docs:
+        await after_appointment_write(None, doc)
+
+    logger.info(
+        f"Combo booking created: {combo_id} ({len(appt_objs)} appointments) "
+        f"by {user.email if user else appt_objs[0].customer_email}"
+    )
+    return appt_objs
+
 # Artist Routes with Auto-Translation
 @api_router.get("/artists", response_model=List[Artist])
 async def get_artists(admin: bool = False):
@@ -987,33 +2001,34 @@ async def create_artist(input: ArtistCreate):
 # ============= USER-SPECIFIC ROUTES =============
 
 @api_router.get("/user/appointments", response_model=List[Appointment])
-async def get_user_appointments(request: Request):
+async def get_user_appointments(
+    request: Request,
+    response: Response,
+    status: Optional[str] = None,
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
     """
-    Get all appointments for the authenticated user
+    Get the authenticated user's appointments, newest date first
+
+    Same filters and paging as GET /appointments (X-Next-Cursor header).
     """
     user = await require_user(request)
     
-    appointments = await db.appointments.find({"user_id": user.id}, {"_id": 0}).to_list(1000)
+    query = {"user_id": user.id, **appointment_list_query(status, from_date, to_date)}
+    appointments, next_cursor = await fetch_list_page(
+        db.appointments, query, APPOINTMENT_LIST_SORT, limit, cursor, {"_id": 0}
+    )
+    set_next_cursor(response, next_cursor)
     
-    # Populate service and artist details
     for appt in appointments:
         if isinstance(appt.get('created_at'), str):
             appt['created_at'] = datetime.fromisoformat(appt['created_at'])
-        
-        # Get service details
-        if appt.get('service_id'):
-            service = await db.services.find_one({"id": appt['service_id']}, {"_id": 0})
-            if service:
-                appt['service_name_en'] = service.get('name_en', '')
-                appt['service_name_de'] = service.get('name_de', '')
-                appt['service_name_fr'] = service.get('name_fr', '')
-                appt['service_duration'] = service.get('duration', '')
-        
-        # Get artist details
-        if appt.get('artist_id'):
-            artist = await db.artists.find_one({"id": appt['artist_id']}, {"_id": 0})
-            if artist:
-                appt['artist_name'] = artist.get('name', '')
+    
+    # Populate service and artist details (one $in query per collection)
+    await AppointmentDetailsLoader(db).enrich(appointments)
     
     return appointments
 
@@ -1024,33 +2039,8 @@ async def get_user_stats(request: Request):
     """
     user = await require_user(request)
     
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    
-    # Calculate stats
-    total_appointments = await db.appointments.count_documents({"user_id": user.id})
-    
-    upcoming_appointments = await db.appointments.count_documents({
-        "user_id": user.id,
-        "status": {"$in": ["pending", "confirmed"]},
-        "appointment_date": {"$gte": today}
-    })
-    
-    completed_appointments = await db.appointments.count_documents({
-        "user_id": user.id,
-        "status": "completed"
-    })
-    
-    cancelled_appointments = await db.appointments.count_documents({
-        "user_id": user.id,
-        "status": "cancelled"
-    })
-    
-    return {
-        "total_appointments": total_appointments,
-        "upcoming_appointments": upcoming_appointments,
-        "completed_appointments": completed_appointments,
-        "cancelled_appointments": cancelled_appointments
-    }
+    # Materialized counters: one point read on user_stats
+    return await read_user_stats(db, user.id)
 
 
 @api_router.post("/user/appointments/{appointment_id}/cancel")
@@ -1078,16 +2068,26 @@ async def cancel_user_appointment(appointment_id: str, request: Request):
             detail="Cannot cancel this appointment. Only pending or confirmed appointments can be cancelled."
         )
     
-    # Update status to cancelled
-    await db.appointments.update_one(
-        {"id": appointment_id},
-        {"$set": {"status": "cancelled"}}
+    # Update status to cancelled, only if nobody changed it since we read it
+    # (a second cancel must not count the cancellation twice)
+    previous = await db.appointments.find_one_and_update(
+        {"id": appointment_id, "status": appointment["status"]},
+        {"$set": {"status": "cancelled"}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
     )
+    if previous is None:
+        raise HTTPException(
+            status_code=409,
+            detail="Appointment was changed by another request. Please reload and try again."
+        )
+    await release_claims(db, appointment_id)
+    await after_appointment_write(previous, {**previous, "status": "cancelled"})
     
     # Send notification to user
     try:
-        service = await db.services.find_one({"id": appointment["service_id"]}, {"_id": 0})
-        service_name = service.get("name_de", "Ihr Service") if service else "Ihr Service"
+        details = await AppointmentDetailsLoader(db).snapshot(appointment)
+        service_name = details["service_name_de"] or "Ihr Service"
         
         title_text = "Termin storniert"
         message_text = (
@@ -1119,13 +2119,8 @@ async def get_user_profile(request: Request):
     """
     user = await require_user(request)
     
-    # Get user's appointment stats
-    total_appointments = await db.appointments.count_documents({"user_id": user.id})
-    upcoming_appointments = await db.appointments.count_documents({
-        "user_id": user.id,
-        "status": {"$in": ["pending", "confirmed"]},
-        "appointment_date": {"$gte": datetime.now(timezone.utc).strftime("%Y-%m-%d")}
-    })
+    # Get user's appointment stats (materialized counters)
+    stats = await read_user_stats(db, user.id)
     
     return {
         "id": user.id,
@@ -1134,8 +2129,8 @@ async def get_user_profile(request: Request):
         "profile_picture": user.profile_picture,
         "created_at": user.created_at.isoformat(),
         "stats": {
-            "total_appointments": total_appointments,
-            "upcoming_appointments": upcoming_appointments
+            "total_appointments": stats["total_appointments"],
+            "upcoming_appointments": stats["upcoming_appointments"]
         }
     }
 
@@ -1182,7 +2177,204 @@ async def update_user_profile(request: Request):
         logger.error(f"Error updating profile: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to update profile")
 
-# ============= END USER-SPECIFIC ROUTES =============
+# ============= END USER-SPECIFIC ROUTES =============
+
+# ============= WAITLIST ROUTES =============
+
+MAX_WAITLIST_WINDOWS = 14
+
+
+class WaitlistWindow(BaseModel):
+    """A date and time range the customer could come in"""
+    date: str
+    start: str
+    end: str
+
+    @validator('date')
+    def validate_date(cls, v):
+        is_valid, error_msg = is_valid_booking_date(v)
+        if not is_valid:
+            raise ValueError(error_msg)
+        return v
+
+    @validator('start', 'end')
+    def validate_time(cls, v):
+        try:
+            datetime.strptime(v, '%H:%M')
+        except ValueError:
+            raise ValueError('Invalid time format. Use HH:MM')
+        return v
+
+    @validator('end')
+    def validate_range(cls, v, values):
+        if 'start' in values and time_to_minutes(v) <= time_to_minutes(values['start']):
+            raise ValueError('end must be after start')
+        return v
+
+
+class WaitlistCreate(BaseModel):
+    service_id: str
+    artist_ids: List[str] = []  # Empty = any artist
+    windows: List[WaitlistWindow]
+
+    @validator('windows')
+    def validate_windows(cls, v):
+        if not v or len(v) > MAX_WAITLIST_WINDOWS:
+            raise ValueError(f'Between 1 and {MAX_WAITLIST_WINDOWS} windows are required')
+        return v
+
+
+@api_router.post("/waitlist")
+async def join_waitlist(input: WaitlistCreate, request: Request):
+    """
+    Join the waitlist for a service (requires login, notifications are in-app)
+
+    Body:
+        {
+            "service_id": "...",
+            "artist_ids": ["..."],  # empty = any artist
+            "windows": [{"date": "2025-11-15", "start": "14:00", "end": "18:00"}]
+        }
+
+    When a cancellation frees time that fits a window, the longest-waiting
+    matching customers get a notification with the offered slot.
+    """
+    user = await require_user(request)
+
+    service = await db.services.find_one({"id": input.service_id}, {"_id": 0, "duration": 1, "name_de": 1})
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+
+    windows = [window.model_dump() for window in input.windows]
+    entry = {
+        "id": str(uuid.uuid4()),
+        "user_id": user.id,
+        "service_id": input.service_id,
+        "service_name": service.get("name_de", ""),
+        "duration_minutes": parse_duration(service.get("duration", "60 min")),
+        "artist_ids": input.artist_ids,
+        "windows": windows,
+        "match_keys": waitlist_match_keys(input.artist_ids, windows),
+        "status": "waiting",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "expires_at": waitlist_expiry(windows)
+    }
+    await db.waitlist_entries.insert_one(entry)
+    logger.info(f"User {user.id} joined waitlist for {input.service_id} ({len(windows)} windows)")
+
+    entry.pop("_id", None)
+    entry["expires_at"] = entry["expires_at"].isoformat()
+    return entry
+
+
+@api_router.get("/user/waitlist")
+async def get_user_waitlist(request: Request):
+    """The current user's waitlist entries, newest first"""
+    user = await require_user(request)
+    entries = await db.waitlist_entries.find(
+        {"user_id": user.id},
+        {"_id": 0, "match_keys": 0}
+    ).sort("created_at", -1).to_list(100)
+    for entry in entries:
+        if isinstance(entry.get("expires_at"), datetime):
+            entry["expires_at"] = entry["expires_at"].isoformat()
+    return entries
+
+
+@api_router.delete("/user/waitlist/{entry_id}")
+async def leave_waitlist(entry_id: str, request: Request):
+    """Remove one of the current user's waitlist entries"""
+    user = await require_user(request)
+    result = await db.waitlist_entries.delete_one({"id": entry_id, "user_id": user.id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    return {"success": True, "message": "Removed from waitlist"}
+
+# ============= END WAITLIST ROUTES =============
+
+# ============= CALENDAR FEED ROUTES =============
+
+CALENDAR_FEED_TOKEN = os.environ.get('CALENDAR_FEED_TOKEN')
+
+
+def calendar_feed_response(request: Request, feed: dict) -> Response:
+    """Serve a rendered feed, or 304 if the client's copy is current"""
+    headers = {
+        "ETag": feed["etag"],
+        "Last-Modified": format_datetime(feed["last_modified"], usegmt=True),
+        "Cache-Control": "private, max-age=300"
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        if "*" in tags or feed["etag"] in tags:
+            return Response(status_code=304, headers=headers)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                if parsedate_to_datetime(if_modified_since) >= feed["last_modified"]:
+                    return Response(status_code=304, headers=headers)
+            except (TypeError, ValueError):
+                pass  # Unparseable date: serve the full feed
+
+    return Response(content=feed["body"], media_type="text/calendar; charset=utf-8", headers=headers)
+
+
+def check_feed_token(token: Optional[str]):
+    """
+    Calendar apps cannot log in, so feeds are protected by a shared token
+
+    Feeds contain customer names and are disabled (404) until
+    CALENDAR_FEED_TOKEN is set.
+    """
+    if not CALENDAR_FEED_TOKEN:
+        raise HTTPException(status_code=404, detail="Calendar feeds are not enabled")
+    if not hmac.compare_digest(token or "", CALENDAR_FEED_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid calendar token")
+
+
+@api_router.get("/calendar/salon.ics")
+async def get_salon_calendar(request: Request, token: Optional[str] = None):
+    """
+    iCalendar feed of all artists' bookings (without customer phone numbers or notes)
+
+    Covers the last 30 and next 180 days. Supports ETag / If-None-Match and
+    Last-Modified / If-Modified-Since: unchanged polls get 304 straight from
+    memory.
+
+    Query Parameters:
+        - token: Must match CALENDAR_FEED_TOKEN (feeds are off while it is unset)
+    """
+    check_feed_token(token)
+    try:
+        feed = await calendar_feeds.get_or_render(SALON_FEED, lambda: build_feed(db))
+    except Exception as e:
+        logger.error(f"Error rendering salon calendar: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to render calendar")
+    return calendar_feed_response(request, feed)
+
+
+@api_router.get("/calendar/artists/{artist_id}.ics")
+async def get_artist_calendar(artist_id: str, request: Request, token: Optional[str] = None):
+    """
+    iCalendar feed of one artist's bookings (see /calendar/salon.ics)
+
+    Query Parameters:
+        - token: Must match CALENDAR_FEED_TOKEN (feeds are off while it is unset)
+    """
+    check_feed_token(token)
+    try:
+        feed = await calendar_feeds.get_or_render(artist_id, lambda: build_feed(db, artist_id))
+    except Exception as e:
+        logger.error(f"Error rendering calendar for artist {artist_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to render calendar")
+    if feed is None:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    return calendar_feed_response(request, feed)
+
+# ============= END CALENDAR FEED ROUTES =============
 
 # ============= NOTIFICATION ROUTES =============
 
@@ -1246,15 +2438,34 @@ async def delete_notification(notification_id: str, request: Request):
 # ============= END NOTIFICATION ROUTES =============
 
 # Gallery Routes with Auto-Translation
+RECENT_FIRST_SORT = [("created_at", -1), ("id", -1)]
+
 @api_router.get("/gallery", response_model=List[GalleryItem])
-async def get_gallery_items(style: Optional[str] = None, color: Optional[str] = None):
+async def get_gallery_items(
+    response: Response,
+    style: Optional[str] = None,
+    color: Optional[str] = None,
+    artist: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """
+    Gallery items, newest first (paged like GET /appointments, X-Next-Cursor header)
+
+    Query Parameters:
+        - style / color / artist: Filters (artist = artist_name)
+        - limit, cursor: Paging
+    """
     query = {}
     if style:
         query["style"] = style
     if color:
         query["colors"] = color
+    if artist:
+        query["artist_name"] = artist
     
-    items = await db.gallery.find(query, {"_id": 0}).to_list(1000)
+    items, next_cursor = await fetch_list_page(db.gallery, query, RECENT_FIRST_SORT, limit, cursor, {"_id": 0})
+    set_next_cursor(response, next_cursor)
     for item in items:
         if isinstance(item.get('created_at'), str):
             item['created_at'] = datetime.fromisoformat(item['created_at'])
@@ -1278,6 +2489,7 @@ async def create_gallery_item(input: GalleryItemCreate):
     doc = item_obj.model_dump()
     doc['created_at'] = doc['created_at'].isoformat()
     await db.gallery.insert_one(doc)
+    admin_stats_cache.invalidate()
     return item_obj
 
 # Contact Routes
@@ -1300,11 +2512,22 @@ async def create_contact_message(input: ContactMessageCreate, request: Request):
     await db.contact_messages.insert_one(doc)
     
     logger.info(f"Contact message received from: {msg_obj.email}")
+    admin_stats_cache.invalidate()
     return msg_obj
 
 @api_router.get("/contact", response_model=List[ContactMessage])
-async def get_contact_messages():
-    messages = await db.contact_messages.find({}, {"_id": 0}).to_list(1000)
+async def get_contact_messages(
+    response: Response,
+    email: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """Contact messages, newest first (paged, X-Next-Cursor header); optional sender email filter"""
+    query = {"email": email} if email else {}
+    messages, next_cursor = await fetch_list_page(
+        db.contact_messages, query, RECENT_FIRST_SORT, limit, cursor, {"_id": 0}
+    )
+    set_next_cursor(response, next_cursor)
     for msg in messages:
         if isinstance(msg.get('created_at'), str):
             msg['created_at'] = datetime.fromisoformat(msg['created_at'])
@@ -1315,6 +2538,7 @@ async def delete_contact_message(message_id: str):
     result = await db.contact_messages.delete_one({"id": message_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Message not found")
+    admin_stats_cache.invalidate()
     return {"message": "Message deleted successfully"}
 
 @api_router.post("/admin/contact/{message_id}/send-notification")
@@ -1395,6 +2619,11 @@ class AdminStats(BaseModel):
     total_messages: int
     pending_appointments: int
     confirmed_appointments: int
+    completed_appointments: int = 0
+    cancelled_appointments: int = 0
+    today_appointments: int = 0
+    week_revenue: float = 0.0  # Completed appointments this week (Mon-Sun), at their booked prices
+    no_shows: int = 0  # Past appointments still pending/confirmed
 
 # Admin Authentication (Simple - for MVP)
 ADMIN_USERNAME = "admin"
@@ -1416,21 +2645,400 @@ async def admin_logout():
 
 @api_router.get("/admin/stats", response_model=AdminStats)
 async def get_admin_stats():
-    total_appointments = await db.appointments.count_documents({})
-    total_services = await db.services.count_documents({})
-    total_gallery = await db.gallery.count_documents({})
-    total_messages = await db.contact_messages.count_documents({})
-    pending_appointments = await db.appointments.count_documents({"status": "pending"})
-    confirmed_appointments = await db.appointments.count_documents({"status": "confirmed"})
-    
-    return AdminStats(
-        total_appointments=total_appointments,
-        total_services=total_services,
-        total_gallery_items=total_gallery,
-        total_messages=total_messages,
-        pending_appointments=pending_appointments,
-        confirmed_appointments=confirmed_appointments
-    )
+    """
+    Admin dashboard figures
+
+    Appointment figures come from one $facet aggregation, collection totals
+    from estimated counts; the result is cached for a few seconds and
+    dropped on writes.
+    """
+    try:
+        stats = await admin_stats_cache.get_or_compute(lambda: compute_admin_stats(db))
+    except Exception as e:
+        logger.error(f"Error computing admin stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to compute stats")
+    return AdminStats(**stats)
+
+@api_router.get("/admin/availability-cache")
+async def get_availability_cache_stats():
+    """
+    Availability cache counters (for sizing AVAILABILITY_CACHE_SIZE / TTL)
+    and live availability stream counters
+
+    Returns:
+        {"size": 812, "max_size": 2048, "ttl_seconds": 10, "hits": 15230,
+         "misses": 2011, "coalesced": 388, "evictions": 0, "expirations": 1650,
+         "invalidations": 96, "inflight": 0, "hit_rate": 0.8897,
+         "streams": {"subscriptions": 14, "artist_days": 9, "published": 310, "delivered": 512},
+         "calendar_feeds": {"feeds": 6, "hits": 4120, "renders": 85, "invalidations": 79}}
+    """
+    return {
+        **availability_cache.stats(),
+        "streams": availability_broker.stats(),
+        "calendar_feeds": calendar_feeds.stats()
+    }
+
+MAX_UTILIZATION_RANGE_DAYS = 366
+
+
+@api_router.get("/admin/analytics/utilization")
+async def get_utilization_analytics(start_date: str, end_date: str, artist_id: Optional[str] = None):
+    """
+    Chair utilization heatmap for a date range (booked minutes / working minutes)
+
+    Query Parameters:
+        - start_date: First date in YYYY-MM-DD format
+        - end_date: Last date in YYYY-MM-DD format (inclusive, max 366 days)
+        - artist_id: Optional, defaults to all artists
+
+    Returns:
+        {
+            "success": true,
+            "start_date": "2025-01-01",
+            "end_date": "2025-12-31",
+            "slot_minutes": 15,
+            "overall": {"booked_hours": 1520.5, "working_hours": 2600.0, "utilization": 0.5848},
+            "artists": [{"artist_id": "...", "artist_name": "...", "utilization": 0.61, ...}],
+            "weekdays": [{"weekday": 0, "utilization": 0.52}, ...],   # 0 = Monday
+            "hours": [{"hour": 9, "utilization": 0.31}, ...],
+            "heatmap": {"weekdays": [0, ...], "hours": [9, ...], "utilization": [[0.3, ...], ...]},
+            "busiest_slots": [{"weekday": 4, "time": "17:00", "utilization": 0.97}, ...],
+            "emptiest_slots": [{"weekday": 0, "time": "09:00", "utilization": 0.05}, ...]
+        }
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if end < start or (end - start).days >= MAX_UTILIZATION_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"end_date must be on or after start_date and within {MAX_UTILIZATION_RANGE_DAYS} days"
+        )
+
+    try:
+        artist_query = {"id": artist_id} if artist_id else {}
+        artists = await db.artists.find(artist_query, {"_id": 0, "id": 1, "name": 1}).to_list(1000)
+        if artist_id and not artists:
+            raise HTTPException(status_code=404, detail="Artist not found")
+        artist_ids = [artist["id"] for artist in artists]
+
+        tensor = await build_occupancy_tensor(db, artist_ids, start_date, end_date)
+        # Pure NumPy work; keep it off the event loop
+        summary = await asyncio.get_running_loop().run_in_executor(
+            None, summarize_utilization, tensor, artist_ids
+        )
+        for artist, row in zip(artists, summary["artists"]):
+            row["artist_name"] = artist.get("name", "")
+
+        return {
+            "success": True,
+            "start_date": start_date,
+            "end_date": end_date,
+            "slot_minutes": SLOT_MINUTES,
+            **summary
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error computing utilization analytics: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to compute utilization analytics: {str(e)}"
+        )
+
+MAX_ANALYTICS_RANGE_DAYS = 731
+
+
+@api_router.get("/admin/analytics/daily")
+async def get_daily_analytics(
+    start_date: str,
+    end_date: str,
+    group_by: str = "day",
+    artist_id: Optional[str] = None,
+    service_id: Optional[str] = None,
+    category: Optional[str] = None
+):
+    """
+    Bookings and revenue per day, read from the analytics_daily rollups
+
+    Query Parameters:
+        - start_date: First date in YYYY-MM-DD format
+        - end_date: Last date in YYYY-MM-DD format (inclusive, max 731 days)
+        - group_by: day (one series), artist, service or category
+        - artist_id / service_id / category: Optional filters
+
+    Returns:
+        {
+            "success": true,
+            "start_date": "2025-01-01",
+            "end_date": "2025-01-31",
+            "group_by": "artist",
+            "totals": {"bookings": 412, "completed": 380, "cancelled": 21, "revenue": 17100.0, "expected_revenue": 17595.0},
+            "series": [
+                {"key": "<artist_id>", "label": "Anna", "totals": {...},
+                 "points": [{"date": "2025-01-02", "bookings": 9, "completed": 8, ...}, ...]}
+            ]
+        }
+        Days without bookings are omitted from "points". Revenue is at the
+        price each appointment was booked for.
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if end < start or (end - start).days >= MAX_ANALYTICS_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"end_date must be on or after start_date and within {MAX_ANALYTICS_RANGE_DAYS} days"
+        )
+    if group_by not in GROUP_BY_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid group_by. Must be one of: {list(GROUP_BY_FIELDS)}"
+        )
+
+    try:
+        filters = {
+            field: value
+            for field, value in (("artist_id", artist_id), ("service_id", service_id), ("category", category))
+            if value
+        }
+        series = await query_rollups(db, start_date, end_date, group_by, filters)
+
+        loader = AppointmentDetailsLoader(db)
+        for entry in series:
+            if group_by == "artist":
+                entry["label"] = ((await loader.artist(entry["key"])) or {}).get("name", "")
+            elif group_by == "service":
+                entry["label"] = ((await loader.service(entry["key"])) or {}).get("name_de", "")
+            else:
+                entry["label"] = entry["key"] or ""
+
+        totals = {
+            metric: round(sum(entry["totals"][metric] for entry in series), 2)
+            for metric in METRICS
+        }
+        return {
+            "success": True,
+            "start_date": start_date,
+            "end_date": end_date,
+            "group_by": group_by,
+            "totals": totals,
+            "series": series
+        }
+
+    except Exception as e:
+        logger.error(f"Error reading daily analytics: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to read daily analytics: {str(e)}"
+        )
+
+SCHEDULE_BOARD_STATUSES = ["pending", "confirmed", "completed"]
+
+# Only what the board renders; keeps a week of bookings to a few KB
+SCHEDULE_BOARD_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "artist_id": 1,
+    "appointment_date": 1,
+    "appointment_time": 1,
+    "start_minutes": 1,
+    "end_minutes": 1,
+    "status": 1,
+    "customer_name": 1,
+    "service_id": 1
+}
+
+
+def customer_display_name(name: str) -> str:
+    """Compact display name for the board, e.g. "Anna Müller" → "Anna M." """
+    parts = (name or "").split()
+    if len(parts) < 2:
+        return name or ""
+    return f"{parts[0]} {parts[-1][0]}."
+
+
+@api_router.get("/admin/schedule-board")
+async def get_schedule_board(
+    date: str,
+    view: str = "day",
+    lang: str = "de",
+    include_cancelled: bool = False
+):
+    """
+    All artists' bookings for a day or week, grouped per artist
+
+    Query Parameters:
+        - date: Day to show (week view: any day of the week, Monday-Sunday)
+        - view: "day" or "week" (default day)
+        - lang: Service name language, en/de/fr (default de)
+        - include_cancelled: Also show cancelled bookings (default false)
+
+    Returns:
+        {
+            "success": true,
+            "start_date": "2025-11-10",
+            "end_date": "2025-11-16",
+            "artists": [
+                {
+                    "artist_id": "...",
+                    "artist_name": "...",
+                    "bookings": [
+                        {"id": "...", "date": "2025-11-10", "start": "10:00", "end": "10:45",
+                         "status": "confirmed", "customer": "Anna M.", "service": "Maniküre"}
+                    ]
+                }
+            ]
+        }
+
+    One range query on (appointment_date, artist_id) with a narrow
+    projection, so the board can refresh every few seconds.
+    """
+    if view not in ("day", "week"):
+        raise HTTPException(status_code=400, detail="view must be 'day' or 'week'")
+    if lang not in ("en", "de", "fr"):
+        raise HTTPException(status_code=400, detail="lang must be one of: en, de, fr")
+    try:
+        day = datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    start = day - timedelta(days=day.weekday()) if view == "week" else day
+    end = start + timedelta(days=6) if view == "week" else day
+    start_date = start.strftime("%Y-%m-%d")
+    end_date = end.strftime("%Y-%m-%d")
+
+    try:
+        query = {"appointment_date": {"$gte": start_date, "$lte": end_date}}
+        if not include_cancelled:
+            query["status"] = {"$in": SCHEDULE_BOARD_STATUSES}
+        appointments = await db.appointments.find(query, SCHEDULE_BOARD_PROJECTION).to_list(None)
+
+        service_ids = list({appt.get("service_id") for appt in appointments})
+        services = await db.services.find(
+            {"id": {"$in": service_ids}},
+            {"_id": 0, "id": 1, "duration": 1, f"name_{lang}": 1}
+        ).to_list(None)
+        services_by_id = {service["id"]: service for service in services}
+
+        artists = await db.artists.find({}, {"_id": 0, "id": 1, "name": 1, "active": 1}).to_list(1000)
+        artist_names = {artist["id"]: artist.get("name", "") for artist in artists}
+        # Active artists always get a column; others only if they have bookings
+        board = {
+            artist["id"]: {"artist_id": artist["id"], "artist_name": artist_names[artist["id"]], "bookings": []}
+            for artist in artists
+            if artist.get("active", True)
+        }
+
+        appointments.sort(key=lambda appt: (
+            appt["appointment_date"],
+            appt.get("start_minutes") if appt.get("start_minutes") is not None
+            else time_to_minutes(appt["appointment_time"])
+        ))
+        for appt in appointments:
+            service = services_by_id.get(appt.get("service_id"), {})
+            if appt.get("end_minutes") is None:
+                appt.update(compute_appointment_timing(appt["appointment_time"], service.get("duration")))
+
+            column = board.setdefault(appt["artist_id"], {
+                "artist_id": appt["artist_id"],
+                "artist_name": artist_names.get(appt["artist_id"], ""),
+                "bookings": []
+            })
+            column["bookings"].append({
+                "id": appt["id"],
+                "date": appt["appointment_date"],
+                "start": minutes_to_time(appt["start_minutes"]),
+                "end": minutes_to_time(appt["end_minutes"]),
+                "status": appt["status"],
+                "customer": customer_display_name(appt.get("customer_name")),
+                "service": service.get(f"name_{lang}", "")
+            })
+
+        return {
+            "success": True,
+            "start_date": start_date,
+            "end_date": end_date,
+            "artists": list(board.values())
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building schedule board: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to build schedule board: {str(e)}"
+        )
+
+MAX_AUDIT_CONFLICTS = 1000
+
+
+@api_router.get("/admin/audit/overlaps")
+async def audit_appointment_overlaps(
+    from_date: Optional[str] = None,
+    to_date: Optional[str] = None,
+    limit: int = 200
+):
+    """
+    Find existing double bookings (overlaps including the 10 min buffer)
+
+    Query Parameters:
+        - from_date / to_date: Optional date range in YYYY-MM-DD format
+        - limit: Max conflicting pairs listed (default 200, max 1000); counts cover all
+
+    Returns:
+        {
+            "success": true,
+            "summary": {"appointments": 5120, "artist_days": 830, "conflicts": 3,
+                        "artist_days_with_conflicts": 2, "skipped": 0},
+            "conflicts": [
+                {"artist_id": "...", "date": "2025-11-15", "overlap_minutes": 15,
+                 "first": {"id": "...", "time": "10:00", "end": "10:45", ...},
+                 "second": {"id": "...", "time": "10:30", "end": "11:15", ...}}
+            ],
+            "truncated": false
+        }
+
+    The scan streams the collection (see overlap_audit.py); for a full
+    report on large data use audit_overlaps.py.
+    """
+    if limit < 1 or limit > MAX_AUDIT_CONFLICTS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_AUDIT_CONFLICTS}")
+    try:
+        for value in (from_date, to_date):
+            if value:
+                datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    try:
+        conflicts = []
+        summary = {}
+        async for entry in find_overlaps(db, buffer_time=10, from_date=from_date, to_date=to_date):
+            if entry["type"] == "summary":
+                summary = {key: value for key, value in entry.items() if key != "type"}
+            elif len(conflicts) < limit:
+                conflicts.append({key: value for key, value in entry.items() if key != "type"})
+
+        return {
+            "success": True,
+            "summary": summary,
+            "conflicts": conflicts,
+            "truncated": summary.get("conflicts", 0) > len(conflicts)
+        }
+
+    except Exception as e:
+        logger.error(f"Error auditing overlaps: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to audit overlaps: {str(e)}"
+        )
 
 # Services Update/Delete with Auto-Translation
 @api_router.put("/services/{service_id}", response_model=Service)
@@ -1450,6 +3058,7 @@ async def update_service(service_id: str, input: ServiceCreate):
         "description_fr": desc_translations['fr'],
         "category": input.category,
         "price": input.price,
+        "price_value": parse_price(input.price),
         "duration": input.duration,
         "image_url": input.image_url
     }
@@ -1462,6 +3071,8 @@ async def update_service(service_id: str, input: ServiceCreate):
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Service not found")
     
+    calendar_feeds.clear()  # Event titles show service names
+    schedule_snapshot_propagation(propagate_service_snapshot, db, service_dict)
     return Service(**service_dict)
 
 @api_router.delete("/services/{service_id}")
@@ -1469,6 +3080,7 @@ async def delete_service(service_id: str):
     result = await db.services.delete_one({"id": service_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Service not found")
+    admin_stats_cache.invalidate()
     return {"message": "Service deleted successfully"}
 
 # Appointments Update/Delete
@@ -1490,19 +3102,187 @@ async def update_appointment(appointment_id: str, input: AppointmentUpdate):
     if not update_dict:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = await db.appointments.update_one(
-        {"id": appointment_id},
-        {"$set": update_dict}
+    existing = await db.appointments.find_one({"id": appointment_id}, {"_id": 0})
+    if not existing:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    
+    loader = AppointmentDetailsLoader(db)
+    
+    # Keep stored timing in sync when the service or start time changes
+    if "service_id" in update_dict or "appointment_time" in update_dict:
+        service_id = update_dict.get("service_id", existing["service_id"])
+        service = await loader.service(service_id)
+        if not service:
+            raise HTTPException(status_code=404, detail="Service not found")
+        update_dict.update(compute_appointment_timing(
+            update_dict.get("appointment_time", existing["appointment_time"]),
+            service.get("duration")
+        ))
+    
+    # New service or artist, new snapshot (legacy rows get theirs on touch)
+    if "service_id" in update_dict or "artist_id" in update_dict or not has_snapshot(existing):
+        update_dict.update(appointment_snapshot(
+            await loader.service(update_dict.get("service_id", existing["service_id"])),
+            await loader.artist(update_dict.get("artist_id", existing["artist_id"]))
+        ))
+    if "service_id" in update_dict or existing.get("service_price") is None:
+        update_dict.update(booked_price(
+            await loader.service(update_dict.get("service_id", existing["service_id"]))
+        ))
+    
+    merged = await ensure_appointment_timing({**existing, **update_dict})
+    for field in ("duration_minutes", "start_minutes", "end_minutes"):
+        if existing.get(field) is None:
+            update_dict[field] = merged[field]  # Backfill legacy rows on touch
+    moved = any(
+        field in update_dict and update_dict[field] != existing.get(field)
+        for field in ("artist_id", "appointment_date", "appointment_time", "service_id")
     )
+    reactivated = existing.get("status") not in BLOCKING_STATUSES
     
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+    # Claim the new range before writing so a move can't double book
+    claimed_ids = None
+    previous_ids = await get_claim_ids(appointment_id)
+    if merged.get("status") in BLOCKING_STATUSES and (moved or reactivated):
+        await ensure_within_working_hours(
+            merged["artist_id"],
+            merged["appointment_date"],
+            merged["start_minutes"],
+            merged["duration_minutes"]
+        )
+        try:
+            claimed_ids = await claim_appointment(
+                db,
+                merged,
+                buffer_time=10,
+                previous_ids=previous_ids
+            )
+        except SlotTakenError:
+            raise await slot_taken_exception(
+                merged["artist_id"],
+                merged["appointment_date"],
+                merged["duration_minutes"],
+                exclude_appointment_id=appointment_id
+            )
     
-    appointment = await db.appointments.find_one({"id": appointment_id}, {"_id": 0})
+    # Conditional on the status and slot we read, so a concurrent cancel or
+    # status change is not overwritten (or counted twice)
+    previous = await db.appointments.find_one_and_update(
+        {
+            "id": appointment_id,
+            **{
+                field: existing.get(field)
+                for field in ("status", "artist_id", "appointment_date", "appointment_time", "service_id")
+            }
+        },
+        {"$set": update_dict},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
+    
+    if previous is None:
+        if claimed_ids is not None:
+            await release_claims(db, appointment_id, keep_ids=previous_ids)  # Only the claims we just took
+        if not await db.appointments.find_one({"id": appointment_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Appointment not found")
+        raise HTTPException(
+            status_code=409,
+            detail="Appointment was changed by another request. Please reload and try again."
+        )
+    
+    if merged.get("status") not in BLOCKING_STATUSES:
+        await release_claims(db, appointment_id)
+    elif claimed_ids is not None:
+        await release_claims(db, appointment_id, keep_ids=claimed_ids)
+    
+    appointment = {**previous, **update_dict}
+    await after_appointment_write(previous, dict(appointment))
     if isinstance(appointment.get('created_at'), str):
         appointment['created_at'] = datetime.fromisoformat(appointment['created_at'])
     return Appointment(**appointment)
 
+class AppointmentReschedule(BaseModel):
+    appointment_date: str
+    appointment_time: str
+    artist_id: Optional[str] = None  # Defaults to the current artist
+
+@api_router.post("/appointments/{appointment_id}/reschedule", response_model=Appointment)
+async def reschedule_appointment(appointment_id: str, input: AppointmentReschedule):
+    """
+    Move an appointment to a new date/time (and optionally artist) atomically
+
+    The target range is checked against the artist's other bookings and the
+    appointment is moved with a single conditional write. Returns 409 with
+    alternative slots if the target was taken in the meantime.
+    """
+    appointment = await db.appointments.find_one({"id": appointment_id}, {"_id": 0})
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    if appointment.get("status") not in BLOCKING_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail="Only pending or confirmed appointments can be rescheduled"
+        )
+
+    is_valid, error_msg = is_valid_booking_date(input.appointment_date)
+    if not is_valid:
+        raise HTTPException(status_code=400, detail=error_msg)
+    try:
+        datetime.strptime(input.appointment_time, "%H:%M")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid time format. Use HH:MM")
+
+    await ensure_appointment_timing(appointment)
+    start_minutes = time_to_minutes(input.appointment_time)
+    changes = {
+        "artist_id": input.artist_id or appointment["artist_id"],
+        "appointment_date": input.appointment_date,
+        "appointment_time": input.appointment_time,
+        "duration_minutes": appointment["duration_minutes"],
+        "start_minutes": start_minutes,
+        "end_minutes": start_minutes + appointment["duration_minutes"],
+        # New time, new reminder
+        "reminder_sent": False,
+        "reminder_sent_at": None
+    }
+    if changes["artist_id"] != appointment["artist_id"] or not has_snapshot(appointment):
+        changes.update(await AppointmentDetailsLoader(db).snapshot(
+            {**appointment, "artist_id": changes["artist_id"], "artist_name": None}
+        ))
+
+    await ensure_within_working_hours(
+        changes["artist_id"],
+        changes["appointment_date"],
+        changes["start_minutes"],
+        changes["duration_minutes"]
+    )
+
+    try:
+        updated = await move_appointment(db, appointment, changes, buffer_time=10)
+    except SlotTakenError:
+        raise await slot_taken_exception(
+            changes["artist_id"],
+            changes["appointment_date"],
+            changes["duration_minutes"],
+            exclude_appointment_id=appointment_id
+        )
+    except AppointmentChangedError:
+        raise HTTPException(
+            status_code=409,
+            detail="Appointment was changed by someone else, please reload and try again"
+        )
+
+    await after_appointment_write(appointment, dict(updated))
+
+    logger.info(
+        f"Appointment {appointment_id} rescheduled to "
+        f"{changes['appointment_date']} {changes['appointment_time']} ({changes['artist_id']})"
+    )
+
+    if isinstance(updated.get('created_at'), str):
+        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    return Appointment(**updated)
+
 @api_router.patch("/appointments/{appointment_id}/status")
 async def update_appointment_status(appointment_id: str, status: str):
     valid_statuses = ["pending", "confirmed", "completed", "cancelled"]
@@ -1514,20 +3294,49 @@ async def update_appointment_status(appointment_id: str, status: str):
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
     
-    result = await db.appointments.update_one(
-        {"id": appointment_id},
-        {"$set": {"status": status}}
+    # Re-activating a cancelled/completed appointment has to win its slot back
+    if status in BLOCKING_STATUSES and appointment["status"] not in BLOCKING_STATUSES:
+        await ensure_appointment_timing(appointment)
+        try:
+            await claim_appointment(db, appointment, buffer_time=10)
+        except SlotTakenError:
+            raise await slot_taken_exception(
+                appointment["artist_id"],
+                appointment["appointment_date"],
+                appointment["duration_minutes"],
+                exclude_appointment_id=appointment_id
+            )
+    
+    # Conditional on the status we read, so concurrent changes are applied
+    # (and counted) once
+    previous = await db.appointments.find_one_and_update(
+        {"id": appointment_id, "status": appointment["status"]},
+        {"$set": {"status": status}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
     )
     
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Appointment not found")
+    if previous is None:
+        current = await db.appointments.find_one({"id": appointment_id}, {"_id": 0, "status": 1})
+        if appointment["status"] not in BLOCKING_STATUSES and (current or {}).get("status") not in BLOCKING_STATUSES:
+            await release_claims(db, appointment_id)  # Our reactivation claim is not needed
+        if current is None:
+            raise HTTPException(status_code=404, detail="Appointment not found")
+        raise HTTPException(
+            status_code=409,
+            detail="Appointment was changed by another request. Please reload and try again."
+        )
+    
+    if status not in BLOCKING_STATUSES:
+        await release_claims(db, appointment_id)
+    await after_appointment_write(previous, {**previous, "status": status})
     
     # Send notification if appointment is confirmed and user_id exists
     if status == "confirmed" and appointment.get("user_id"):
         try:
             # Get service details for notification
-            service = await db.services.find_one({"id": appointment["service_id"]}, {"_id": 0})
-            service_name = service.get("name_de", "Ihr Service") if service else "Ihr Service"
+            details = await AppointmentDetailsLoader(db).snapshot(appointment)
+            service_name = details["service_name_de"] or "Ihr Service"
             
             # Create notification with German text (will be auto-translated)
             title_text = "Termin bestätigt! ✅"
@@ -1554,8 +3363,8 @@ async def update_appointment_status(appointment_id: str, status: str):
     if status == "cancelled" and appointment.get("user_id"):
         try:
             # Get service details for notification
-            service = await db.services.find_one({"id": appointment["service_id"]}, {"_id": 0})
-            service_name = service.get("name_de", "Ihr Service") if service else "Ihr Service"
+            details = await AppointmentDetailsLoader(db).snapshot(appointment)
+            service_name = details["service_name_de"] or "Ihr Service"
             
             title_text = "Termin abgesagt"
             message_text = (
@@ -1580,9 +3389,11 @@ async def update_appointment_status(appointment_id: str, status: str):
 
 @api_router.delete("/appointments/{appointment_id}")
 async def delete_appointment(appointment_id: str):
-    result = await db.appointments.delete_one({"id": appointment_id})
-    if result.deleted_count == 0:
+    appointment = await db.appointments.find_one_and_delete({"id": appointment_id}, projection={"_id": 0})
+    if appointment is None:
         raise HTTPException(status_code=404, detail="Appointment not found")
+    await release_claims(db, appointment_id)
+    await after_appointment_write(appointment, None)
     return {"message": "Appointment deleted successfully"}
 
 # Gallery Update/Delete with Auto-Translation
@@ -1620,6 +3431,7 @@ async def delete_gallery_item(item_id: str):
     result = await db.gallery.delete_one({"id": item_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Gallery item not found")
+    admin_stats_cache.invalidate()
     return {"message": "Gallery item deleted successfully"}
 
 # Artists Update/Delete with Auto-Translation
@@ -1657,6 +3469,9 @@ async def update_artist(artist_id: str, input: ArtistCreate):
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Artist not found")
     
+    calendar_feeds.invalidate(artist_id)  # Calendar names show the artist's name
+    if artist_dict["name"] != existing_artist.get("name"):
+        schedule_snapshot_propagation(propagate_artist_snapshot, db, artist_dict)
     return Artist(**artist_dict)
 
 @api_router.patch("/artists/{artist_id}/toggle-active")
@@ -1682,6 +3497,102 @@ async def toggle_artist_active(artist_id: str):
         "active": new_active_status
     }
 
+# ============= ARTIST SCHEDULE ROUTES =============
+
+class TimeRange(BaseModel):
+    start: str  # HH:MM
+    end: str  # HH:MM
+    
+    @validator('end')
+    def validate_range(cls, v, values):
+        """Validate HH:MM format and that the range is not empty"""
+        try:
+            start = datetime.strptime(values.get('start', ''), '%H:%M')
+            end = datetime.strptime(v, '%H:%M')
+        except ValueError:
+            raise ValueError('Invalid time format. Use HH:MM')
+        if end <= start:
+            raise ValueError('End time must be after start time')
+        return v
+
+class ScheduleBreak(TimeRange):
+    weekday: Optional[int] = None  # 0 = Monday ... 6 = Sunday, None = every day
+
+class DayOff(BaseModel):
+    start_date: str  # YYYY-MM-DD
+    end_date: Optional[str] = None  # Inclusive, defaults to start_date
+    reason: Optional[str] = None
+
+class ArtistScheduleUpdate(BaseModel):
+    weekly: Dict[str, List[TimeRange]]  # "0" = Monday ... "6" = Sunday
+    breaks: List[ScheduleBreak] = []
+    days_off: List[DayOff] = []
+    slot_interval: int = DEFAULT_SLOT_INTERVAL
+    
+    @validator('weekly')
+    def validate_weekly(cls, v):
+        """Validate weekday keys"""
+        if any(key not in {str(day) for day in range(7)} for key in v):
+            raise ValueError('Weekday keys must be "0" (Monday) to "6" (Sunday)')
+        return v
+    
+    @validator('slot_interval')
+    def validate_slot_interval(cls, v):
+        """Validate slot granularity"""
+        if v < 5 or v > 120 or v % 5 != 0:
+            raise ValueError('slot_interval must be a multiple of 5 between 5 and 120')
+        return v
+
+class ArtistSchedule(ArtistScheduleUpdate):
+    model_config = ConfigDict(extra="ignore")
+    artist_id: str
+    updated_at: Optional[datetime] = None
+
+@api_router.get("/artists/{artist_id}/schedule", response_model=ArtistSchedule)
+async def get_artist_schedule(artist_id: str):
+    """
+    Get an artist's weekly working hours, breaks and days off
+    Artists without a saved schedule work the salon business hours
+    """
+    schedule = await db.artist_schedules.find_one({"artist_id": artist_id}, {"_id": 0})
+    if schedule:
+        return schedule
+    
+    artist = await db.artists.find_one({"id": artist_id}, {"_id": 0, "id": 1})
+    if not artist:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    return ArtistSchedule(artist_id=artist_id, weekly=default_weekly_schedule())
+
+@api_router.put("/artists/{artist_id}/schedule", response_model=ArtistSchedule)
+async def update_artist_schedule(artist_id: str, input: ArtistScheduleUpdate):
+    """
+    Save an artist's schedule
+    Existing bookings are kept; the new hours apply to availability immediately
+    """
+    artist = await db.artists.find_one({"id": artist_id}, {"_id": 0, "id": 1})
+    if not artist:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    
+    schedule = ArtistSchedule(
+        artist_id=artist_id,
+        updated_at=datetime.now(timezone.utc),
+        **input.model_dump()
+    )
+    await db.artist_schedules.update_one(
+        {"artist_id": artist_id},
+        {"$set": schedule.model_dump()},
+        upsert=True
+    )
+    schedule_cache.invalidate(artist_id)
+    availability_cache.invalidate(artist_id)
+    for date in availability_broker.subscribed_dates(artist_id):
+        await availability_changed(artist_id, date)
+    
+    logger.info(f"Schedule updated for artist {artist_id}")
+    return schedule
+
+# ============= END ARTIST SCHEDULE ROUTES =============
+
 @api_router.delete("/artists/{artist_id}")
 async def delete_artist(artist_id: str):
     result = await db.artists.delete_one({"id": artist_id})
@@ -1692,53 +3603,45 @@ async def delete_artist(artist_id: str):
 # ============= ADMIN USER MANAGEMENT ROUTES =============
 
 @api_router.get("/admin/users")
-async def get_all_users_with_stats():
+async def get_all_users_with_stats(
+    response: Response,
+    sort: str = "completed",
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
     """
-    Get all users with their booking statistics for admin panel
-    Sorted by completed appointments count (descending)
+    Get users with their booking statistics for admin panel
+
+    Users and their total/completed/pending counts come from one
+    aggregation; sorting and paging happen in MongoDB.
+
+    Query Parameters:
+        - sort: "completed" (default, most completed bookings first),
+                "total", "newest" or "name"
+        - search: Name or email prefix
+        - limit: Page size (default and max 1000)
+        - cursor: "next_cursor" (or X-Next-Cursor header) of the previous page
     """
     try:
-        # Get all users
-        users = await db.users.find({}, {"_id": 0, "password_hash": 0}).to_list(1000)
-        
-        user_stats = []
-        
-        for user in users:
-            # Get booking statistics
-            total_bookings = await db.appointments.count_documents({"user_id": user["id"]})
-            completed_bookings = await db.appointments.count_documents({
-                "user_id": user["id"],
-                "status": "completed"
-            })
-            pending_bookings = await db.appointments.count_documents({
-                "user_id": user["id"],
-                "status": {"$in": ["pending", "confirmed"]}
-            })
-            
-            user_stats.append({
-                "id": user["id"],
-                "name": user["name"],
-                "email": user["email"],
-                "profile_picture": user.get("profile_picture"),
-                "created_at": user["created_at"].isoformat() if isinstance(user.get("created_at"), datetime) else user.get("created_at"),
-                "total_bookings": total_bookings,
-                "completed_bookings": completed_bookings,
-                "pending_bookings": pending_bookings,
-                "auth_method": user.get("auth_method", "google")
-            })
-        
-        # Sort by completed bookings (descending)
-        user_stats.sort(key=lambda x: x["completed_bookings"], reverse=True)
-        
-        return {
-            "success": True,
-            "users": user_stats,
-            "total_users": len(user_stats)
-        }
-        
+        users, next_cursor = await list_users_with_stats(db, sort, search, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching users: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch users")
+    
+    set_next_cursor(response, next_cursor)
+    total_users = (
+        await db.users.count_documents(user_search_query(search)) if search
+        else await db.users.estimated_document_count()
+    )
+    return {
+        "success": True,
+        "users": users,
+        "total_users": total_users,
+        "next_cursor": next_cursor
+    }
 
 
 @api_router.post("/admin/notifications/send")
@@ -2245,7 +4148,7 @@ app.add_middleware(
     allow_origins=cors_origins,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["*"],
+    expose_headers=["*", NEXT_CURSOR_HEADER],  # "*" is not honoured for credentialed requests
     max_age=600,  # Cache preflight requests for 10 minutes
 )
 
@@ -2277,6 +4180,14 @@ async def startup_event():
         initialize_reminder_scheduler(db, notification_service)
         logger.info("✅ Reminder scheduler initialized")
         
+        # Start user stats reconciliation scheduler
+        initialize_user_stats_scheduler(db)
+        logger.info("✅ User stats scheduler initialized")
+        
+        # Start analytics rollup reconciliation scheduler
+        initialize_analytics_scheduler(db)
+        logger.info("✅ Analytics scheduler initialized")
+        
         logger.info("🎉 All services started successfully!")
         
     except Exception as e:
@@ -2292,6 +4203,8 @@ async def shutdown_db_client():
         # Shutdown schedulers
         shutdown_cleanup_scheduler()
         shutdown_reminder_scheduler()
+        shutdown_user_stats_scheduler()
+        shutdown_analytics_scheduler()
         logger.info("✅ All schedulers stopped")
         
     except Exception as e:
@@ -61,14 +61,54 @@ async def setup_indexes():
         await db.appointments.create_index([("status", 1)])
         await db.appointments.create_index([("appointment_date", 1)])
         await db.appointments.create_index([("created_at", -1)])  # Descending for recent first
+        await db.appointments.create_index([("user_id", 1)])  # User dashboard, user_stats recounts
         print("✅ Appointments indexes created")
         
+        # Slot Claims Collection Indexes (_id is the unique artist|date|minute key)
+        print("\n🔒 Creating indexes for 'slot_claims' collection...")
+        await db.slot_claims.create_index([("owner", 1)])
+        await db.slot_claims.create_index([("artist_id", 1), ("date", 1)])
+        # Hold claims expire after minutes, booking claims the day after their date
+        await db.slot_claims.create_index([("expires_at", 1)], expireAfterSeconds=0)
+        # Booking claims written before they carried an expiry
+        await db.slot_claims.update_many(
+            {"expires_at": {"$exists": False}},
+            [{"$set": {"expires_at": {"$add": [{"$dateFromString": {"dateString": "$date"}}, 24 * 60 * 60 * 1000]}}}]
+        )
+        print("✅ Slot claims indexes created")
+        
+        # Slot Holds Collection Indexes (checkout holds, removed by TTL)
+        print("\n⏳ Creating indexes for 'slot_holds' collection...")
+        await db.slot_holds.create_index([("id", 1)], unique=True)
+        await db.slot_holds.create_index([("artist_id", 1), ("appointment_date", 1)])
+        await db.slot_holds.create_index([("expires_at", 1)], expireAfterSeconds=0)
+        print("✅ Slot holds indexes created")
+        
+        # Schedules Collection Indexes (materialized occupancy, _id = "artist|date")
+        print("\n📆 Creating indexes for 'schedules' collection...")
+        await db.schedules.create_index([("artist_id", 1), ("date", 1)])
+        await db.schedules.create_index([("date", 1)])
+        print("✅ Schedules indexes created")
+        
+        # Waitlist Collection Indexes (match_keys = "artist|date", multikey)
+        print("\n⏰ Creating indexes for 'waitlist_entries' collection...")
+        await db.waitlist_entries.create_index([("id", 1)], unique=True)
+        await db.waitlist_entries.create_index([("match_keys", 1), ("status", 1), ("created_at", 1)])
+        await db.waitlist_entries.create_index([("user_id", 1), ("created_at", -1)])
+        await db.waitlist_entries.create_index([("expires_at", 1)], expireAfterSeconds=0)
+        print("✅ Waitlist indexes created")
+        
         # Artists Collection Indexes
         print("\n👨‍🎨 Creating indexes for 'artists' collection...")
         await db.artists.create_index([("id", 1)], unique=True)
         await db.artists.create_index([("name", 1)])
         print("✅ Artists indexes created")
         
+        # Artist Schedules Collection Indexes
+        print("\n🗓️ Creating indexes for 'artist_schedules' collection...")
+        await db.artist_schedules.create_index([("artist_id", 1)], unique=True)
+        print("✅ Artist schedules indexes created")
+        
         # Gallery Collection Indexes
         print("\n🖼️ Creating indexes for 'gallery' collection...")
         await db.gallery.create_index([("id", 1)], unique=True)
@@ -108,10 +148,37 @@ async def setup_indexes():
         # Compound Indexes for complex queries
         print("\n🔗 Creating compound indexes...")
         await db.appointments.create_index([("artist_id", 1), ("appointment_date", 1)])
+        # Availability: get_blocked_slots filters on all three
+        await db.appointments.create_index([("artist_id", 1), ("appointment_date", 1), ("status", 1)])
         await db.appointments.create_index([("status", 1), ("appointment_date", 1)])
+        # Overlap audit streams active bookings in this order
+        await db.appointments.create_index([("artist_id", 1), ("appointment_date", 1), ("start_minutes", 1)])
+        # Admin schedule board: date range first, then artist
+        await db.appointments.create_index([("appointment_date", 1), ("artist_id", 1)])
         await db.gallery.create_index([("style", 1), ("colors", 1)])
+        # Keyset pagination: filter fields first, then the (sort keys, id) of the listing
+        await db.appointments.create_index([("appointment_date", -1), ("appointment_time", -1), ("id", -1)])
+        await db.appointments.create_index([("artist_id", 1), ("appointment_date", -1), ("appointment_time", -1), ("id", -1)])
+        await db.appointments.create_index([("status", 1), ("appointment_date", -1), ("appointment_time", -1), ("id", -1)])
+        await db.appointments.create_index([("user_id", 1), ("appointment_date", -1), ("appointment_time", -1), ("id", -1)])
+        await db.gallery.create_index([("created_at", -1), ("id", -1)])
+        await db.gallery.create_index([("style", 1), ("created_at", -1), ("id", -1)])
+        await db.gallery.create_index([("colors", 1), ("created_at", -1), ("id", -1)])
+        await db.contact_messages.create_index([("created_at", -1), ("id", -1)])
+        await db.users.create_index([("created_at", -1), ("id", -1)])
+        # Admin users list: per-user booking counts (covered) and name sort/prefix search
+        await db.appointments.create_index([("user_id", 1), ("status", 1)])
+        await db.users.create_index([("name", 1), ("id", 1)])
         print("✅ Compound indexes created")
         
+        # Daily analytics rollups: date range scans, optionally per artist/service/category
+        print("\n📈 Creating indexes for 'analytics_daily' collection...")
+        await db.analytics_daily.create_index([("date", 1)])
+        await db.analytics_daily.create_index([("artist_id", 1), ("date", 1)])
+        await db.analytics_daily.create_index([("service_id", 1), ("date", 1)])
+        await db.analytics_daily.create_index([("category", 1), ("date", 1)])
+        print("✅ Analytics indexes created")
+        
         print("\n✨ All database indexes created successfully!")
         print("📊 Your database queries will now be much faster!")
         
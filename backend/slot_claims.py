@@ -0,0 +1,416 @@
+"""
+Slot Claims - Race-free booking without a global lock
+Each booking inserts one claim document per 5-minute granule of its
+artist-day time range. Claim _ids are deterministic, so MongoDB's unique
+_id index guarantees that two overlapping bookings can never both win.
+Every claim carries an expires_at for the TTL index: checkout holds expire
+after a few minutes, booking claims the day after their appointment.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from booking_service import BLOCKING_STATUSES, DayOccupancy, get_blocked_slots
+from occupancy_service import record_hold, remove_hold
+
+logger = logging.getLogger(__name__)
+
+# All slot starts, durations and the buffer are multiples of 5 minutes, so
+# 5-minute granules are exact; anything unaligned is rounded outwards.
+CLAIM_GRANULE = 5
+
+DUPLICATE_KEY_ERROR = 11000
+
+# How long a checkout hold keeps its slot
+HOLD_TTL_MINUTES = 5
+
+
+def booking_claims_expiry(date: str) -> datetime:
+    """Booking claims outlive their appointment date by a day, then the TTL monitor drops them"""
+    return datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+
+
+class SlotTakenError(Exception):
+    """Raised when the requested time range is already claimed or booked"""
+
+
+class HoldMismatchError(ValueError):
+    """Raised when a booking does not match the slot hold it converts"""
+
+
+class AppointmentChangedError(Exception):
+    """Raised when an appointment changed between read and conditional write"""
+
+
+def claim_ids(
+    artist_id: str,
+    date: str,
+    start_minutes: int,
+    end_minutes: int,
+    buffer_time: int = 10
+) -> List[str]:
+    """
+    Claim document ids covering [start, end + buffer) for an artist-day
+
+    Two bookings conflict exactly when these ranges overlap, which is the
+    same rule DayOccupancy.is_free() applies.
+
+    Example:
+        10:00-10:45 with 10 min buffer → granules 600, 605, ..., 650
+    """
+    first = (start_minutes // CLAIM_GRANULE) * CLAIM_GRANULE
+    last = end_minutes + buffer_time
+    return [
+        f"{artist_id}|{date}|{minute}"
+        for minute in range(first, last, CLAIM_GRANULE)
+    ]
+
+
+async def claim_slot(
+    db,
+    owner_id: str,
+    artist_id: str,
+    date: str,
+    start_minutes: int,
+    end_minutes: int,
+    buffer_time: int = 10,
+    expires_at: Optional[datetime] = None
+) -> List[str]:
+    """
+    Atomically claim a time range for an owner (appointment or hold id)
+
+    Granules already held by the same owner count as ours, so an
+    appointment can re-claim an overlapping range when it moves. Expired
+    claims are removed by the TTL monitor; until it runs, they are taken
+    over here.
+
+    Returns:
+        The claim ids now held for this range
+
+    Raises:
+        SlotTakenError: if any granule belongs to someone else
+    """
+    ids = claim_ids(artist_id, date, start_minutes, end_minutes, buffer_time)
+    docs = [
+        {
+            "_id": claim_id,
+            "artist_id": artist_id,
+            "date": date,
+            "minute": int(claim_id.rsplit("|", 1)[1]),
+            "owner": owner_id
+        }
+        for claim_id in ids
+    ]
+    if expires_at:
+        for doc in docs:
+            doc["expires_at"] = expires_at
+
+    # Ordered inserts take granules in ascending order, like ordered lock
+    # acquisition: of two overlapping attempts at least one always gets
+    # through, so contention never ends with both sides backing off.
+    inserted = []
+    remaining = docs
+    while remaining:
+        try:
+            await db.slot_claims.insert_many(remaining, ordered=True)
+            return ids
+        except BulkWriteError as e:
+            error = e.details["writeErrors"][0]
+            index = error["index"]
+            inserted.extend(doc["_id"] for doc in remaining[:index])
+            if error.get("code") != DUPLICATE_KEY_ERROR:
+                await _release_ids(db, owner_id, inserted)
+                raise
+
+            claim_id = remaining[index]["_id"]
+            holder = await db.slot_claims.find_one({"_id": claim_id}, {"owner": 1, "expires_at": 1})
+            now = datetime.now(timezone.utc)
+            if holder is None:
+                remaining = remaining[index:]  # Released meanwhile, try again
+            elif holder["owner"] == owner_id:
+                remaining = remaining[index + 1:]  # Already ours (moving appointment)
+            elif _is_expired(holder, now):
+                # Expired hold the TTL monitor hasn't reaped yet
+                await db.slot_claims.delete_one({
+                    "_id": claim_id,
+                    "owner": holder["owner"],
+                    "expires_at": {"$lt": now}
+                })
+                remaining = remaining[index:]
+            else:
+                await _release_ids(db, owner_id, inserted)
+                raise SlotTakenError(f"{artist_id} {date} is already taken")
+
+    return ids
+
+
+def _is_expired(claim: Dict, now: datetime) -> bool:
+    """Whether a claim belongs to a hold that has run out"""
+    expires_at = claim.get("expires_at")
+    if expires_at is None:
+        return False
+    if expires_at.tzinfo is None:
+        # Motor returns naive UTC datetimes unless tz_aware is set
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at < now
+
+
+async def release_claims(db, owner_id: str, keep_ids: Optional[List[str]] = None) -> int:
+    """
+    Release every claim held by an owner, optionally keeping some
+
+    Returns:
+        Number of claims released
+    """
+    query: Dict = {"owner": owner_id}
+    if keep_ids:
+        query["_id"] = {"$nin": keep_ids}
+    result = await db.slot_claims.delete_many(query)
+    return result.deleted_count
+
+
+async def _release_ids(db, owner_id: str, ids: List[str]):
+    """Delete specific claims, but only if this owner holds them"""
+    if ids:
+        await db.slot_claims.delete_many({"_id": {"$in": ids}, "owner": owner_id})
+
+
+async def claim_appointment(
+    db,
+    appointment: Dict,
+    buffer_time: int = 10,
+    previous_ids: Optional[List[str]] = None,
+    expires_at: Optional[datetime] = None,
+    exclude_hold_id: Optional[str] = None
+) -> List[str]:
+    """
+    Claim an appointment's range and verify it against unclaimed bookings
+
+    Appointments created before claims existed have no claim documents, so
+    after winning the claim we still check the day's booked occupancy.
+
+    Args:
+        db: MongoDB database instance
+        appointment: Appointment document with timing fields
+        buffer_time: Buffer between appointments (default 10 min)
+        previous_ids: Claims the appointment already held (kept on failure)
+        expires_at: Expiry for hold claims (bookings expire after their date)
+        exclude_hold_id: Hold being converted, not a conflict
+
+    Returns:
+        The claim ids held for the new range
+
+    Raises:
+        SlotTakenError: if the range is claimed or overlaps an existing booking
+    """
+    ids = await claim_slot(
+        db,
+        appointment["id"],
+        appointment["artist_id"],
+        appointment["appointment_date"],
+        appointment["start_minutes"],
+        appointment["end_minutes"],
+        buffer_time,
+        expires_at=expires_at or booking_claims_expiry(appointment["appointment_date"])
+    )
+
+    blocked_slots = await get_blocked_slots(
+        db,
+        appointment["artist_id"],
+        appointment["appointment_date"],
+        exclude_appointment_id=appointment["id"],
+        exclude_hold_id=exclude_hold_id or appointment["id"]
+    )
+    occupancy = DayOccupancy.from_blocked_slots(blocked_slots)
+    if not occupancy.is_free(appointment["start_minutes"], appointment["duration_minutes"], buffer_time):
+        await release_claims(db, appointment["id"], keep_ids=previous_ids)
+        raise SlotTakenError(
+            f"{appointment['artist_id']} {appointment['appointment_date']} "
+            f"{appointment['appointment_time']} overlaps an existing appointment"
+        )
+
+    return ids
+
+
+async def book_appointment(db, appointment: Dict, buffer_time: int = 10) -> Dict:
+    """
+    Claim the slot and insert the appointment document
+
+    Exactly one of several concurrent bookings for overlapping ranges
+    succeeds; the others raise SlotTakenError and leave nothing behind.
+    """
+    await claim_appointment(db, appointment, buffer_time)
+    try:
+        await db.appointments.insert_one(appointment)
+    except Exception:
+        await release_claims(db, appointment["id"])
+        raise
+    return appointment
+
+
+async def book_appointments(db, appointments: List[Dict], buffer_time: int = 10) -> List[Dict]:
+    """
+    Book several appointments all-or-nothing (combo bookings)
+
+    Every appointment's range is claimed before anything is inserted; if
+    one is taken, the claims already won are released and nothing is
+    stored. Appointments are claimed in (artist, date, start) order so two
+    overlapping bundles contend like two single bookings: one always wins.
+
+    Raises:
+        SlotTakenError: if any of the ranges is claimed or booked
+    """
+    ordered = sorted(
+        appointments,
+        key=lambda appt: (appt["artist_id"], appt["appointment_date"], appt["start_minutes"])
+    )
+    claimed = []
+    try:
+        for appointment in ordered:
+            await claim_appointment(db, appointment, buffer_time)
+            claimed.append(appointment["id"])
+    except Exception:
+        for owner_id in claimed:
+            await release_claims(db, owner_id)
+        raise
+
+    try:
+        await db.appointments.insert_many(appointments, ordered=True)
+    except Exception:
+        ids = [appointment["id"] for appointment in appointments]
+        await db.appointments.delete_many({"id": {"$in": ids}})
+        await db.slot_claims.delete_many({"owner": {"$in": ids}})
+        raise
+    return appointments
+
+
+async def place_hold(db, hold: Dict, buffer_time: int = 10) -> Dict:
+    """
+    Reserve a time range during checkout
+
+    The hold document and its claims both carry expires_at, so MongoDB's
+    TTL monitor removes them without a sweeper job.
+
+    Raises:
+        SlotTakenError: if the range is claimed or booked
+    """
+    await claim_appointment(db, hold, buffer_time, expires_at=hold["expires_at"])
+    try:
+        await db.slot_holds.insert_one(hold)
+    except Exception:
+        await release_claims(db, hold["id"])
+        raise
+    await record_hold(db, hold)
+    return hold
+
+
+async def release_hold(db, hold_id: str) -> Optional[Dict]:
+    """Drop a hold and its claims; returns the hold, or None if it no longer exists"""
+    hold = await db.slot_holds.find_one_and_delete({"id": hold_id}, projection={"_id": 0})
+    await release_claims(db, hold_id)
+    if hold is not None:
+        await remove_hold(db, hold)
+    return hold
+
+
+async def book_from_hold(db, hold_id: str, appointment: Dict, buffer_time: int = 10) -> Dict:
+    """
+    Convert a checkout hold into a booking
+
+    The hold's claims are handed to the appointment with one update_many,
+    so the slot is never free in between. If the hold already expired the
+    booking falls back to a normal claim (the slot may still be free).
+
+    Raises:
+        HoldMismatchError: if the booking is for a different slot than the hold
+        SlotTakenError: if the hold expired and someone else took the slot
+    """
+    hold = await db.slot_holds.find_one(
+        {"id": hold_id, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+        {"_id": 0}
+    )
+    if not hold:
+        return await book_appointment(db, appointment, buffer_time)
+
+    for field in ("artist_id", "appointment_date", "start_minutes", "end_minutes"):
+        if hold[field] != appointment[field]:
+            raise HoldMismatchError(f"Booking does not match hold {hold_id} ({field})")
+
+    expected = claim_ids(
+        hold["artist_id"],
+        hold["appointment_date"],
+        hold["start_minutes"],
+        hold["end_minutes"],
+        buffer_time
+    )
+    result = await db.slot_claims.update_many(
+        {"owner": hold_id},
+        {"$set": {"owner": appointment["id"], "expires_at": booking_claims_expiry(appointment["appointment_date"])}}
+    )
+    if result.modified_count < len(expected):
+        # Some claims were reaped at the last moment; take the rest normally
+        await claim_appointment(db, appointment, buffer_time, exclude_hold_id=hold_id)
+
+    try:
+        await db.appointments.insert_one(appointment)
+    except Exception:
+        await release_claims(db, appointment["id"])
+        raise
+
+    await db.slot_holds.delete_one({"id": hold_id})
+    await remove_hold(db, hold)
+    return appointment
+
+
+async def move_appointment(db, appointment: Dict, changes: Dict, buffer_time: int = 10) -> Dict:
+    """
+    Move an appointment to a new slot without a gap or a double booking
+
+    The new range is claimed first (old claims stay held, so the customer
+    never loses their slot mid-move), then the appointment is updated with
+    one conditional find_one_and_update that only matches if nobody changed
+    its slot or status meanwhile. Old claims are released afterwards.
+
+    Args:
+        db: MongoDB database instance
+        appointment: Current appointment document (with timing fields)
+        changes: New artist_id/appointment_date/appointment_time + timing fields
+        buffer_time: Buffer between appointments (default 10 min)
+
+    Returns:
+        The updated appointment document
+
+    Raises:
+        SlotTakenError: if the target slot is taken
+        AppointmentChangedError: if the appointment was modified concurrently
+    """
+    previous = await db.slot_claims.find({"owner": appointment["id"]}, {"_id": 1}).to_list(None)
+    previous_ids = [claim["_id"] for claim in previous]
+
+    target = {**appointment, **changes}
+    claimed_ids = await claim_appointment(db, target, buffer_time, previous_ids=previous_ids)
+
+    updated = await db.appointments.find_one_and_update(
+        {
+            "id": appointment["id"],
+            "status": {"$in": BLOCKING_STATUSES},
+            "artist_id": appointment["artist_id"],
+            "appointment_date": appointment["appointment_date"],
+            "appointment_time": appointment["appointment_time"]
+        },
+        {"$set": changes},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+    if updated is None:
+        await release_claims(db, appointment["id"], keep_ids=previous_ids)
+        raise AppointmentChangedError(f"Appointment {appointment['id']} changed during reschedule")
+
+    await release_claims(db, appointment["id"], keep_ids=claimed_ids)
+    return updated
+
@@ -0,0 +1,96 @@
+"""
+Booking Concurrency Stress Test
+Fires hundreds of simultaneous bookings at one slot and checks that exactly
+one wins. Uses a scratch database (<DB_NAME>_stress) that is dropped afterwards.
+Run: python stress_test_booking.py [concurrent_bookings]
+"""
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from booking_service import compute_appointment_timing
+from slot_claims import SlotTakenError, book_appointment
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+ARTIST_ID = "stress-artist"
+# All start times collide with each other once duration and buffer are added
+START_TIMES = ["10:00", "10:15", "10:30", "09:45"]
+
+
+def make_appointment(index: int, date: str) -> dict:
+    appointment_time = START_TIMES[index % len(START_TIMES)]
+    return {
+        "id": str(uuid.uuid4()),
+        "customer_name": f"Stress {index}",
+        "customer_email": f"stress{index}@example.com",
+        "customer_phone": "+41441234567",
+        "service_id": "stress-service",
+        "artist_id": ARTIST_ID,
+        "appointment_date": date,
+        "appointment_time": appointment_time,
+        "status": "pending",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        **compute_appointment_timing(appointment_time, "45 min")
+    }
+
+
+async def attempt(db, appointment: dict, start: asyncio.Event) -> bool:
+    await start.wait()
+    try:
+        await book_appointment(db, appointment, buffer_time=10)
+        return True
+    except SlotTakenError:
+        return False
+
+
+async def run_stress_test(concurrency: int):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], maxPoolSize=200)
+    db_name = f"{os.environ['DB_NAME']}_stress"
+    db = client[db_name]
+    date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    print(f"🔥 Firing {concurrency} simultaneous bookings at {ARTIST_ID} on {date} ~10:00...")
+
+    try:
+        await client.drop_database(db_name)
+        await db.slot_claims.create_index([("owner", 1)])
+
+        start = asyncio.Event()
+        appointments = [make_appointment(i, date) for i in range(concurrency)]
+        tasks = [asyncio.create_task(attempt(db, appt, start)) for appt in appointments]
+        start.set()
+        results = await asyncio.gather(*tasks)
+
+        winners = [appt for appt, won in zip(appointments, results) if won]
+        stored = await db.appointments.count_documents({"artist_id": ARTIST_ID})
+        winner_claims = await db.slot_claims.count_documents({"owner": {"$in": [w["id"] for w in winners]}})
+        all_claims = await db.slot_claims.count_documents({})
+
+        print(f"   winners          : {len(winners)}")
+        print(f"   409 conflicts    : {results.count(False)}")
+        print(f"   stored bookings  : {stored}")
+        print(f"   leftover claims  : {all_claims - winner_claims}")
+
+        if len(winners) != 1:
+            raise SystemExit(f"❌ Expected exactly one winner, got {len(winners)}")
+
+        if stored != len(winners) or all_claims != winner_claims:
+            raise SystemExit("❌ Losing attempts left data behind")
+
+        print(f"\n✅ Exactly one booking won ({winners[0]['appointment_time']}), losers left nothing behind")
+
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_stress_test(int(sys.argv[1]) if len(sys.argv) > 1 else 300))
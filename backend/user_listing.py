@@ -0,0 +1,194 @@
+"""
+User Listing - Admin users list with booking stats from one aggregation
+Per-user total/completed/pending counts come from a $group over
+appointments instead of three count_documents per user; sorting, keyset
+paging and name/email prefix search all happen inside MongoDB.
+"""
+
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from booking_service import BLOCKING_STATUSES
+from pagination import decode_cursor, encode_cursor, keyset_filter, page_size
+
+logger = logging.getLogger(__name__)
+
+# sort parameter → keyset sort keys (each ends in the unique "id")
+USER_SORTS = {
+    "completed": [("completed_bookings", -1), ("id", 1)],
+    "total": [("total_bookings", -1), ("id", 1)],
+    "newest": [("created_at", -1), ("id", -1)],
+    "name": [("name", 1), ("id", 1)],
+}
+
+# Sorts on stored user fields page over users and count per page only
+USER_FIELD_SORTS = {"newest", "name"}
+
+USER_FIELDS = {
+    "_id": 0,
+    "id": 1,
+    "name": 1,
+    "email": 1,
+    "profile_picture": 1,
+    "created_at": 1,
+    "auth_method": 1
+}
+
+COUNT_FIELDS = {
+    "total_bookings": {"$sum": 1},
+    "completed_bookings": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+    "pending_bookings": {"$sum": {"$cond": [{"$in": ["$status", BLOCKING_STATUSES]}, 1, 0]}}
+}
+
+ZERO_COUNTS = {"total_bookings": 0, "completed_bookings": 0, "pending_bookings": 0}
+
+
+def user_search_query(search: Optional[str]) -> Dict:
+    """
+    Users whose email or name starts with `search`
+
+    Emails are stored lowercased, so the email branch is an indexed prefix
+    range; the name branch is case-insensitive.
+    """
+    if not search:
+        return {}
+    prefix = re.escape(search.strip())
+    return {"$or": [
+        {"email": {"$regex": f"^{prefix.lower()}"}},
+        {"name": {"$regex": f"^{prefix}", "$options": "i"}}
+    ]}
+
+
+def _counts_lookup() -> Dict:
+    """$lookup adding a one-element "counts" array per user (uses the user_id index)"""
+    return {"$lookup": {
+        "from": "appointments",
+        "let": {"user_id": "$id"},
+        "pipeline": [
+            {"$match": {"$expr": {"$eq": ["$user_id", "$$user_id"]}}},
+            {"$group": {"_id": None, **COUNT_FIELDS}}
+        ],
+        "as": "counts"
+    }}
+
+
+def _merge_counts() -> List[Dict]:
+    """Flatten the "counts" array from _counts_lookup into top-level fields"""
+    return [
+        {"$set": {
+            field: {"$ifNull": [{"$first": f"$counts.{field}"}, 0]}
+            for field in ZERO_COUNTS
+        }},
+        {"$unset": "counts"}
+    ]
+
+
+def users_pipeline(sort: str, search: Optional[str], after: Optional[List], limit: int) -> Tuple[str, List[Dict]]:
+    """
+    Aggregation producing one page of users with booking counts
+
+    Returns:
+        (collection to aggregate on, pipeline) - the page has up to limit + 1 rows
+    """
+    sort_keys = USER_SORTS[sort]
+    search_query = user_search_query(search)
+    page = []
+    if after is not None:
+        page.append({"$match": keyset_filter(sort_keys, after)})
+    page += [{"$sort": dict(sort_keys)}, {"$limit": limit + 1}]
+
+    if sort in USER_FIELD_SORTS:
+        # Indexed sort over users, then counts for the page's users only
+        return "users", [
+            {"$match": search_query},
+            {"$project": USER_FIELDS},
+            *page,
+            _counts_lookup(),
+            *_merge_counts()
+        ]
+
+    if search_query:
+        # Counts for the matching users, then sort on them
+        return "users", [
+            {"$match": search_query},
+            {"$project": USER_FIELDS},
+            _counts_lookup(),
+            *_merge_counts(),
+            *page
+        ]
+
+    # All users: one $group over appointments (covered by the user_id/status
+    # index), plus zero rows for users without bookings, then sort on counts
+    return "appointments", [
+        {"$match": {"user_id": {"$type": "string"}}},
+        {"$project": {"_id": 0, "user_id": 1, "status": 1}},
+        {"$group": {"_id": "$user_id", **COUNT_FIELDS}},
+        {"$unionWith": {"coll": "users", "pipeline": [
+            {"$project": {"_id": "$id", **{field: {"$literal": 0} for field in ZERO_COUNTS}}}
+        ]}},
+        {"$group": {"_id": "$_id", **{field: {"$sum": f"${field}"} for field in ZERO_COUNTS}}},
+        {"$project": {"_id": 0, "id": "$_id", **{field: 1 for field in ZERO_COUNTS}}},
+        *page,
+        {"$lookup": {"from": "users", "localField": "id", "foreignField": "id", "as": "user"}},
+        {"$project": {"user._id": 0, "user.password_hash": 0}}
+    ]
+
+
+async def list_users_with_stats(
+    db,
+    sort: str = "completed",
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of users with total/completed/pending booking counts
+
+    Args:
+        db: MongoDB database instance
+        sort: One of USER_SORTS
+        search: Name or email prefix
+        limit: Page size (see pagination.page_size)
+        cursor: next_cursor of the previous page
+
+    Returns:
+        (users, next_cursor) - next_cursor is None on the last page
+
+    Raises:
+        ValueError: For an unknown sort or an invalid cursor
+    """
+    if sort not in USER_SORTS:
+        raise ValueError(f"Invalid sort. Must be one of: {list(USER_SORTS)}")
+    sort_keys = USER_SORTS[sort]
+    size = page_size(limit)
+    after = decode_cursor(cursor, sort_keys) if cursor else None
+
+    collection, pipeline = users_pipeline(sort, search, after, size)
+    rows = await db[collection].aggregate(pipeline, allowDiskUse=True).to_list(size + 1)
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor([rows[-1].get(field) for field, _ in sort_keys])
+
+    users = []
+    for row in rows:
+        if "user" in row:
+            if not row["user"]:
+                continue  # Appointments of a deleted user
+            row = {**row.pop("user")[0], **row}
+        created_at = row.get("created_at")
+        users.append({
+            "id": row["id"],
+            "name": row.get("name", ""),
+            "email": row.get("email", ""),
+            "profile_picture": row.get("profile_picture"),
+            "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+            "total_bookings": row["total_bookings"],
+            "completed_bookings": row["completed_bookings"],
+            "pending_bookings": row["pending_bookings"],
+            "auth_method": row.get("auth_method", "google")
+        })
+    return users, next_cursor
@@ -0,0 +1,86 @@
+"""
+User Stats Scheduler
+Recounts per-user booking counters nightly and corrects any drift
+"""
+
+import logging
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+
+from user_stats_service import reconcile_user_stats
+
+logger = logging.getLogger(__name__)
+
+class UserStatsScheduler:
+    def __init__(self, db):
+        self.db = db
+        self.scheduler = AsyncIOScheduler()
+    
+    async def reconcile_task(self):
+        """
+        Run reconciliation - recount user_stats from appointments
+        """
+        try:
+            logger.info("Starting user stats reconciliation...")
+            report = await reconcile_user_stats(self.db)
+            
+            if report["corrected"] or report["removed"]:
+                logger.warning(
+                    f"User stats reconciliation: {report['corrected']} corrected, "
+                    f"{report['removed']} reset, {report['skipped']} skipped of {report['users']} users"
+                )
+            else:
+                logger.debug(f"User stats reconciliation complete: {report['users']} users, no drift")
+                
+        except Exception as e:
+            logger.error(f"Error in user stats reconciliation: {str(e)}")
+    
+    def start(self):
+        """
+        Start the scheduler - runs reconciliation every day at 3 AM
+        """
+        try:
+            # Run after the 2:00 AM notification cleanup
+            self.scheduler.add_job(
+                self.reconcile_task,
+                trigger=CronTrigger(hour=3, minute=0),
+                id='user_stats_reconciliation',
+                name='Reconcile user booking counters',
+                replace_existing=True
+            )
+            
+            self.scheduler.start()
+            logger.info("User stats scheduler started (runs daily at 3:00 AM)")
+            
+        except Exception as e:
+            logger.error(f"Error starting user stats scheduler: {str(e)}")
+    
+    def shutdown(self):
+        """
+        Shutdown the scheduler
+        """
+        try:
+            self.scheduler.shutdown()
+            logger.info("User stats scheduler stopped")
+        except Exception as e:
+            logger.error(f"Error stopping user stats scheduler: {str(e)}")
+
+# Global scheduler instance
+user_stats_scheduler = None
+
+def initialize_user_stats_scheduler(db):
+    """
+    Initialize and start the user stats scheduler
+    """
+    global user_stats_scheduler
+    user_stats_scheduler = UserStatsScheduler(db)
+    user_stats_scheduler.start()
+    return user_stats_scheduler
+
+def shutdown_user_stats_scheduler():
+    """
+    Shutdown the user stats scheduler
+    """
+    global user_stats_scheduler
+    if user_stats_scheduler:
+        user_stats_scheduler.shutdown()
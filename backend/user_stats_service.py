@@ -0,0 +1,228 @@
+"""
+User Stats Service - Materialized per-user booking counters
+One `user_stats` document per user is updated incrementally on every
+appointment write, so the dashboard reads its numbers with a single point
+read instead of several count_documents over appointments.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from booking_service import BLOCKING_STATUSES
+from counter_documents import replace_if_unchanged
+
+logger = logging.getLogger(__name__)
+
+# user_stats document:
+#     {
+#         "_id": "<user_id>",
+#         "total": 12,
+#         "completed": 7,
+#         "cancelled": 2,
+#         "active_by_date": {"2025-11-15": 1, ...},   # pending/confirmed per appointment date
+#         "updated_at": <datetime>
+#     }
+# "Upcoming" depends on today's date, so it is derived at read time from
+# active_by_date rather than stored as a counter that would go stale overnight.
+
+
+def _contribution(appointment: Optional[Dict]) -> Dict[str, int]:
+    """Counter fields one appointment adds to its user's stats"""
+    if not appointment or not appointment.get("user_id"):
+        return {}
+    counters = {"total": 1}
+    status = appointment.get("status")
+    if status == "completed":
+        counters["completed"] = 1
+    elif status == "cancelled":
+        counters["cancelled"] = 1
+    elif status in BLOCKING_STATUSES:
+        counters[f"active_by_date.{appointment['appointment_date']}"] = 1
+    return counters
+
+
+async def apply_appointment_change(db, previous: Optional[Dict], current: Optional[Dict]):
+    """
+    Update user_stats for one appointment write
+
+    Args:
+        db: MongoDB database instance
+        previous: Appointment before the write (None for a new booking)
+        current: Appointment after the write (None for a deletion)
+    """
+    deltas: Dict[str, Dict[str, int]] = {}
+    for appointment, sign in ((previous, -1), (current, 1)):
+        for field, value in _contribution(appointment).items():
+            user_deltas = deltas.setdefault(appointment["user_id"], {})
+            user_deltas[field] = user_deltas.get(field, 0) + sign * value
+
+    now = datetime.now(timezone.utc)
+    for user_id, user_deltas in deltas.items():
+        changes = {field: value for field, value in user_deltas.items() if value}
+        if not changes:
+            continue  # e.g. notes edited, nothing counted changed
+        update: Dict = {"$inc": changes, "$set": {"updated_at": now}}
+        dropped = [
+            field for field, value in changes.items()
+            if field.startswith("active_by_date.") and value < 0
+        ]
+        result = await db.user_stats.update_one({"_id": user_id}, update, upsert=True)
+        if result.upserted_id is not None:
+            # First counted write for this user: include their earlier appointments
+            await rebuild_user_stats(db, user_id)
+            continue
+        if dropped:
+            # Keep the date map small: remove dates whose count reached zero
+            await db.user_stats.update_one(
+                {"_id": user_id, "$or": [{field: {"$lte": 0}} for field in dropped]},
+                {"$unset": {field: "" for field in dropped}}
+            )
+
+
+def stats_view(stats: Optional[Dict], today: Optional[str] = None) -> Dict:
+    """
+    Dashboard numbers from a user_stats document
+
+    Returns:
+        {"total_appointments", "upcoming_appointments", "completed_appointments",
+        "cancelled_appointments"}
+    """
+    stats = stats or {}
+    today = today or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    return {
+        "total_appointments": stats.get("total", 0),
+        "upcoming_appointments": sum(
+            count for date, count in (stats.get("active_by_date") or {}).items() if date >= today
+        ),
+        "completed_appointments": stats.get("completed", 0),
+        "cancelled_appointments": stats.get("cancelled", 0)
+    }
+
+
+def _counts_pipeline(match: Dict) -> List[Dict]:
+    """Aggregation recomputing user_stats contents from appointments"""
+    is_active = {"$in": ["$status", BLOCKING_STATUSES]}
+    return [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "date": {"$cond": [is_active, "$appointment_date", None]}
+            },
+            "total": {"$sum": 1},
+            "completed": {"$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}},
+            "cancelled": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}},
+            "active": {"$sum": {"$cond": [is_active, 1, 0]}}
+        }},
+        {"$group": {
+            "_id": "$_id.user_id",
+            "total": {"$sum": "$total"},
+            "completed": {"$sum": "$completed"},
+            "cancelled": {"$sum": "$cancelled"},
+            "active_dates": {"$push": {"date": "$_id.date", "count": "$active"}}
+        }}
+    ]
+
+
+def _expected(row: Dict, today: str) -> Dict:
+    """Normalized user_stats contents from a _counts_pipeline row (past dates dropped)"""
+    return {
+        "total": row["total"],
+        "completed": row["completed"],
+        "cancelled": row["cancelled"],
+        "active_by_date": {
+            entry["date"]: entry["count"]
+            for entry in row["active_dates"]
+            if entry["date"] and entry["date"] >= today and entry["count"]
+        }
+    }
+
+
+def _normalized(stats: Optional[Dict], today: str) -> Dict:
+    stats = stats or {}
+    return {
+        "total": stats.get("total", 0),
+        "completed": stats.get("completed", 0),
+        "cancelled": stats.get("cancelled", 0),
+        "active_by_date": {
+            date: count for date, count in (stats.get("active_by_date") or {}).items()
+            if date >= today and count
+        }
+    }
+
+
+async def rebuild_user_stats(db, user_id: str) -> Dict:
+    """Recount one user's stats from appointments (first dashboard load before a reconciliation)"""
+    started_at = datetime.now(timezone.utc)
+    today = started_at.strftime("%Y-%m-%d")
+    rows = await db.appointments.aggregate(_counts_pipeline({"user_id": user_id})).to_list(1)
+    expected = _expected(rows[0], today) if rows else _normalized(None, today)
+    stored = await db.user_stats.find_one({"_id": user_id})
+    await replace_if_unchanged(db.user_stats, user_id, stored, expected, started_at)
+    return expected
+
+
+async def read_user_stats(db, user_id: str) -> Dict:
+    """Dashboard numbers for a user: one point read (recounted once if missing)"""
+    stats = await db.user_stats.find_one({"_id": user_id})
+    if stats is None:
+        stats = await rebuild_user_stats(db, user_id)
+    return stats_view(stats)
+
+
+async def reconcile_user_stats(db, batch_size: int = 500) -> Dict:
+    """
+    Recount every user's stats and fix documents that drifted
+
+    Streams one aggregation over appointments; stored documents are
+    fetched per batch with $in. Documents of users without appointments
+    are reset to zero.
+
+    Returns:
+        {"users": n, "corrected": n, "skipped": n, "removed": n}
+    """
+    started_at = datetime.now(timezone.utc)
+    today = started_at.strftime("%Y-%m-%d")
+    report = {"users": 0, "corrected": 0, "skipped": 0, "removed": 0}
+    seen = set()
+
+    async def check(batch: List[Dict]):
+        stored_docs = {
+            doc["_id"]: doc
+            async for doc in db.user_stats.find({"_id": {"$in": [row["_id"] for row in batch]}})
+        }
+        for row in batch:
+            expected = _expected(row, today)
+            stored = stored_docs.get(row["_id"])
+            if stored is not None and _normalized(stored, today) == expected and not any(
+                date < today for date in (stored.get("active_by_date") or {})
+            ):
+                continue
+            if await replace_if_unchanged(db.user_stats, row["_id"], stored, expected, started_at):
+                report["corrected"] += 1
+            else:
+                report["skipped"] += 1
+
+    batch = []
+    cursor = db.appointments.aggregate(
+        _counts_pipeline({"user_id": {"$type": "string"}}),
+        allowDiskUse=True
+    )
+    async for row in cursor:
+        report["users"] += 1
+        seen.add(row["_id"])
+        batch.append(row)
+        if len(batch) >= batch_size:
+            await check(batch)
+            batch = []
+    if batch:
+        await check(batch)
+
+    # Stats left over from appointments that no longer exist
+    async for stored in db.user_stats.find({}, {"_id": 1, "total": 1, "updated_at": 1}):
+        if stored["_id"] not in seen and stored.get("total"):
+            if await replace_if_unchanged(db.user_stats, stored["_id"], stored, _normalized(None, today), started_at):
+                report["removed"] += 1
+
+    return report
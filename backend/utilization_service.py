@@ -0,0 +1,229 @@
+"""
+Utilization Service - Vectorized occupancy analytics for admins
+Builds an artists × days × minutes occupancy tensor for a date range from one
+appointments query and derives utilization per artist, weekday and hour with
+NumPy reductions instead of per-day Python loops.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from availability_service import compile_working_day
+from booking_service import appointments_to_blocked_slots, date_range, minutes_to_time
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+SLOT_MINUTES = 15  # Resolution of heatmap cells and busiest/emptiest slots
+
+# Completed appointments used the chair too; cancelled ones did not
+UTILIZATION_STATUSES = ["pending", "confirmed", "completed"]
+
+TOP_SLOTS = 5
+
+# 2024-01-01 is a Monday, so index i is weekday i
+REFERENCE_WEEK = [f"2024-01-0{day}" for day in range(1, 8)]
+
+
+async def build_occupancy_tensor(
+    db,
+    artist_ids: List[str],
+    start_date: str,
+    end_date: str
+) -> Dict:
+    """
+    Booked and working minute tensors for a date range
+
+    Bookings are painted with a difference array: +1 at each start, -1 at
+    each end (np.add.at), then one cumulative sum along the minute axis.
+    Working hours come from the same compiled schedules availability uses.
+
+    Args:
+        db: MongoDB database instance
+        artist_ids: Artists (first axis, in this order)
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format (inclusive)
+
+    Returns:
+        {"dates": [...], "weekdays": int[D], "booked": bool[A, D, 1440], "working": bool[A, D, 1440]}
+    """
+    dates = date_range(start_date, end_date)
+    artist_index = {artist_id: i for i, artist_id in enumerate(artist_ids)}
+    date_index = {date: i for i, date in enumerate(dates)}
+    shape = (len(artist_ids), len(dates), MINUTES_PER_DAY)
+
+    appointments = await db.appointments.find(
+        {
+            "artist_id": {"$in": artist_ids},
+            "appointment_date": {"$gte": start_date, "$lte": end_date},
+            "status": {"$in": UTILIZATION_STATUSES}
+        },
+        {
+            "_id": 0,
+            "id": 1,
+            "artist_id": 1,
+            "appointment_date": 1,
+            "service_id": 1,
+            "appointment_time": 1,
+            "duration_minutes": 1,
+            "start_minutes": 1
+        }
+    ).to_list(None)
+    blocked_slots = await appointments_to_blocked_slots(db, appointments)
+    days = {appt["id"]: (appt["artist_id"], appt["appointment_date"]) for appt in appointments}
+
+    count = len(blocked_slots)
+    artist_axis = np.fromiter(
+        (artist_index[days[b["appointment_id"]][0]] for b in blocked_slots), dtype=np.intp, count=count
+    )
+    date_axis = np.fromiter(
+        (date_index[days[b["appointment_id"]][1]] for b in blocked_slots), dtype=np.intp, count=count
+    )
+    starts = np.fromiter((b["start_minutes"] for b in blocked_slots), dtype=np.intp, count=count)
+    durations = np.fromiter((b["duration"] for b in blocked_slots), dtype=np.intp, count=count)
+    starts = np.clip(starts, 0, MINUTES_PER_DAY)
+    ends = np.clip(starts + durations, 0, MINUTES_PER_DAY)
+
+    # One extra column so bookings ending at midnight have somewhere to put -1
+    diff = np.zeros((shape[0], shape[1], MINUTES_PER_DAY + 1), dtype=np.int16)
+    np.add.at(diff, (artist_axis, date_axis, starts), 1)
+    np.add.at(diff, (artist_axis, date_axis, ends), -1)
+    booked = np.cumsum(diff, axis=2, dtype=np.int16)[:, :, :MINUTES_PER_DAY] > 0
+
+    schedules = await db.artist_schedules.find({"artist_id": {"$in": artist_ids}}, {"_id": 0}).to_list(None)
+    by_artist = {schedule["artist_id"]: schedule for schedule in schedules}
+    weekdays = weekday_array(dates)
+    date_array = np.array(dates)
+    working = np.zeros(shape, dtype=bool)
+    for a, artist_id in enumerate(artist_ids):
+        schedule = by_artist.get(artist_id)
+        working[a] = weekly_template(schedule)[weekdays]
+        for day_off in (schedule or {}).get("days_off", []):
+            last = day_off.get("end_date") or day_off["start_date"]
+            working[a, (date_array >= day_off["start_date"]) & (date_array <= last)] = False
+
+    return {"dates": dates, "weekdays": weekdays, "booked": booked, "working": working}
+
+
+def weekday_array(dates: List[str]) -> np.ndarray:
+    """Weekday (0 = Monday) of every date"""
+    return np.array([datetime.strptime(date, "%Y-%m-%d").weekday() for date in dates], dtype=np.intp)
+
+
+def weekly_template(schedule: Optional[Dict]) -> np.ndarray:
+    """
+    Working minutes of each weekday as bool[7, 1440]
+
+    Weekly hours and breaks only depend on the weekday, so each weekday is
+    compiled once (on a reference week) and broadcast to every date; days
+    off are masked per date range by the caller.
+    """
+    weekly_only = {**schedule, "days_off": []} if schedule else None
+    template = np.zeros((7, MINUTES_PER_DAY), dtype=bool)
+    for weekday in range(7):
+        for start, end in compile_working_day(weekly_only, REFERENCE_WEEK[weekday]).intervals:
+            template[weekday, start:end] = True
+    return template
+
+
+def _ratio(booked: np.ndarray, working: np.ndarray) -> np.ndarray:
+    """booked / working, 0 where nobody works"""
+    return np.divide(
+        booked,
+        working,
+        out=np.zeros(np.shape(booked), dtype=float),
+        where=np.asarray(working) > 0
+    )
+
+
+def summarize_utilization(tensor: Dict, artist_ids: List[str]) -> Dict:
+    """
+    Utilization figures from an occupancy tensor (all NumPy reductions)
+
+    Returns:
+        overall, per-artist, per-weekday and per-hour utilization, a
+        weekday × hour heatmap and the busiest/emptiest SLOT_MINUTES slots
+        of the week
+    """
+    booked = tensor["booked"] & tensor["working"]
+    working = tensor["working"]
+    artists, days, _ = working.shape
+    slots_per_day = MINUTES_PER_DAY // SLOT_MINUTES
+
+    # Minutes booked / worked per slot: [A, D, slots]
+    booked_slots = booked.reshape(artists, days, slots_per_day, SLOT_MINUTES).sum(axis=3)
+    working_slots = working.reshape(artists, days, slots_per_day, SLOT_MINUTES).sum(axis=3)
+
+    weekdays = tensor["weekdays"]
+
+    # Slot-of-week totals: [7, slots]
+    week_booked = np.zeros((7, slots_per_day))
+    week_working = np.zeros((7, slots_per_day))
+    np.add.at(week_booked, weekdays, booked_slots.sum(axis=0))
+    np.add.at(week_working, weekdays, working_slots.sum(axis=0))
+
+    slots_per_hour = 60 // SLOT_MINUTES
+    hour_booked = week_booked.reshape(7, 24, slots_per_hour).sum(axis=2)
+    hour_working = week_working.reshape(7, 24, slots_per_hour).sum(axis=2)
+    open_hours = np.flatnonzero(hour_working.sum(axis=0))
+    open_weekdays = np.flatnonzero(week_working.sum(axis=1))
+
+    artist_booked = booked_slots.sum(axis=(1, 2))
+    artist_working = working_slots.sum(axis=(1, 2))
+    total_booked = int(artist_booked.sum())
+    total_working = int(artist_working.sum())
+
+    week_utilization = _ratio(week_booked, week_working)
+    open_slots = np.flatnonzero(week_working.ravel() > 0)
+    order = open_slots[np.argsort(week_utilization.ravel()[open_slots], kind="stable")]
+
+    def slot_info(flat_index: int) -> Dict:
+        weekday, slot = divmod(int(flat_index), slots_per_day)
+        return {
+            "weekday": weekday,
+            "time": minutes_to_time(slot * SLOT_MINUTES),
+            "utilization": round(float(week_utilization[weekday, slot]), 4)
+        }
+
+    return {
+        "overall": {
+            "booked_hours": round(total_booked / 60, 1),
+            "working_hours": round(total_working / 60, 1),
+            "utilization": round(total_booked / total_working, 4) if total_working else 0.0
+        },
+        "artists": [
+            {
+                "artist_id": artist_id,
+                "booked_hours": round(float(artist_booked[a]) / 60, 1),
+                "working_hours": round(float(artist_working[a]) / 60, 1),
+                "utilization": round(float(_ratio(artist_booked[a], artist_working[a])), 4)
+            }
+            for a, artist_id in enumerate(artist_ids)
+        ],
+        "weekdays": [
+            {"weekday": int(weekday), "utilization": round(float(value), 4)}
+            for weekday, value in zip(
+                open_weekdays,
+                _ratio(hour_booked.sum(axis=1), hour_working.sum(axis=1))[open_weekdays]
+            )
+        ],
+        "hours": [
+            {"hour": int(hour), "utilization": round(float(value), 4)}
+            for hour, value in zip(
+                open_hours,
+                _ratio(hour_booked.sum(axis=0), hour_working.sum(axis=0))[open_hours]
+            )
+        ],
+        "heatmap": {
+            "weekdays": open_weekdays.tolist(),
+            "hours": open_hours.tolist(),
+            "utilization": np.round(
+                _ratio(hour_booked, hour_working)[np.ix_(open_weekdays, open_hours)], 4
+            ).tolist()
+        },
+        "busiest_slots": [slot_info(i) for i in order[::-1][:TOP_SLOTS]],
+        "emptiest_slots": [slot_info(i) for i in order[:TOP_SLOTS]]
+    }
@@ -0,0 +1,155 @@
+"""
+Waitlist Service - Tell waiting customers when a cancellation frees a slot
+Entries carry "artist|date" match keys (multikey index), so a freed interval
+only looks at entries waiting for that artist-day, never the whole waitlist.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from availability_service import get_available_slots
+from booking_service import is_valid_booking_date, minutes_to_time, time_to_minutes
+
+logger = logging.getLogger(__name__)
+
+ANY_ARTIST = "*"
+
+# Waiting entries examined per freed interval (oldest first) and notified
+WAITLIST_SCAN_LIMIT = 50
+WAITLIST_NOTIFY_COUNT = 3
+
+
+def waitlist_match_keys(artist_ids: List[str], windows: List[Dict]) -> List[str]:
+    """
+    Index keys for an entry: one per acceptable artist and window date
+
+    Example:
+        (["a1"], [{"date": "2025-11-15", ...}]) → ["a1|2025-11-15"]
+        ([], [{"date": "2025-11-15", ...}])     → ["*|2025-11-15"]  (any artist)
+    """
+    artists = artist_ids or [ANY_ARTIST]
+    dates = sorted({window["date"] for window in windows})
+    return [f"{artist_id}|{date}" for artist_id in artists for date in dates]
+
+
+def waitlist_expiry(windows: List[Dict]) -> datetime:
+    """Entries expire (TTL index) the day after their last window"""
+    last = max(window["date"] for window in windows)
+    return datetime.strptime(last, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+
+
+def _offer_for(
+    entry: Dict,
+    date: str,
+    freed_start: int,
+    freed_end: int,
+    available: List[str],
+    earliest: int = 0
+) -> Optional[str]:
+    """Earliest free start inside one of the entry's windows that uses the freed time"""
+    duration = entry["duration_minutes"]
+    for window in entry["windows"]:
+        if window["date"] != date:
+            continue
+        window_start = time_to_minutes(window["start"])
+        window_end = time_to_minutes(window["end"])
+        for slot in available:
+            start = time_to_minutes(slot)
+            if (
+                start >= earliest
+                and window_start <= start and start + duration <= window_end
+                and start < freed_end and freed_start < start + duration
+            ):
+                return slot
+    return None
+
+
+async def match_freed_slot(
+    db,
+    notification_service,
+    artist_id: str,
+    date: str,
+    freed_start: int,
+    freed_end: int
+) -> int:
+    """
+    Offer a freed interval to the longest-waiting matching customers
+
+    Candidates come from one indexed query on match_keys; each is checked
+    against the artist-day's current availability for its own service
+    duration. Entries are claimed with a conditional update, so two freed
+    slots never notify the same entry twice.
+
+    Returns:
+        Number of customers notified
+    """
+    if not is_valid_booking_date(date)[0]:
+        return 0  # Past or beyond the booking horizon
+    now = datetime.now()
+    earliest = now.hour * 60 + now.minute + 1 if date == now.strftime("%Y-%m-%d") else 0
+
+    candidates = await db.waitlist_entries.find(
+        {
+            "status": "waiting",
+            "match_keys": {"$in": [f"{artist_id}|{date}", f"{ANY_ARTIST}|{date}"]}
+        },
+        {"_id": 0}
+    ).sort("created_at", 1).limit(WAITLIST_SCAN_LIMIT).to_list(WAITLIST_SCAN_LIMIT)
+    if not candidates:
+        return 0
+
+    available_by_duration: Dict[int, List[str]] = {}
+    offers = []
+    for entry in candidates:
+        duration = entry["duration_minutes"]
+        if duration not in available_by_duration:
+            available_by_duration[duration], _ = await get_available_slots(
+                db, artist_id, date, duration, buffer_time=10
+            )
+        slot = _offer_for(entry, date, freed_start, freed_end, available_by_duration[duration], earliest)
+        if slot:
+            offers.append((entry, slot))
+
+    if not offers:
+        return 0
+
+    artist = await db.artists.find_one({"id": artist_id}, {"_id": 0, "name": 1})
+    artist_name = artist.get("name", "") if artist else ""
+
+    notified = 0
+    for entry, slot in offers:
+        if notified >= WAITLIST_NOTIFY_COUNT:
+            break
+        result = await db.waitlist_entries.update_one(
+            {"id": entry["id"], "status": "waiting"},
+            {"$set": {
+                "status": "notified",
+                "notified_at": datetime.now(timezone.utc).isoformat(),
+                "offer": {"artist_id": artist_id, "date": date, "time": slot}
+            }}
+        )
+        if result.modified_count == 0:
+            continue  # Taken by a concurrent match
+
+        try:
+            await notification_service.create_notification(
+                user_id=entry["user_id"],
+                notification_type="waitlist_slot_available",
+                title_text="Termin frei geworden! ⏰",
+                message_text=(
+                    f"Für {entry.get('service_name', 'Ihren Service')} ist am {date} "
+                    f"um {slot} Uhr{f' bei {artist_name}' if artist_name else ''} ein Termin frei. "
+                    f"Jetzt schnell buchen!"
+                )
+            )
+            notified += 1
+        except Exception as e:
+            logger.error(f"Error notifying waitlist entry {entry['id']}: {str(e)}")
+
+    logger.info(
+        f"Waitlist: {artist_id} {date} {minutes_to_time(freed_start)}-{minutes_to_time(freed_end)} "
+        f"freed, {notified} of {len(candidates)} waiting customers notified"
+    )
+    return notified
+
@@ -0,0 +1,101 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from analytics_service import _contribution, _metrics, apply_appointment_rollup, rollup_id
+from counter_documents import replace_if_unchanged
+
+
+def _appointment(status, date="2025-11-15", price=45.0):
+    return {
+        "id": "appt-1",
+        "artist_id": "a",
+        "service_id": "s",
+        "appointment_date": date,
+        "status": status,
+        "service_price": price,
+        "service_category": "nails",
+    }
+
+
+class _Collection:
+    """Records writes; every document exists and was last written long ago"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def update_one(self, query, update, upsert=False):
+        self.calls.append(("update_one", query, update))
+        return SimpleNamespace(modified_count=1, upserted_id=None)
+
+    async def replace_one(self, query, document):
+        self.calls.append(("replace_one", query, document))
+        return SimpleNamespace(modified_count=1)
+
+    async def delete_one(self, query):
+        self.calls.append(("delete_one", query))
+        return SimpleNamespace(deleted_count=1)
+
+
+def _apply(previous, current):
+    collection = _Collection()
+    asyncio.run(apply_appointment_rollup(SimpleNamespace(analytics_daily=collection), previous, current))
+    return collection.calls
+
+
+def test_contribution_per_status():
+    assert _contribution(_appointment("pending"), 45.0) == {
+        "bookings": 1, "completed": 0, "cancelled": 0, "revenue": 0, "expected_revenue": 45.0
+    }
+    assert _contribution(_appointment("completed"), 45.0)["revenue"] == 45.0
+    assert _contribution(_appointment("cancelled"), 45.0) == {
+        "bookings": 1, "completed": 0, "cancelled": 1, "revenue": 0, "expected_revenue": 0
+    }
+
+
+def test_completion_moves_revenue_only():
+    (call,) = _apply(_appointment("confirmed"), _appointment("completed"))
+
+    _, query, update = call
+    assert query == {"_id": rollup_id("2025-11-15", "a", "s")}
+    assert update["$inc"] == {"completed": 1, "revenue": 45.0}
+    assert update["$setOnInsert"]["category"] == "nails"
+
+
+def test_move_to_another_day_touches_both_rollups():
+    calls = _apply(_appointment("confirmed"), _appointment("confirmed", date="2025-11-16"))
+
+    assert calls[0][1] == {"_id": "2025-11-15|a|s"}
+    assert calls[0][2]["$inc"] == {"bookings": -1, "expected_revenue": -45.0}
+    # The emptied rollup is dropped, but only if nothing else is counted in it
+    assert calls[1] == ("delete_one", {"_id": "2025-11-15|a|s", "bookings": {"$lte": 0}})
+    assert calls[2][1] == {"_id": "2025-11-16|a|s"}
+    assert calls[2][2]["$inc"] == {"bookings": 1, "expected_revenue": 45.0}
+
+
+def test_unchanged_metrics_write_nothing():
+    assert _apply(_appointment("pending"), _appointment("confirmed")) == []
+
+
+def test_metrics_treat_missing_as_zero():
+    assert _metrics(None) == dict.fromkeys(("bookings", "completed", "cancelled", "revenue", "expected_revenue"), 0)
+    assert _metrics({"revenue": 10.004, "bookings": 2})["revenue"] == 10.0
+
+
+def test_recount_skips_documents_written_after_it_started():
+    started_at = datetime.now(timezone.utc)
+    collection = _Collection()
+    fresh = {"_id": "k", "bookings": 9, "updated_at": started_at + timedelta(seconds=1)}
+    stale = {"_id": "k", "bookings": 9, "updated_at": started_at - timedelta(hours=1)}
+
+    assert not asyncio.run(replace_if_unchanged(collection, "k", fresh, {"bookings": 1}, started_at))
+    assert collection.calls == []
+
+    assert asyncio.run(replace_if_unchanged(collection, "k", stale, {"bookings": 1}, started_at))
+    kind, query, document = collection.calls[0]
+    # Conditional on the updated_at read, so a concurrent increment wins
+    assert (kind, query) == ("replace_one", {"_id": "k", "updated_at": stale["updated_at"]})
+    assert document["bookings"] == 1
+
+    assert asyncio.run(replace_if_unchanged(collection, "k", stale, None, started_at))
+    assert collection.calls[-1] == ("delete_one", {"_id": "k", "updated_at": stale["updated_at"]})
@@ -0,0 +1,74 @@
+import asyncio
+
+import availability_service
+from availability_service import AvailabilityCache, get_available_slots
+
+RESULT = (["09:00", "09:30"], [{"start": "10:00", "duration": 45}])
+
+
+def _slow_compute(calls, result=RESULT, delay=0.01):
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+    return compute
+
+
+def test_concurrent_misses_share_one_computation():
+    cache = AvailabilityCache()
+    calls = []
+
+    async def main():
+        return await asyncio.gather(*[
+            cache.get_or_compute("a", "2025-11-15", (45, 10), _slow_compute(calls)) for _ in range(4)
+        ])
+
+    assert asyncio.run(main()) == [RESULT] * 4
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced) == (1, 3)
+
+
+def test_cancelled_caller_does_not_fail_the_others():
+    cache = AvailabilityCache()
+    calls = []
+
+    async def main():
+        first = asyncio.create_task(cache.get_or_compute("a", "2025-11-15", (45, 10), _slow_compute(calls)))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get_or_compute("a", "2025-11-15", (45, 10), _slow_compute(calls)))
+        await asyncio.sleep(0)
+        first.cancel()  # e.g. the client disconnected
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == (RESULT, True)
+    assert len(calls) == 1
+    assert cache._lookup(("a", "2025-11-15"), (45, 10)) == RESULT
+
+
+def test_write_during_computation_is_not_cached():
+    cache = AvailabilityCache()
+
+    async def main():
+        task = asyncio.create_task(cache.get_or_compute("a", "2025-11-15", (45, 10), _slow_compute([])))
+        await asyncio.sleep(0)
+        cache.invalidate("a", "2025-11-15")
+        return await task
+
+    assert asyncio.run(main()) == RESULT
+    assert cache._lookup(("a", "2025-11-15"), (45, 10)) is None
+
+
+def test_cached_slots_are_copied_per_caller(monkeypatch):
+    async def compute(db, artist_id, date_str, duration, buffer_time=10):
+        return ["09:00"], [{"start": "10:00", "duration": 45}]
+
+    monkeypatch.setattr(availability_service, "availability_cache", AvailabilityCache())
+    monkeypatch.setattr(availability_service, "_compute_available_slots", compute)
+
+    async def main():
+        available, blocked = await get_available_slots(None, "a", "2025-11-15", 45)
+        available.append("18:00")
+        blocked[0]["duration"] = 0
+        return await get_available_slots(None, "a", "2025-11-15", 45)
+
+    assert asyncio.run(main()) == (["09:00"], [{"start": "10:00", "duration": 45}])
@@ -0,0 +1,51 @@
+import asyncio
+
+from availability_events import AvailabilityBroker, diff_slots
+
+
+def test_diff_slots_keeps_list_order():
+    previous = ["09:00", "09:30", "10:00", "10:30"]
+    current = ["09:00", "10:30", "14:00", "13:00"]
+
+    assert diff_slots(previous, current) == {"added": ["14:00", "13:00"], "removed": ["09:30", "10:00"]}
+
+
+def test_diff_slots_without_changes():
+    assert diff_slots(["09:00"], ["09:00"]) == {"added": [], "removed": []}
+    assert diff_slots([], []) == {"added": [], "removed": []}
+
+
+def test_publish_reaches_only_that_artist_day():
+    broker = AvailabilityBroker()
+    watching = broker.subscribe("a", "2025-11-15")
+    other_day = broker.subscribe("a", "2025-11-16")
+
+    assert broker.publish("a", "2025-11-15", [{"start": "10:00", "duration": 45}]) == 1
+
+    async def main():
+        return await watching.next_change(0.01), await other_day.next_change(0.01)
+
+    assert asyncio.run(main()) == ([{"start": "10:00", "duration": 45}], None)
+
+
+def test_latest_occupancy_overwrites_unread_ones():
+    broker = AvailabilityBroker()
+    subscription = broker.subscribe("a", "2025-11-15")
+    broker.publish("a", "2025-11-15", [{"start": "10:00", "duration": 45}])
+    broker.publish("a", "2025-11-15", [])
+
+    async def main():
+        return await subscription.next_change(0.01), await subscription.next_change(0.01)
+
+    assert asyncio.run(main()) == ([], None)
+
+
+def test_capacity_and_unsubscribe():
+    broker = AvailabilityBroker(max_subscriptions=1)
+    subscription = broker.subscribe("a", "2025-11-15")
+
+    assert broker.subscribe("b", "2025-11-15") is None
+    broker.unsubscribe(subscription)
+    broker.unsubscribe(subscription)  # Twice is harmless
+    assert not broker.has_subscribers("a", "2025-11-15")
+    assert broker.subscribe("b", "2025-11-15") is not None
@@ -0,0 +1,63 @@
+from calendar_feed import _escape, _fold, render_feed
+
+APPOINTMENT = {
+    "id": "appt-1",
+    "artist_id": "a",
+    "service_id": "s",
+    "appointment_date": "2025-11-15",
+    "appointment_time": "10:00",
+    "start_minutes": 600,
+    "duration_minutes": 45,
+    "status": "confirmed",
+    "customer_name": "Anna Müller",
+    "customer_phone": "+41 79 000 00 00",
+    "notes": "Allergie; bitte, Handschuhe",
+}
+SERVICES = {"s": {"id": "s", "name_de": "Maniküre"}}
+ARTISTS = {"a": {"id": "a", "name": "Lea"}}
+
+
+def test_escape_text_values():
+    assert _escape("a;b,c\\d\ne") == r"a\;b\,c\\d\ne"
+    assert _escape("line\r\nbreak") == "line\\nbreak"
+
+
+def test_fold_keeps_short_lines():
+    assert _fold("SUMMARY:short") == "SUMMARY:short"
+
+
+def test_fold_at_75_octets_without_splitting_utf8():
+    line = "DESCRIPTION:" + "ü" * 80  # 2 bytes each
+    folded = _fold(line)
+    parts = folded.split("\r\n ")
+
+    assert "".join(parts) == line
+    assert all(len(part.encode("utf-8")) <= 75 for part in parts)
+
+
+def test_render_feed_events():
+    body = render_feed("Kalender", [APPOINTMENT], SERVICES, ARTISTS)
+    unfolded = body.replace("\r\n ", "")
+
+    assert body.startswith("BEGIN:VCALENDAR\r\n")
+    assert body.endswith("END:VCALENDAR\r\n")
+    assert "UID:appt-1@fabulous-nails" in unfolded
+    assert "DTSTART;TZID=Europe/Berlin:20251115T100000" in unfolded
+    assert "DTEND;TZID=Europe/Berlin:20251115T104500" in unfolded
+    assert "SUMMARY:Maniküre – Anna Müller" in unfolded
+    assert "Tel.: +41 79 000 00 00" in unfolded
+    assert r"Allergie\; bitte\, Handschuhe" in unfolded
+
+
+def test_salon_feed_leaves_out_contact_details():
+    body = render_feed(
+        "Alle Termine", [APPOINTMENT], SERVICES, ARTISTS, include_artist=True, include_contact=False
+    ).replace("\r\n ", "")
+
+    assert "SUMMARY:Lea: Maniküre – Anna Müller" in body
+    assert "Tel.:" not in body
+    assert "Allergie" not in body
+
+
+def test_render_is_stable_for_unchanged_data():
+    assert render_feed("K", [APPOINTMENT], SERVICES, ARTISTS) == render_feed("K", [APPOINTMENT], SERVICES, ARTISTS)
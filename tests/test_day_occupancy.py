@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from booking_service import DayOccupancy, check_overlap, filter_available_slots, minutes_to_time
+
+
+def legacy_is_free(start, duration, blocked, buffer_time):
+    """The per-slot overlap check filter_available_slots used before DayOccupancy"""
+    return not any(
+        check_overlap(start, duration + buffer_time, b_start, b_duration + buffer_time)
+        for b_start, b_duration in blocked
+    )
+
+
+def random_day(rng):
+    blocked = []
+    for _ in range(rng.randint(0, 8)):
+        start = rng.randrange(9 * 60, 19 * 60, 5)
+        blocked.append((start, rng.choice([15, 30, 45, 60, 90])))
+    return blocked
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_free_starts_match_legacy_overlap_check(seed):
+    rng = random.Random(seed)
+    blocked = random_day(rng)
+    occupancy = DayOccupancy([(start, start + duration) for start, duration in blocked])
+    starts = list(range(8 * 60, 20 * 60, 5))
+
+    for duration in (15, 45, 90):
+        for buffer_time in (0, 10):
+            expected = [s for s in starts if legacy_is_free(s, duration, blocked, buffer_time)]
+            assert occupancy.free_starts(starts, duration, buffer_time) == expected
+            assert [s for s in starts if occupancy.is_free(s, duration, buffer_time)] == expected
+
+
+def test_buffer_applies_on_both_sides():
+    occupancy = DayOccupancy([(600, 660)])  # 10:00-11:00
+
+    assert occupancy.is_free(545, 45, buffer_time=10) is True   # ends 09:50, buffer until 10:00
+    assert occupancy.is_free(555, 40, buffer_time=10) is False  # ends 09:55, buffer runs into 10:00
+    assert occupancy.is_free(660, 30, buffer_time=10) is False  # right after, inside the buffer
+    assert occupancy.is_free(670, 30, buffer_time=10) is True
+    assert occupancy.is_free(660, 30, buffer_time=0) is True
+
+
+def test_busy_minutes_clamps_to_the_day():
+    occupancy = DayOccupancy([(600, 630), (700, 700)])  # empty interval ignored
+
+    assert occupancy.busy_minutes(-50, 2000) == 30
+    assert occupancy.busy_minutes(615, 620) == 5
+    assert occupancy.busy_minutes(630, 600) == 0
+    assert DayOccupancy([]).is_free(600, 45) is True
+
+
+def test_filter_available_slots_from_blocked_slots():
+    blocked_slots = [{"start": "10:00", "duration": 60}]
+    slots = [minutes_to_time(m) for m in range(540, 720, 30)]
+
+    # Docstring example: 45 min service, 10 min buffer
+    assert filter_available_slots(slots, blocked_slots, 45) == ["09:00", "11:30"]
@@ -0,0 +1,59 @@
+import random
+
+from overlap_audit import sweep_day
+
+
+def _appt(appointment_id, start, end):
+    return {"id": appointment_id, "start": start, "end": end, "status": "confirmed"}
+
+
+def _pairs(conflicts):
+    return [(conflict["first"]["id"], conflict["second"]["id"], conflict["overlap_minutes"]) for conflict in conflicts]
+
+
+def test_touching_bookings_conflict_only_through_the_buffer():
+    day = [_appt("a", 600, 645), _appt("b", 645, 690)]
+
+    assert sweep_day(day, buffer_time=0) == []
+    # Back to back violates the 10 minute buffer without overlapping
+    assert _pairs(sweep_day(day, buffer_time=10)) == [("a", "b", 0)]
+
+
+def test_gap_of_exactly_the_buffer_is_fine():
+    assert sweep_day([_appt("a", 600, 645), _appt("b", 655, 700)], buffer_time=10) == []
+    assert _pairs(sweep_day([_appt("a", 600, 645), _appt("b", 650, 700)], buffer_time=10)) == [("a", "b", 0)]
+
+
+def test_overlap_minutes_and_containment():
+    day = [_appt("outer", 600, 720), _appt("inner", 630, 660), _appt("tail", 700, 760)]
+
+    assert _pairs(sweep_day(day)) == [
+        ("outer", "inner", 30),
+        ("outer", "tail", 20),
+    ]
+
+
+def test_every_pair_is_reported_in_start_order():
+    # Input order does not matter; three mutually overlapping bookings are three pairs
+    day = [_appt("c", 620, 680), _appt("a", 600, 660), _appt("b", 610, 670)]
+
+    conflicts = sweep_day(day, buffer_time=0)
+
+    assert _pairs(conflicts) == [("a", "b", 50), ("a", "c", 40), ("b", "c", 50)]
+    assert conflicts[0]["first"]["time"] == "10:00"
+    assert conflicts[0]["second"]["end"] == "11:10"
+
+
+def test_matches_a_pairwise_check():
+    rng = random.Random(7)
+    for _ in range(200):
+        day = [_appt(f"x{i}", start, start + rng.choice((30, 45, 60))) for i, start in
+               enumerate(rng.sample(range(540, 1080, 5), rng.randint(0, 8)))]
+        expected = {
+            frozenset((a["id"], b["id"]))
+            for i, a in enumerate(day) for b in day[i + 1:]
+            if a["start"] < b["end"] + 10 and b["start"] < a["end"] + 10
+        }
+        found = [frozenset((c["first"]["id"], c["second"]["id"])) for c in sweep_day(day, buffer_time=10)]
+        assert len(found) == len(set(found))
+        assert set(found) == expected
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, keyset_filter, page_size
+
+SORT = [("appointment_date", -1), ("created_at", 1), ("id", 1)]
+
+
+def _matches(item, condition):
+    """Evaluate a keyset_filter condition against a plain dict"""
+    def holds(field, expected):
+        if isinstance(expected, dict):
+            (op, value), = expected.items()
+            return item[field] > value if op == "$gt" else item[field] < value
+        return item[field] == expected
+    return any(all(holds(field, expected) for field, expected in branch.items()) for branch in condition["$or"])
+
+
+def test_keyset_filter_branches():
+    assert keyset_filter([("date", -1), ("id", -1)], ["2025-11-15", "abc"]) == {
+        "$or": [
+            {"date": {"$lt": "2025-11-15"}},
+            {"date": "2025-11-15", "id": {"$lt": "abc"}}
+        ]
+    }
+
+
+def test_keyset_filter_selects_exactly_the_items_after_the_cursor():
+    items = [
+        {"appointment_date": date, "created_at": created, "id": ident}
+        for date in ("2025-11-14", "2025-11-15", "2025-11-16")
+        for created in (1, 2)
+        for ident in ("a", "b")
+    ]
+    ordered = sorted(items, key=lambda i: i["id"])
+    ordered = sorted(ordered, key=lambda i: i["created_at"])
+    ordered = sorted(ordered, key=lambda i: i["appointment_date"], reverse=True)
+
+    for position, last in enumerate(ordered):
+        condition = keyset_filter(SORT, [last[field] for field, _ in SORT])
+        assert [item for item in ordered if _matches(item, condition)] == ordered[position + 1:]
+
+
+def test_cursor_round_trip_keeps_datetimes():
+    values = ["2025-11-15", datetime(2025, 11, 15, 9, 30, tzinfo=timezone.utc), "abc"]
+    cursor = encode_cursor(values)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor, SORT) == values
+    assert isinstance(decode_cursor(cursor, SORT)[1], datetime)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor(["only-one"]), encode_cursor([]) + "x", "e30"])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, SORT)
+
+
+def test_page_size_defaults_and_clamps():
+    assert DEFAULT_PAGE_SIZE == MAX_PAGE_SIZE == 1000
+    assert page_size(None) == 1000
+    assert page_size(0) == 1
+    assert page_size(50) == 50
+    assert page_size(5000) == MAX_PAGE_SIZE
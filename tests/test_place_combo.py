@@ -0,0 +1,65 @@
+from availability_service import WorkingDay, place_combo
+from booking_service import DayOccupancy
+
+OPEN = WorkingDay([(540, 1080)])  # 09:00-18:00
+
+
+def test_one_guest_runs_back_to_back_across_artists():
+    items = [
+        {"duration": 45, "artist_ids": ["a"], "guest": 0},
+        {"duration": 30, "artist_ids": ["b"], "guest": 0},
+    ]
+    placement = place_combo(
+        items, 600, {"a": OPEN, "b": OPEN}, {"a": DayOccupancy([]), "b": DayOccupancy([])}
+    )
+
+    assert placement == [
+        {"artist_id": "a", "start_minutes": 600, "item": 0},
+        {"artist_id": "b", "start_minutes": 645, "item": 1},  # no buffer between artists
+    ]
+
+
+def test_same_artist_adds_the_buffer_between_services():
+    items = [
+        {"duration": 45, "artist_ids": ["a"], "guest": 0},
+        {"duration": 30, "artist_ids": ["a"], "guest": 0},
+    ]
+    placement = place_combo(items, 600, {"a": OPEN}, {"a": DayOccupancy([])}, buffer_time=10)
+
+    assert [p["start_minutes"] for p in placement] == [600, 655]
+
+
+def test_parallel_guests_never_double_book_an_artist():
+    items = [
+        {"duration": 60, "artist_ids": ["a", "b"], "guest": 0},
+        {"duration": 60, "artist_ids": ["a", "b"], "guest": 1},
+    ]
+    placement = place_combo(
+        items, 600, {"a": OPEN, "b": OPEN}, {"a": DayOccupancy([]), "b": DayOccupancy([])}
+    )
+
+    assert [p["artist_id"] for p in placement] == ["a", "b"]
+    assert [p["start_minutes"] for p in placement] == [600, 600]
+
+
+def test_backtracks_when_a_later_service_does_not_fit():
+    items = [
+        {"duration": 30, "artist_ids": ["a", "b"], "guest": 0},
+        {"duration": 40, "artist_ids": ["a"], "guest": 0},
+    ]
+    # With a doing both, the second service needs the buffer and runs into
+    # a's 11:20 booking; giving the first service to b avoids the buffer
+    occupancies = {"a": DayOccupancy([(680, 740)]), "b": DayOccupancy([])}
+    placement = place_combo(items, 600, {"a": OPEN, "b": OPEN}, occupancies)
+
+    assert placement == [
+        {"artist_id": "b", "start_minutes": 600, "item": 0},
+        {"artist_id": "a", "start_minutes": 630, "item": 1},
+    ]
+
+
+def test_none_when_outside_working_hours_or_booked():
+    items = [{"duration": 60, "artist_ids": ["a"], "guest": 0}]
+
+    assert place_combo(items, 1050, {"a": OPEN}, {"a": DayOccupancy([])}) is None
+    assert place_combo(items, 600, {"a": OPEN}, {"a": DayOccupancy([(620, 650)])}) is None
@@ -0,0 +1,50 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from booking_service import DayOccupancy
+from slot_claims import CLAIM_GRANULE, booking_claims_expiry, claim_ids
+
+
+def test_claim_ids_cover_range_plus_buffer():
+    # Docstring example: 10:00-10:45 with 10 min buffer
+    ids = claim_ids("artist", "2025-11-15", 600, 645, buffer_time=10)
+
+    assert ids[0] == "artist|2025-11-15|600"
+    assert ids[-1] == "artist|2025-11-15|650"
+    assert len(ids) == (655 - 600) // CLAIM_GRANULE
+
+
+def test_claim_ids_round_unaligned_start_down():
+    ids = claim_ids("artist", "2025-11-15", 603, 630, buffer_time=0)
+
+    assert ids[0] == "artist|2025-11-15|600"
+    assert ids[-1] == "artist|2025-11-15|625"
+
+
+def test_claim_ids_are_scoped_to_artist_and_day():
+    first = set(claim_ids("a", "2025-11-15", 600, 645))
+
+    assert not first & set(claim_ids("b", "2025-11-15", 600, 645))
+    assert not first & set(claim_ids("a", "2025-11-16", 600, 645))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_claims_conflict_exactly_when_occupancy_says_taken(seed):
+    """Back-to-back bookings need the buffer; claims and DayOccupancy agree on it"""
+    rng = random.Random(seed)
+    buffer_time = 10
+    booked_start = rng.randrange(540, 1080, 5)
+    booked_end = booked_start + rng.choice([30, 45, 60])
+    booked = set(claim_ids("a", "d", booked_start, booked_end, buffer_time))
+    occupancy = DayOccupancy([(booked_start, booked_end)])
+
+    for start in range(480, 1140, 5):
+        duration = 45
+        candidate = set(claim_ids("a", "d", start, start + duration, buffer_time))
+        assert bool(candidate & booked) == (not occupancy.is_free(start, duration, buffer_time))
+
+
+def test_booking_claims_expire_the_day_after_their_date():
+    assert booking_claims_expiry("2025-11-15") == datetime(2025, 11, 16, tzinfo=timezone.utc)
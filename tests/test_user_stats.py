@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+from user_stats_service import _contribution, apply_appointment_change, stats_view
+
+
+def _appointment(status, date="2025-11-15", user_id="u1"):
+    return {"id": "appt-1", "user_id": user_id, "status": status, "appointment_date": date}
+
+
+class _RecordingCollection:
+    """user_stats stand-in recording updates for an existing document"""
+
+    def __init__(self):
+        self.updates = []
+
+    async def update_one(self, query, update, upsert=False):
+        self.updates.append((query, update))
+        return SimpleNamespace(upserted_id=None)
+
+
+def _apply(previous, current):
+    collection = _RecordingCollection()
+    asyncio.run(apply_appointment_change(SimpleNamespace(user_stats=collection), previous, current))
+    return collection.updates
+
+
+def test_contribution_per_status():
+    assert _contribution(_appointment("pending")) == {"total": 1, "active_by_date.2025-11-15": 1}
+    assert _contribution(_appointment("confirmed")) == {"total": 1, "active_by_date.2025-11-15": 1}
+    assert _contribution(_appointment("completed")) == {"total": 1, "completed": 1}
+    assert _contribution(_appointment("cancelled")) == {"total": 1, "cancelled": 1}
+    assert _contribution(_appointment("no_show")) == {"total": 1}
+
+
+def test_contribution_ignores_guest_bookings():
+    assert _contribution(None) == {}
+    assert _contribution(_appointment("pending", user_id=None)) == {}
+
+
+def test_status_change_moves_one_count():
+    updates = _apply(_appointment("confirmed"), _appointment("cancelled"))
+
+    query, update = updates[0]
+    assert query == {"_id": "u1"}
+    assert update["$inc"] == {"cancelled": 1, "active_by_date.2025-11-15": -1}
+    # The emptied date is unset only where its count reached zero
+    assert updates[1] == (
+        {"_id": "u1", "$or": [{"active_by_date.2025-11-15": {"$lte": 0}}]},
+        {"$unset": {"active_by_date.2025-11-15": ""}}
+    )
+
+
+def test_new_booking_and_unchanged_write():
+    assert _apply(None, _appointment("pending"))[0][1]["$inc"] == {"total": 1, "active_by_date.2025-11-15": 1}
+    assert _apply(_appointment("pending"), _appointment("pending")) == []
+
+
+def test_stats_view_counts_upcoming_from_today():
+    stats = {
+        "total": 5,
+        "completed": 2,
+        "cancelled": 1,
+        "active_by_date": {"2025-11-10": 1, "2025-11-15": 1, "2025-12-01": 2}
+    }
+
+    assert stats_view(stats, today="2025-11-15") == {
+        "total_appointments": 5,
+        "upcoming_appointments": 3,
+        "completed_appointments": 2,
+        "cancelled_appointments": 1
+    }
+    assert stats_view(None, today="2025-11-15")["upcoming_appointments"] == 0
@@ -0,0 +1,87 @@
+import asyncio
+from types import SimpleNamespace
+
+from utilization_service import build_occupancy_tensor, summarize_utilization
+
+SCHEDULES = [
+    {
+        "artist_id": "a",
+        "weekly": {"0": [{"start": "09:00", "end": "11:00"}], "1": [{"start": "09:00", "end": "11:00"}]},
+        "breaks": [],
+        "days_off": [{"start_date": "2025-11-18", "end_date": None}],
+    },
+    {
+        "artist_id": "b",
+        "weekly": {"0": [{"start": "10:00", "end": "12:00"}]},
+        "breaks": [],
+        "days_off": [],
+    },
+]
+
+APPOINTMENTS = [
+    # Monday 2025-11-17
+    {"id": "1", "artist_id": "a", "appointment_date": "2025-11-17", "appointment_time": "09:00", "start_minutes": 540, "duration_minutes": 60},
+    {"id": "2", "artist_id": "b", "appointment_date": "2025-11-17", "appointment_time": "11:30", "start_minutes": 690, "duration_minutes": 60},
+    # Tuesday: a's day off, and b doesn't work Tuesdays (runs past midnight)
+    {"id": "3", "artist_id": "a", "appointment_date": "2025-11-18", "appointment_time": "09:00", "start_minutes": 540, "duration_minutes": 60},
+    {"id": "4", "artist_id": "b", "appointment_date": "2025-11-18", "appointment_time": "23:30", "start_minutes": 1410, "duration_minutes": 60},
+]
+
+
+class _Find:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, n):
+        return [dict(doc) for doc in self.docs]
+
+
+def _tensor():
+    db = SimpleNamespace(
+        appointments=SimpleNamespace(find=lambda query, projection: _Find(APPOINTMENTS)),
+        artist_schedules=SimpleNamespace(find=lambda query, projection: _Find(SCHEDULES)),
+    )
+    return asyncio.run(build_occupancy_tensor(db, ["a", "b"], "2025-11-17", "2025-11-18"))
+
+
+def test_tensor_paints_bookings_and_masks_days_off():
+    tensor = _tensor()
+
+    assert tensor["dates"] == ["2025-11-17", "2025-11-18"]
+    assert tensor["weekdays"].tolist() == [0, 1]
+    assert tensor["booked"].shape == (2, 2, 1440)
+    # Bookings are half-open: minute 600 is free again
+    assert tensor["booked"][0, 0, 540:600].all() and not tensor["booked"][0, 0, 600]
+    # Clipped at midnight instead of spilling into the next day
+    assert tensor["booked"][1, 1, 1410:].all()
+    # Tuesday hours exist in a's week but the day off removes them
+    assert not tensor["working"][0, 1].any()
+    assert tensor["working"][0, 0].sum() == 120
+
+
+def test_summary_counts_only_booked_working_minutes():
+    summary = summarize_utilization(_tensor(), ["a", "b"])
+
+    assert summary["overall"] == {"booked_hours": 1.5, "working_hours": 4.0, "utilization": 0.375}
+    assert [(artist["artist_id"], artist["utilization"]) for artist in summary["artists"]] == [("a", 0.5), ("b", 0.25)]
+    assert summary["weekdays"] == [{"weekday": 0, "utilization": 0.375}]
+    assert summary["hours"] == [
+        {"hour": 9, "utilization": 1.0},
+        {"hour": 10, "utilization": 0.0},
+        {"hour": 11, "utilization": 0.5},
+    ]
+    assert summary["heatmap"] == {"weekdays": [0], "hours": [9, 10, 11], "utilization": [[1.0, 0.0, 0.5]]}
+    # Fully booked quarter hours: a 09:00-10:00, b 11:30-12:00
+    assert all(slot["utilization"] == 1.0 for slot in summary["busiest_slots"])
+    assert {slot["time"] for slot in summary["busiest_slots"]} <= {"09:00", "09:15", "09:30", "09:45", "11:30", "11:45"}
+    assert summary["emptiest_slots"][0]["utilization"] == 0.0
+
+
+def test_summary_of_nobody_working():
+    tensor = _tensor()
+    tensor["working"][:] = False
+
+    summary = summarize_utilization(tensor, ["a", "b"])
+
+    assert summary["overall"]["utilization"] == 0.0
+    assert summary["hours"] == [] and summary["busiest_slots"] == []
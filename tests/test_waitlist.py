@@ -0,0 +1,141 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import waitlist_service
+from waitlist_service import _offer_for, match_freed_slot, waitlist_match_keys
+
+DATE = (datetime.now() + timedelta(days=3)).strftime("%Y-%m-%d")
+
+
+def _entry(entry_id, duration=45, start="09:00", end="18:00", artist_ids=("a",), created_at=0):
+    windows = [{"date": DATE, "start": start, "end": end}]
+    return {
+        "id": entry_id,
+        "user_id": f"user-{entry_id}",
+        "service_name": "Maniküre",
+        "duration_minutes": duration,
+        "windows": windows,
+        "match_keys": waitlist_match_keys(list(artist_ids), windows),
+        "status": "waiting",
+        "created_at": created_at
+    }
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, n):
+        return [dict(doc) for doc in self.docs[:n]]
+
+
+class _Entries:
+    """waitlist_entries stand-in supporting the queries match_freed_slot makes"""
+
+    def __init__(self, entries):
+        self.entries = {entry["id"]: entry for entry in entries}
+
+    def find(self, query, projection=None):
+        keys = set(query["match_keys"]["$in"])
+        return _Cursor([
+            entry for entry in self.entries.values()
+            if entry["status"] == query["status"] and keys & set(entry["match_keys"])
+        ])
+
+    async def update_one(self, query, update):
+        entry = self.entries[query["id"]]
+        if entry["status"] != query["status"]:
+            return SimpleNamespace(modified_count=0)
+        entry.update(update["$set"])
+        return SimpleNamespace(modified_count=1)
+
+
+class _Artists:
+    async def find_one(self, query, projection=None):
+        return {"name": "Lea"}
+
+
+class _Notifications:
+    def __init__(self):
+        self.sent = []
+
+    async def create_notification(self, **kwargs):
+        self.sent.append(kwargs)
+
+
+def _match(monkeypatch, entries, available, freed=(600, 660)):
+    async def fake_available_slots(db, artist_id, date, duration, buffer_time=10):
+        return available, []
+
+    monkeypatch.setattr(waitlist_service, "get_available_slots", fake_available_slots)
+    db = SimpleNamespace(waitlist_entries=_Entries(entries), artists=_Artists())
+    notifications = _Notifications()
+    notified = asyncio.run(match_freed_slot(db, notifications, "a", DATE, *freed))
+    return notified, db.waitlist_entries.entries, notifications.sent
+
+
+def test_match_keys_per_artist_or_any():
+    windows = [{"date": "2025-11-16"}, {"date": "2025-11-15"}, {"date": "2025-11-15"}]
+    assert waitlist_match_keys(["a", "b"], windows) == [
+        "a|2025-11-15", "a|2025-11-16", "b|2025-11-15", "b|2025-11-16"
+    ]
+    assert waitlist_match_keys([], windows) == ["*|2025-11-15", "*|2025-11-16"]
+
+
+def test_offer_must_use_the_freed_time():
+    entry = _entry("e1", duration=45)
+    available = ["08:00", "09:00", "10:00", "11:00"]
+
+    # Freed 10:00-11:00: 09:00 ends before it, 10:00 is the first overlapping start
+    assert _offer_for(entry, DATE, 600, 660, available) == "10:00"
+    # A start whose appointment only touches the freed range does not use it
+    assert _offer_for(entry, DATE, 600, 660, ["09:15", "11:00"]) is None
+    assert _offer_for(entry, DATE, 600, 660, ["09:20"]) == "09:20"
+
+
+def test_offer_stays_inside_the_window_and_after_earliest():
+    entry = _entry("e1", duration=45, start="10:15", end="11:00")
+
+    assert _offer_for(entry, DATE, 600, 700, ["10:00", "10:15", "10:30"]) == "10:15"
+    assert _offer_for(entry, DATE, 600, 700, ["10:30"]) is None  # Would end at 11:15
+    assert _offer_for(entry, DATE, 600, 700, ["10:15"], earliest=620) is None
+    assert _offer_for(entry, "2000-01-01", 600, 700, ["10:15"]) is None  # Other date
+
+
+def test_longest_waiting_entries_are_notified_up_to_the_limit(monkeypatch):
+    entries = [_entry(f"e{i}", created_at=i) for i in range(5)]
+    entries.append(_entry("elsewhere", artist_ids=("b",), created_at=-1))
+    entries.append(_entry("anyone", artist_ids=(), created_at=10))
+
+    notified, stored, sent = _match(monkeypatch, entries, ["10:00"])
+
+    assert notified == waitlist_service.WAITLIST_NOTIFY_COUNT
+    assert [message["user_id"] for message in sent] == ["user-e0", "user-e1", "user-e2"]
+    assert stored["e0"]["offer"] == {"artist_id": "a", "date": DATE, "time": "10:00"}
+    assert stored["e3"]["status"] == "waiting"
+    assert stored["elsewhere"]["status"] == "waiting"
+
+
+def test_entries_already_notified_are_skipped(monkeypatch):
+    taken = _entry("taken")
+    taken["status"] = "notified"
+
+    notified, _, sent = _match(monkeypatch, [taken, _entry("e1", created_at=1)], ["10:00"])
+
+    assert notified == 1
+    assert [message["user_id"] for message in sent] == ["user-e1"]
+
+
+def test_no_offer_when_nothing_fits(monkeypatch):
+    notified, stored, sent = _match(monkeypatch, [_entry("e1", end="10:30")], ["10:00"])
+    assert (notified, sent) == (0, [])
+    assert stored["e1"]["status"] == "waiting"
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+from availability_service import WorkingDay, _subtract, compile_working_day
+from booking_service import is_valid_booking_date
+
+SCHEDULE = {
+    "weekly": {
+        "0": [{"start": "09:00", "end": "18:00"}],
+        "6": [{"start": "11:00", "end": "15:00"}],
+    },
+    "breaks": [
+        {"weekday": None, "start": "12:30", "end": "13:00"},
+        {"weekday": 0, "start": "16:00", "end": "16:30"},
+    ],
+    "days_off": [{"start_date": "2025-12-22", "end_date": "2025-12-29"}],
+    "slot_interval": 15,
+}
+
+
+def test_subtract_splits_trims_and_keeps():
+    intervals = [(540, 720), (780, 1080)]
+
+    assert _subtract(intervals, 600, 630) == [(540, 600), (630, 720), (780, 1080)]
+    assert _subtract(intervals, 700, 800) == [(540, 700), (800, 1080)]
+    assert _subtract(intervals, 720, 780) == intervals
+    assert _subtract(intervals, 500, 1100) == []
+
+
+def test_weekday_hours_minus_breaks():
+    monday = compile_working_day(SCHEDULE, "2025-11-17")
+
+    assert monday.intervals == [(540, 750), (780, 960), (990, 1080)]
+    assert monday.slot_interval == 15
+    assert monday.contains(540, 45)
+    assert not monday.contains(735, 30)  # runs into the lunch break
+
+
+def test_sunday_hours_of_an_artist():
+    sunday = compile_working_day(SCHEDULE, "2025-11-16")
+
+    assert sunday.is_open
+    assert sunday.intervals == [(660, 750), (780, 900)]
+
+
+def test_days_off_and_unscheduled_weekdays_are_closed():
+    assert not compile_working_day(SCHEDULE, "2025-12-22").is_open  # Monday, day off
+    assert not compile_working_day(SCHEDULE, "2025-11-18").is_open  # Tuesday, no hours
+
+
+def test_salon_hours_without_a_schedule():
+    assert compile_working_day(None, "2025-11-17").intervals == [(540, 1140)]
+    assert compile_working_day(None, "2025-11-22").intervals == [(600, 1020)]
+    assert not compile_working_day(None, "2025-11-16").is_open
+
+
+def test_candidate_starts_fit_inside_each_interval():
+    day = WorkingDay([(540, 600), (630, 690)], slot_interval=15)
+
+    assert day.candidate_starts(30) == [540, 555, 570, 630, 645, 660]
+
+
+def test_booking_date_check_leaves_closed_days_to_working_hours():
+    next_sunday = date.today() + timedelta(days=(6 - date.today().weekday()) or 7)
+
+    assert is_valid_booking_date(next_sunday.isoformat()) == (True, "")
+    assert not is_valid_booking_date((date.today() - timedelta(days=1)).isoformat())[0]
+    assert not is_valid_booking_date((date.today() + timedelta(days=91)).isoformat())[0]